@@ -0,0 +1,12 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark suite running discovery on generated repositories.
+
+Run from the repository root as ``python -m benchmarks run``, see
+``python -m benchmarks --help`` for the available commands. The suite does
+not need network access, trees are generated deterministically from their
+layout, size and number of locales.
+"""
@@ -0,0 +1,170 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Command line interface of the benchmark suite.
+
+Run from the repository root as ``PYTHONPATH=. python -m benchmarks``.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .generator import LOCALES, SIZES, TreeGenerator, ensure_tree, get_specs
+from .report import compare_reports, get_benchmark, get_report, load_report
+from .scenarios import SCENARIOS, run_scenario
+
+if TYPE_CHECKING:
+    from argparse import Namespace
+    from collections.abc import Iterator
+    from contextlib import AbstractContextManager
+    from typing import TextIO
+
+    from .generator import TreeSpec
+
+LAYOUTS = [*TreeGenerator.layouts, TreeGenerator.monorepo]
+REPEAT = 3
+
+
+def get_parser() -> ArgumentParser:
+    """Return parser for the command line arguments."""
+    parser = ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark discovery on generated repositories.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    trees = ArgumentParser(add_help=False)
+    trees.add_argument(
+        "--layout",
+        action="append",
+        choices=LAYOUTS,
+        help="Repository layout, can be repeated (default: all)",
+    )
+    trees.add_argument(
+        "--size",
+        action="append",
+        choices=list(SIZES),
+        help="Number of files, can be repeated (default: 10k)",
+    )
+    trees.add_argument(
+        "--locales",
+        action="append",
+        type=int,
+        choices=LOCALES,
+        help="Number of locales, can be repeated (default: 10)",
+    )
+    trees.add_argument("--seed", type=int, default=0, help="Seed of the generator")
+    trees.add_argument(
+        "--workdir",
+        type=Path,
+        help="Directory keeping generated trees between runs",
+    )
+
+    generate = commands.add_parser(
+        "generate", parents=[trees], help="Generate trees without running scenarios"
+    )
+    generate.set_defaults(func=generate_command)
+
+    run = commands.add_parser("run", parents=[trees], help="Run scenarios")
+    run.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run, can be repeated (default: all)",
+    )
+    run.add_argument(
+        "--repeat", type=int, default=REPEAT, help="Number of runs of a scenario"
+    )
+    run.add_argument("--output", type=Path, help="File to write the JSON report to")
+    run.set_defaults(func=run_command)
+
+    compare = commands.add_parser("compare", help="Compare report with a baseline")
+    compare.add_argument("baseline", type=Path, help="Baseline report")
+    compare.add_argument("current", type=Path, help="Current report")
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed slowdown as a fraction of the baseline time",
+    )
+    compare.set_defaults(func=compare_command)
+    return parser
+
+
+def get_workdir(params: Namespace) -> AbstractContextManager[str | Path]:
+    """Return context with directory for the generated trees."""
+    if params.workdir is None:
+        return tempfile.TemporaryDirectory(prefix="translation-finder-")
+    params.workdir.mkdir(parents=True, exist_ok=True)
+    return nullcontext(params.workdir)
+
+
+def get_tree_specs(params: Namespace) -> Iterator[TreeSpec]:
+    """Return specifications of the selected trees."""
+    return get_specs(
+        params.layout or LAYOUTS,
+        params.size or ["10k"],
+        params.locales or [LOCALES[0]],
+        params.seed,
+    )
+
+
+def generate_command(stdout: TextIO, params: Namespace) -> int:
+    """Generate trees into the working directory."""
+    if params.workdir is None:
+        print("The --workdir is required to generate trees", file=stdout)
+        return 2
+    params.workdir.mkdir(parents=True, exist_ok=True)
+    for spec in get_tree_specs(params):
+        print(ensure_tree(spec, params.workdir), file=stdout)
+    return 0
+
+
+def run_command(stdout: TextIO, params: Namespace) -> int:
+    """Run scenarios on the trees and write the report."""
+    report = get_report()
+    scenarios = params.scenario or list(SCENARIOS)
+    with get_workdir(params) as workdir:
+        for spec in get_tree_specs(params):
+            root = ensure_tree(spec, Path(workdir))
+            for scenario in scenarios:
+                timing = run_scenario(scenario, root, params.repeat)
+                report["benchmarks"].append(get_benchmark(spec, scenario, timing))
+                print(
+                    f"{spec.name:24} {scenario:12} {timing.min * 1000:9.1f}ms "
+                    f"{timing.results:8}",
+                    file=stdout,
+                )
+    if params.output:
+        params.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+def compare_command(stdout: TextIO, params: Namespace) -> int:
+    """Compare reports, failing on regressions."""
+    regressions = compare_reports(
+        stdout,
+        load_report(params.baseline),
+        load_report(params.current),
+        params.threshold,
+    )
+    return 1 if regressions else 0
+
+
+def main(stdout: TextIO, args: list[str] | None = None) -> int:
+    """Execute the benchmark command."""
+    params = get_parser().parse_args(args)
+    return params.func(stdout, params)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.stdout))
@@ -0,0 +1,294 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Deterministic generator of synthetic repositories."""
+
+from __future__ import annotations
+
+import json
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, ClassVar
+
+from translation_finder.discovery.base import LANGUAGE_CODES
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+LOCALES = (10, 200)
+# Share of generated files which are translations, the rest is source code
+TRANSLATED_SHARE = 0.5
+# Share of source code placed in excluded directories
+EXCLUDED_SHARE = 0.1
+# Files placed in a single source code directory
+FILES_PER_DIR = 100
+# Strings in every translation file
+ENTRIES = 20
+# Share of i18next strings with plural forms
+PLURAL_SHARE = 0.2
+WORDS = (
+    "account",
+    "cancel",
+    "delete",
+    "download",
+    "error",
+    "file",
+    "message",
+    "open",
+    "project",
+    "save",
+    "settings",
+    "translation",
+    "upload",
+    "user",
+)
+
+
+def get_languages(count: int) -> list[str]:
+    """Return language codes used for translations."""
+    codes = sorted(
+        code for code in LANGUAGE_CODES if len(code) == len("en") and code != "en"
+    )
+    return list(islice(codes, count))
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    """Parameters of a generated tree."""
+
+    layout: str
+    files: int
+    locales: int
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        """Name identifying the tree."""
+        size = next(
+            (name for name, files in SIZES.items() if files == self.files),
+            str(self.files),
+        )
+        return f"{self.layout}-{size}-{self.locales}"
+
+    @property
+    def components(self) -> int:
+        """Number of translated components."""
+        return max(1, int(self.files * TRANSLATED_SHARE) // (self.locales + 1))
+
+
+class TreeGenerator:
+    """Write a synthetic repository for a layout."""
+
+    layouts: ClassVar[tuple[str, ...]] = (
+        "android",
+        "ios",
+        "gettext",
+        "i18next",
+        "rails",
+        "properties",
+    )
+    # Layout of the monorepo mixing all the others
+    monorepo: ClassVar[str] = "monorepo"
+
+    def __init__(self, spec: TreeSpec) -> None:
+        self.spec = spec
+        self.random = random.Random(f"{spec.name}-{spec.seed}")  # ruff:ignore[suspicious-non-cryptographic-random-usage]
+        self.languages = get_languages(spec.locales)
+        self.written = 0
+
+    def write(self, path: Path, content: str) -> None:
+        """Write a file, creating its directory."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        self.written += 1
+
+    def get_entries(self) -> list[tuple[str, str]]:
+        """Return keys and source strings of a component."""
+        entries = []
+        for pos in range(ENTRIES):
+            words = self.random.sample(WORDS, 3)
+            entries.append(
+                (f"{'_'.join(words[:2])}_{pos}", " ".join(words).capitalize())
+            )
+        return entries
+
+    def generate(self, root: Path) -> None:
+        """Write the tree into a directory."""
+        components = self.spec.components
+        if self.spec.layout == self.monorepo:
+            for pos in range(components):
+                layout = self.layouts[pos % len(self.layouts)]
+                self.write_component(root / "packages" / f"{layout}{pos}", layout, pos)
+        else:
+            for pos in range(components):
+                self.write_component(root, self.spec.layout, pos)
+        self.write_sources(root)
+
+    def write_component(self, root: Path, layout: str, pos: int) -> None:
+        """Write source and translation files of a component."""
+        entries = self.get_entries()
+        writer = getattr(self, f"write_{layout}")
+        for language in (None, *self.languages):
+            writer(root, pos, entries, language)
+
+    def write_sources(self, root: Path) -> None:
+        """Write source code files up to the requested number of files."""
+        remaining = max(self.spec.files - self.written, 0)
+        excluded = int(remaining * EXCLUDED_SHARE)
+        for pos in range(remaining):
+            directory = root / "src" if pos >= excluded else root / "node_modules"
+            directory /= f"pkg{pos // FILES_PER_DIR}"
+            self.write(
+                directory / f"module{pos}.py",
+                f'"""Module {pos}."""\n\nVALUE = {self.random.randrange(1000)}\n',
+            )
+
+    def write_android(
+        self, root: Path, pos: int, entries: list[tuple[str, str]], language: str | None
+    ) -> None:
+        """Write Android string resources."""
+        values = "values" if language is None else f"values-{language}"
+        lines = ['<?xml version="1.0" encoding="utf-8"?>', "<resources>"]
+        lines.extend(
+            f'    <string name="{key}">{self.translate(value, language)}</string>'
+            for key, value in entries
+        )
+        lines.append("</resources>\n")
+        self.write(
+            root / f"feature{pos}" / "src" / "main" / "res" / values / "strings.xml",
+            "\n".join(lines),
+        )
+
+    def write_ios(
+        self, root: Path, pos: int, entries: list[tuple[str, str]], language: str | None
+    ) -> None:
+        """Write iOS strings files."""
+        lproj = f"{language or 'en'}.lproj"
+        content = "".join(
+            f'/* {value} */\n"{key}" = "{self.translate(value, language)}";\n\n'
+            for key, value in entries
+        )
+        self.write(root / f"Module{pos}" / lproj / "Localizable.strings", content)
+
+    def write_gettext(
+        self, root: Path, pos: int, entries: list[tuple[str, str]], language: str | None
+    ) -> None:
+        """Write gettext PO files and their template."""
+        header = [
+            'msgid ""',
+            'msgstr ""',
+            f'"Project-Id-Version: domain{pos}\\n"',
+            f'"Language: {language or ""}\\n"',
+            '"Content-Type: text/plain; charset=UTF-8\\n"',
+            "",
+        ]
+        for key, value in entries:
+            header.extend(
+                (
+                    f"#: src/{key}.c:{len(key)}",
+                    f'msgid "{value}"',
+                    f'msgstr "{self.translate(value, language) if language else ""}"',
+                    "",
+                )
+            )
+        if language is None:
+            path = root / "locale" / f"domain{pos}.pot"
+        else:
+            path = root / "locale" / language / "LC_MESSAGES" / f"domain{pos}.po"
+        self.write(path, "\n".join(header))
+
+    def write_i18next(
+        self, root: Path, pos: int, entries: list[tuple[str, str]], language: str | None
+    ) -> None:
+        """Write i18next JSON files with plurals and interpolation."""
+        data: dict[str, object] = {}
+        for key, value in entries:
+            text = self.translate(value, language)
+            if self.random.random() < PLURAL_SHARE:
+                data[f"{key}_one"] = f"{{{{count}}}} {text}"
+                data[f"{key}_other"] = f"{{{{count}}}} {text}s"
+            else:
+                data[key] = text
+        self.write(
+            root / "public" / "locales" / (language or "en") / f"ns{pos}.json",
+            json.dumps({"section": data}, indent=2, ensure_ascii=False),
+        )
+
+    def write_rails(
+        self, root: Path, pos: int, entries: list[tuple[str, str]], language: str | None
+    ) -> None:
+        """Write Rails YAML files keyed by the language."""
+        code = language or "en"
+        lines = [f"{code}:", f"  component{pos}:"]
+        lines.extend(
+            f'    {key}: "{self.translate(value, language)}"' for key, value in entries
+        )
+        self.write(
+            root / "config" / "locales" / f"component{pos}" / f"{code}.yml",
+            "\n".join(lines) + "\n",
+        )
+
+    def write_properties(
+        self, root: Path, pos: int, entries: list[tuple[str, str]], language: str | None
+    ) -> None:
+        """Write Java properties files."""
+        suffix = "" if language is None else f"_{language}"
+        content = "".join(
+            f"{key.replace('_', '.')}={self.translate(value, language)}\n"
+            for key, value in entries
+        )
+        self.write(
+            root
+            / f"module{pos}"
+            / "src"
+            / "main"
+            / "resources"
+            / f"messages{suffix}.properties",
+            f"# Messages of module {pos}\n{content}",
+        )
+
+    @staticmethod
+    def translate(value: str, language: str | None) -> str:
+        """Return a pseudo translation of a string."""
+        if language is None:
+            return value
+        return f"[{language}] {value}"
+
+
+def get_specs(
+    layouts: list[str], sizes: list[str], locales: list[int], seed: int = 0
+) -> Generator[TreeSpec]:
+    """Yield tree specifications for all combinations."""
+    for layout in layouts:
+        for size in sizes:
+            for count in locales:
+                yield TreeSpec(layout, SIZES[size], count, seed)
+
+
+def ensure_tree(spec: TreeSpec, workdir: Path) -> Path:
+    """
+    Return directory with the generated tree.
+
+    Trees are kept in the working directory and generated again only when
+    their parameters change.
+    """
+    root = workdir / spec.name
+    marker = workdir / f"{spec.name}.json"
+    expected = json.dumps(asdict(spec), sort_keys=True)
+    if (
+        root.exists()
+        and marker.exists()
+        and marker.read_text(encoding="utf-8") == expected
+    ):
+        return root
+    if root.exists():
+        shutil.rmtree(root)
+    marker.unlink(missing_ok=True)
+    TreeGenerator(spec).generate(root)
+    marker.write_text(expected, encoding="utf-8")
+    return root
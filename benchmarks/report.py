@@ -0,0 +1,123 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""JSON reports of benchmark runs and their comparison."""
+
+from __future__ import annotations
+
+import json
+import platform
+import sys
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, TypedDict
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import TextIO
+
+    from .generator import TreeSpec
+    from .scenarios import Timing
+
+REPORT_VERSION = 1
+
+
+class BenchmarkDict(TypedDict):
+    """Serialized result of a scenario run on a tree."""
+
+    name: str
+    layout: str
+    files: int
+    locales: int
+    scenario: str
+    times: list[float]
+    min: float
+    median: float
+    results: int
+
+
+class ReportDict(TypedDict):
+    """Serialized benchmark report."""
+
+    version: int
+    created: str
+    python: str
+    platform: str
+    benchmarks: list[BenchmarkDict]
+
+
+def get_report() -> ReportDict:
+    """Return empty report describing the environment."""
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "benchmarks": [],
+    }
+
+
+def get_benchmark(spec: TreeSpec, scenario: str, timing: Timing) -> BenchmarkDict:
+    """Return serialized result of a scenario run."""
+    return {
+        "name": spec.name,
+        "layout": spec.layout,
+        "files": spec.files,
+        "locales": spec.locales,
+        "scenario": scenario,
+        "times": timing.times,
+        "min": timing.min,
+        "median": timing.median,
+        "results": timing.results,
+    }
+
+
+def load_report(path: Path) -> ReportDict:
+    """Load report from a file."""
+    report: ReportDict = json.loads(path.read_text(encoding="utf-8"))
+    if report.get("version") != REPORT_VERSION:
+        msg = f"Unsupported report version in {path}"
+        raise ValueError(msg)
+    return report
+
+
+def compare_reports(
+    stdout: TextIO, baseline: ReportDict, current: ReportDict, threshold: float
+) -> int:
+    """
+    Print comparison of the best times of two reports.
+
+    Returns number of benchmarks slower than the baseline by more than the
+    threshold, or with a different number of results.
+    """
+    previous = {
+        (benchmark["name"], benchmark["scenario"]): benchmark
+        for benchmark in baseline["benchmarks"]
+    }
+    regressions = 0
+    print(
+        f"{'benchmark':32} {'baseline':>11} {'current':>11} {'ratio':>7}",
+        file=stdout,
+    )
+    for benchmark in current["benchmarks"]:
+        name = f"{benchmark['name']} {benchmark['scenario']}"
+        old = previous.get((benchmark["name"], benchmark["scenario"]))
+        if old is None:
+            print(f"{name:32} {'':>11} {benchmark['min'] * 1000:9.1f}ms", file=stdout)
+            continue
+        ratio = benchmark["min"] / old["min"] if old["min"] else 1.0
+        status = ""
+        if old["results"] != benchmark["results"]:
+            status = f"  results {old['results']} -> {benchmark['results']}"
+            regressions += 1
+        elif ratio > 1 + threshold:
+            status = "  slower"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            status = "  faster"
+        print(
+            f"{name:32} {old['min'] * 1000:9.1f}ms {benchmark['min'] * 1000:9.1f}ms "
+            f"{ratio:7.2f}{status}",
+            file=stdout,
+        )
+    return regressions
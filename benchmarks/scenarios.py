@@ -0,0 +1,111 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmark scenarios covering the discovery pipeline."""
+
+from __future__ import annotations
+
+from statistics import median
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple
+
+from translation_finder.api import discover
+from translation_finder.discovery.base import CLASSIFIER
+from translation_finder.finder import Finder, compile_pattern
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from translation_finder.finder import PathListType
+
+    # Prepares a timed run returning number of results
+    Setup = Callable[[Path], Callable[[], int]]
+
+
+class Timing(NamedTuple):
+    """Times of a scenario run on a tree."""
+
+    times: list[float]
+    results: int
+
+    @property
+    def min(self) -> float:
+        """Best time."""
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        """Median time."""
+        return median(self.times)
+
+
+def list_tree(root: Path) -> tuple[PathListType, PathListType]:
+    """Return files and dirs in a tree."""
+    files: PathListType = []
+    dirs: PathListType = []
+    Finder(root, mock=([], [])).list_files(root, files, dirs)
+    return files, dirs
+
+
+def setup_scan(root: Path) -> Callable[[], int]:
+    """Time listing the tree."""
+    finder = Finder(root, mock=([], []))
+
+    def run() -> int:
+        files: PathListType = []
+        finder.list_files(root, files, [])
+        return len(files)
+
+    return run
+
+
+def setup_index(root: Path) -> Callable[[], int]:
+    """Time building the finder index from a listing."""
+    files, dirs = list_tree(root)
+    return lambda: len(Finder(root, mock=(files, dirs)).files)
+
+
+def setup_discovery(root: Path) -> Callable[[], int]:
+    """Time running the backends on an indexed tree."""
+    finder = Finder(root, mock=list_tree(root))
+    return lambda: len(discover(root, finder=finder))
+
+
+def setup_end_to_end(root: Path) -> Callable[[], int]:
+    """Time the whole discovery."""
+    return lambda: len(discover(root))
+
+
+SCENARIOS: dict[str, Setup] = {
+    "scan": setup_scan,
+    "index": setup_index,
+    "discovery": setup_discovery,
+    "end-to-end": setup_end_to_end,
+}
+
+
+def clear_caches() -> None:
+    """Clear caches shared by all finders and discoveries in the process."""
+    CLASSIFIER.cache_clear()
+    compile_pattern.cache_clear()
+    Finder.plan_masks.cache_clear()
+
+
+def run_scenario(name: str, root: Path, repeat: int) -> Timing:
+    """
+    Run a scenario on a tree.
+
+    Every run is prepared separately and process wide caches are cleared
+    before it, so no cache carries over between runs and each run is cold.
+    """
+    times = []
+    results = 0
+    for _i in range(repeat):
+        run = SCENARIOS[name](root)
+        clear_caches()
+        started = perf_counter()
+        results = run()
+        times.append(perf_counter() - started)
+    return Timing(times, results)
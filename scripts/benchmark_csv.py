@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark CSV variant detection on large files.
+
+Run from the repository root as ``PYTHONPATH=. scripts/benchmark_csv.py``.
+"""
+
+from __future__ import annotations
+
+import csv
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+from translation_finder.discovery import files
+from translation_finder.finder import Finder
+
+if TYPE_CHECKING:
+    from typing import TextIO
+
+read_csv_rows = files._read_csv_rows  # ruff:ignore[private-member-access]
+detect_header = files._detect_csv_header_dialect  # ruff:ignore[private-member-access]
+
+ROWS = 10000
+REPEAT = 5
+NUMBER = 20
+
+HEADERS = {
+    "simple": "source,target",
+    "multi": '"context";"source";"target"',
+    "unknown": "key,value",
+}
+
+
+def write_files(root: Path) -> None:
+    """Generate CSV files with 10k rows."""
+    for name, header in HEADERS.items():
+        delimiter = ";" if ";" in header else ","
+        lines = [header]
+        lines.extend(
+            delimiter.join((f"ctx{row % 100}", f"Source {row}", f"Target {row}"))
+            if name == "multi"
+            else f"Source {row}{delimiter}Target {row}"
+            for row in range(ROWS)
+        )
+        (root / f"{name}.csv").write_text("\n".join(lines), encoding="utf-8")
+
+
+def run(finder: Finder, name: str) -> float:
+    """Return best time of reading CSV rows in milliseconds."""
+    path = next(finder.mask_matches(f"{name}.csv"))
+    timer = timeit.Timer(lambda: read_csv_rows(finder, path))
+    return min(timer.repeat(REPEAT, NUMBER)) / NUMBER * 1000
+
+
+def main(stdout: TextIO) -> None:
+    """Compare header fast path with csv.Sniffer."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write_files(root)
+        finder = Finder(root)
+        print(f"{'file':10} {'fast path':>12} {'csv.Sniffer':>12}", file=stdout)
+        for name in HEADERS:
+            fast = run(finder, name)
+            with patch.object(files, "_detect_csv_header_dialect", return_value=None):
+                sniffer = run(finder, name)
+            print(f"{name:10} {fast:10.3f}ms {sniffer:10.3f}ms", file=stdout)
+        sniff_input = (root / "simple.csv").read_text()[
+            : files.CSV_DIALECT_SNIFF_MAX_CHARS
+        ]
+        sniff = timeit.Timer(
+            lambda: csv.Sniffer().sniff(sniff_input, delimiters=files.CSV_DELIMITERS)
+        )
+        header = timeit.Timer(lambda: detect_header(HEADERS["simple"]))
+        header_time = min(header.repeat(REPEAT, 1000)) * 1000
+        sniff_time = min(sniff.repeat(REPEAT, 1000)) * 1000
+        print(
+            f"dialect only: header {header_time:.1f}us, csv.Sniffer {sniff_time:.1f}us",
+            file=stdout,
+        )
+
+
+if __name__ == "__main__":
+    main(sys.stdout)
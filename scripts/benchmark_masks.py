@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark file mask derivation on a synthetic tree with 200 locales.
+
+Run from the repository root as ``PYTHONPATH=. scripts/benchmark_masks.py``.
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from itertools import islice
+from pathlib import PurePath
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+from translation_finder.discovery.base import LANGUAGE_CODES, BaseDiscovery
+from translation_finder.discovery.files import GettextDiscovery
+from translation_finder.finder import Finder
+
+if TYPE_CHECKING:
+    from typing import TextIO
+
+LOCALES = 200
+DOMAINS = 50
+REPEAT = 5
+
+
+def get_finder() -> Finder:
+    """Return finder for 200 locales with 50 domains each."""
+    languages = sorted(code for code in LANGUAGE_CODES if "_" not in code)
+    paths = [
+        f"locale/{language}/LC_MESSAGES/domain{domain}.po"
+        for language in islice(languages, LOCALES)
+        for domain in range(DOMAINS)
+    ]
+    return Finder(
+        PurePath("/"),
+        mock=([(PurePath(path), PurePath(path), path) for path in paths], []),
+    )
+
+
+def run(finder: Finder) -> tuple[float, float, int]:
+    """Return best discover and get_masks times and number of masks."""
+    discovery = GettextDiscovery(finder)
+    masks = len(list(discovery.get_masks()))
+    discover = min(
+        timeit.repeat(lambda: list(discovery.discover()), number=1, repeat=REPEAT)
+    )
+    get_masks = min(
+        timeit.repeat(lambda: list(discovery.get_masks()), number=1, repeat=REPEAT)
+    )
+    return discover * 1000, get_masks * 1000, masks
+
+
+def main(stdout: TextIO) -> None:
+    """Compare shape grouping with per file derivation."""
+    finder = get_finder()
+    print(f"{'mode':10} {'discover':>12} {'get_masks':>12} {'masks':>8}", file=stdout)
+    grouped = run(finder)
+    with patch.object(BaseDiscovery, "get_path_shape", return_value=None):
+        per_file = run(finder)
+    for name, (discover, get_masks, masks) in (
+        ("grouped", grouped),
+        ("per file", per_file),
+    ):
+        print(
+            f"{name:10} {discover:10.1f}ms {get_masks:10.1f}ms {masks:8}", file=stdout
+        )
+
+
+if __name__ == "__main__":
+    main(sys.stdout)
@@ -5,12 +5,32 @@
 """Translation finder, a module to locate translatable files in a filesystem."""
 
 from importlib import import_module
+from typing import TYPE_CHECKING
 
-from .api import discover
+from .api import discover, iter_discover
 from .discovery.result import DiscoveryResult
 from .finder import Finder
 
-__all__ = ("DiscoveryResult", "Finder", "discover")
+__all__ = (
+    "DiscoveryResult",
+    "Finder",
+    "aiter_discover",
+    "discover",
+    "discover_async",
+    "iter_discover",
+)
+
+if TYPE_CHECKING:
+    from .aio import aiter_discover, discover_async
+
+
+def __getattr__(name: str) -> object:
+    """Load the asyncio API on first access, asyncio is slow to import."""
+    if name in {"aiter_discover", "discover_async"}:
+        return getattr(import_module("translation_finder.aio"), name)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
 
 # Make sure all discovery modules are imported
 import_module("translation_finder.discovery.transifex")  # ruff:ignore[non-empty-init-module]
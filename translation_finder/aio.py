@@ -0,0 +1,206 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Asyncio API for translation-finder."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, ParamSpec, TypeVar
+
+from .api import get_backends
+from .cancel import CancellationToken, DiscoveryCancelledError, mark_incomplete
+from .discovery.base import CLASSIFIER, PROBE_LIMIT, ClaimRegistry
+from .finder import Finder
+from .stats import measure_caches
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Callable, Collection
+    from pathlib import PurePath
+
+    from .budget import SniffBudget
+    from .cache import SniffCache, SniffDedup
+    from .discovery.base import BaseDiscovery
+    from .discovery.result import DiscoveryResult, ResultDict
+    from .finder import PathMockType
+    from .stats import DiscoveryStats
+
+# Number of file masks detected at once
+DISCOVER_CONCURRENCY = 8
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+def list_masks(
+    discovery: BaseDiscovery, *, eager: bool, hint: str | None
+) -> list[ResultDict]:
+    """List file masks to detect, keeping the first occurrence of a file mask."""
+    masks: dict[str, ResultDict] = {}
+    for result in discovery.iter_masks(eager=eager, hint=hint):
+        masks.setdefault(result["filemask"], result)
+    return list(masks.values())
+
+
+async def aiter_discover(  # ruff:ignore[too-many-arguments]
+    root: PurePath | str,
+    *,
+    mock: PathMockType | None = None,
+    source_language: str = "en",
+    eager: bool = False,
+    hint: str | None = None,
+    probe_limit: int | None = PROBE_LIMIT,
+    cache: SniffCache | None = None,
+    dedup: SniffDedup | None = None,
+    hint_only: bool = False,
+    formats: Collection[str] | None = None,
+    backends: Collection[str] | None = None,
+    skip_claimed: bool = False,
+    concurrency: int = DISCOVER_CONCURRENCY,
+    ordered: bool = False,
+    cancel: CancellationToken | None = None,
+    budget: SniffBudget | None = None,
+    stats: DiscoveryStats | None = None,
+) -> AsyncGenerator[DiscoveryResult]:
+    """
+    Yield discovery results as their detection completes.
+
+    Files are listed and file masks detected in worker threads, at most
+    concurrency file masks at once. Backends are evaluated in priority order,
+    results of a backend are yielded in order of completion, or in the order
+    of iter_discover when ordered. The iteration stops when cancel is
+    cancelled. Closing or cancelling the iterator cancels the token, so work
+    running in the threads stops at its next cancellation check.
+
+    See discover for description of the other parameters.
+    """
+    if hint_only and not hint:
+        msg = "Hint only discovery requires a hint"
+        raise ValueError(msg)
+    selected = get_backends(formats, backends)
+    if cancel is None:
+        cancel = CancellationToken()
+    scope = Finder.get_mask_scope(hint) if hint_only and hint else None
+    finder = await run_in_thread(
+        cancel, Finder, root, mock, scope=scope, cancel=cancel, stats=stats
+    )
+    claims = ClaimRegistry(skip_claimed=skip_claimed)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    for backend in selected:
+        if cancel.cancelled:
+            cancel.interrupted = True
+            return
+        instance = backend(
+            finder,
+            source_language,
+            probe_limit=probe_limit,
+            cache=cache,
+            dedup=dedup,
+            hint_only=hint_only,
+            claims=claims,
+            cancel=cancel,
+            budget=budget,
+            stats=stats,
+        )
+        if (
+            hint_only
+            and hint
+            and instance.accepts_hints
+            and not instance.matches_hint(hint)
+        ):
+            continue
+        masks = await run_in_thread(
+            cancel, list_masks, instance, eager=eager, hint=hint
+        )
+
+        async def detect(
+            result: ResultDict, instance: BaseDiscovery = instance
+        ) -> list[DiscoveryResult] | None:
+            async with semaphore:
+                return await run_in_thread(cancel, instance.detect, result, eager=eager)
+
+        tasks = [asyncio.ensure_future(detect(result)) for result in masks]
+        try:
+            for completed in tasks if ordered else asyncio.as_completed(tasks):
+                for result in await completed or ():
+                    yield result
+        except DiscoveryCancelledError:
+            return
+        except GeneratorExit:
+            cancel.cancel()
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def run_in_thread(
+    cancel: CancellationToken,
+    func: Callable[P, T],
+    /,
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    """Run function in a worker thread, cancelling the token with the task."""
+    try:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    except asyncio.CancelledError:
+        cancel.cancel()
+        raise
+
+
+async def discover_async(  # ruff:ignore[too-many-arguments]
+    root: PurePath | str,
+    *,
+    mock: PathMockType | None = None,
+    source_language: str = "en",
+    eager: bool = False,
+    hint: str | None = None,
+    probe_limit: int | None = PROBE_LIMIT,
+    cache: SniffCache | None = None,
+    dedup: SniffDedup | None = None,
+    hint_only: bool = False,
+    formats: Collection[str] | None = None,
+    backends: Collection[str] | None = None,
+    skip_claimed: bool = False,
+    concurrency: int = DISCOVER_CONCURRENCY,
+    cancel: CancellationToken | None = None,
+    budget: SniffBudget | None = None,
+    stats: DiscoveryStats | None = None,
+) -> list[DiscoveryResult]:
+    """
+    High level discovery interface for asyncio.
+
+    The blocking work runs in worker threads, see aiter_discover and discover
+    for description of the parameters.
+    """
+    # The caches are counted here, async generators are not reliably finalized
+    with measure_caches(stats, "classifier", CLASSIFIER.cache_info):
+        results = [
+            result
+            async for result in aiter_discover(
+                root,
+                mock=mock,
+                source_language=source_language,
+                eager=eager,
+                hint=hint,
+                probe_limit=probe_limit,
+                cache=cache,
+                dedup=dedup,
+                hint_only=hint_only,
+                formats=formats,
+                backends=backends,
+                skip_claimed=skip_claimed,
+                concurrency=concurrency,
+                ordered=True,
+                cancel=cancel,
+                budget=budget,
+                stats=stats,
+            )
+        ]
+    results.sort()
+    if cancel is not None and cancel.interrupted:
+        mark_incomplete(results)
+    return results
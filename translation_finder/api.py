@@ -6,25 +6,71 @@
 
 from __future__ import annotations
 
+import json
 import sys
 from argparse import ArgumentParser
-from typing import TYPE_CHECKING, TextIO, TypeVar
+from contextlib import suppress
+from itertools import islice
+from operator import attrgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, ParamSpec, TextIO, TypeVar
 
-from translation_finder.discovery.base import BaseDiscovery
+from translation_finder.discovery.base import (
+    CLASSIFIER,
+    PROBE_LIMIT,
+    BaseDiscovery,
+    ClaimRegistry,
+)
 
+from .budget import SniffBudget
+from .cancel import CancellationToken, DiscoveryCancelledError, mark_incomplete
 from .finder import Finder
+from .stats import DiscoveryStats, measure_caches
 
 if TYPE_CHECKING:
+    from argparse import Namespace
+    from collections.abc import (
+        Callable,
+        Collection,
+        Generator,
+        Iterable,
+        Mapping,
+        Sequence,
+    )
     from pathlib import PurePath
 
     from translation_finder.discovery.result import DiscoveryResult
 
+    from .cache import SniffCache, SniffDedup
+    from .client import DiscoveryRequest
     from .finder import PathMockType
+    from .watch import DiscoveryDelta
 
 BACKENDS: list[type[BaseDiscovery]] = []
 
+# Command line options and options they can not be used with
+CLI_CONFLICTS = {
+    "socket": ("cache", "stats", "profile", "trace_slow"),
+    "watch": (
+        "socket",
+        "refresh",
+        "hint_only",
+        "skip_claimed",
+        "limit",
+        "timeout",
+        "max_sniff_bytes",
+        "max_sniff_files",
+        "max_sniff_time",
+        "stats",
+        "profile",
+        "trace_slow",
+    ),
+}
+
 
 DiscoveryT = TypeVar("DiscoveryT", bound=type[BaseDiscovery])
+P = ParamSpec("P")
+T = TypeVar("T")
 
 
 def register_discovery(cls: DiscoveryT) -> DiscoveryT:
@@ -33,13 +79,125 @@ def register_discovery(cls: DiscoveryT) -> DiscoveryT:
     return cls
 
 
-def discover(
+def get_backends(
+    formats: Collection[str] | None = None,
+    backends: Collection[str] | None = None,
+) -> list[type[BaseDiscovery]]:
+    """
+    Return registered discovery classes in priority order.
+
+    The classes can be limited by their base file format or class name.
+    """
+    if backends is not None:
+        unknown = set(backends) - {backend.__name__ for backend in BACKENDS}
+        if unknown:
+            msg = "Unknown discovery backend: {}".format(", ".join(sorted(unknown)))
+            raise ValueError(msg)
+    return sorted(
+        (
+            backend
+            for backend in BACKENDS
+            if (formats is None or backend.file_format in formats)
+            and (backends is None or backend.__name__ in backends)
+        ),
+        key=attrgetter("priority"),
+    )
+
+
+def iter_discover(  # ruff:ignore[too-many-arguments]
+    root: PurePath | str,
+    *,
+    mock: PathMockType | None = None,
+    source_language: str = "en",
+    eager: bool = False,
+    hint: str | None = None,
+    probe_limit: int | None = PROBE_LIMIT,
+    cache: SniffCache | None = None,
+    dedup: SniffDedup | None = None,
+    hint_only: bool = False,
+    formats: Collection[str] | None = None,
+    backends: Collection[str] | None = None,
+    skip_claimed: bool = False,
+    finder: Finder | None = None,
+    reuse: Mapping[str, Mapping[str, Sequence[DiscoveryResult]]] | None = None,
+    cancel: CancellationToken | None = None,
+    budget: SniffBudget | None = None,
+    stats: DiscoveryStats | None = None,
+) -> Generator[DiscoveryResult]:
+    """
+    Yield discovery results as they are found.
+
+    Backends are evaluated in priority order and only when the next result
+    is requested, see discover for description of the parameters.
+
+    Results in reuse, grouped by backend class name and file mask, are yielded
+    instead of detecting them again when the backend finds their file mask.
+
+    The iteration stops when cancel is cancelled.
+
+    Content based format detection of all backends is limited by budget.
+    Timings and counters of discovery phases are collected in stats, together
+    with hits and misses of the language code classifier and finder caches.
+    """
+    if hint_only and not hint:
+        msg = "Hint only discovery requires a hint"
+        raise ValueError(msg)
+    selected = get_backends(formats, backends)
+    if finder is None:
+        scope = Finder.get_mask_scope(hint) if hint_only and hint else None
+        finder = Finder(root, mock=mock, scope=scope, cancel=cancel, stats=stats)
+    claims = ClaimRegistry(skip_claimed=skip_claimed)
+    # Cancellation ends the iteration
+    with (
+        suppress(DiscoveryCancelledError),
+        measure_caches(stats, "classifier", CLASSIFIER.cache_info),
+        measure_caches(stats, "finder", finder.cache_info),
+    ):
+        for backend in selected:
+            if cancel is not None:
+                cancel.check()
+            instance = backend(
+                finder,
+                source_language,
+                probe_limit=probe_limit,
+                cache=cache,
+                dedup=dedup,
+                hint_only=hint_only,
+                claims=claims,
+                reuse=reuse.get(backend.__name__) if reuse else None,
+                cancel=cancel,
+                budget=budget,
+                stats=stats,
+            )
+            if (
+                hint_only
+                and hint
+                and instance.accepts_hints
+                and not instance.matches_hint(hint)
+            ):
+                continue
+            yield from instance.discover(eager=eager, hint=hint)
+
+
+def discover(  # ruff:ignore[too-many-arguments]
     root: PurePath | str,
     *,
     mock: PathMockType | None = None,
     source_language: str = "en",
     eager: bool = False,
     hint: str | None = None,
+    probe_limit: int | None = PROBE_LIMIT,
+    cache: SniffCache | None = None,
+    dedup: SniffDedup | None = None,
+    hint_only: bool = False,
+    formats: Collection[str] | None = None,
+    backends: Collection[str] | None = None,
+    limit: int | None = None,
+    skip_claimed: bool = False,
+    finder: Finder | None = None,
+    cancel: CancellationToken | None = None,
+    budget: SniffBudget | None = None,
+    stats: DiscoveryStats | None = None,
 ) -> list[DiscoveryResult]:
     """
     High level discovery interface.
@@ -50,19 +208,431 @@ def discover(
     The eager mode detects all files in known format regardless their naming.
     Use this in case you want to list all files which can be handled by
     localization tools such as Weblate.
+
+    Formats detected from the file content inspect the template and all
+    language files, pass probe_limit to inspect up to the number of files in
+    total using a deterministic sample. Their outcome
+    can be stored in a SniffCache to speed up repeated discovery, and reused
+    for identical files within the run using SniffDedup.
+
+    The hint_only mode evaluates only the hint, listing only the part of the
+    tree the hint can match. Backends deriving file masks on their own yield
+    only the derived masks equal to the hint.
+
+    Discovery can be limited to backends with given base file formats or
+    class names. With limit, discovery stops after limit results produced
+    by backends in priority order.
+
+    With skip_claimed, file masks already discovered by a backend are skipped
+    by backends evaluated later, avoiding their template and format detection.
+
+    An existing finder for the root can be passed to avoid listing files again.
+
+    Discovery stops when cancel is cancelled or its deadline passes, the
+    results found so far are returned with incomplete set in their metadata.
+
+    Once budget for bytes read, files opened or time spent while detecting
+    formats from the content runs out, formats are detected from file names
+    only and such results have sniffed set to False in their metadata.
+
+    Timings and counters of the scan, index build and backend phases are
+    collected in stats, see DiscoveryStats.
     """
-    finder = Finder(root, mock=mock)
-    results: list[DiscoveryResult] = []
-    for backend in BACKENDS:
-        instance = backend(finder, source_language)
-        results.extend(instance.discover(eager=eager, hint=hint))
+    if limit is not None and limit < 0:
+        msg = "Limit can not be negative"
+        raise ValueError(msg)
+    results = list(
+        islice(
+            iter_discover(
+                root,
+                mock=mock,
+                source_language=source_language,
+                eager=eager,
+                hint=hint,
+                probe_limit=probe_limit,
+                cache=cache,
+                dedup=dedup,
+                hint_only=hint_only,
+                formats=formats,
+                backends=backends,
+                skip_claimed=skip_claimed,
+                finder=finder,
+                cancel=cancel,
+                budget=budget,
+                stats=stats,
+            ),
+            limit,
+        )
+    )
     results.sort()
+    if cancel is not None and cancel.interrupted:
+        mark_incomplete(results)
     return results
 
 
-def cli(stdout: TextIO | None = None, args: list[str] | None = None) -> int:
-    """Command line execution entry point."""
-    stdout = stdout if stdout is not None else sys.stdout
+def discover_changes(  # ruff:ignore[too-many-arguments]
+    root: PurePath | str,
+    previous: Iterable[DiscoveryResult],
+    paths: Collection[str],
+    *,
+    mock: PathMockType | None = None,
+    source_language: str = "en",
+    eager: bool = False,
+    hint: str | None = None,
+    probe_limit: int | None = PROBE_LIMIT,
+    cache: SniffCache | None = None,
+    formats: Collection[str] | None = None,
+    backends: Collection[str] | None = None,
+    skip_claimed: bool = False,
+    finder: Finder | None = None,
+) -> tuple[list[DiscoveryResult], DiscoveryDelta]:
+    """
+    Update results of a previous discovery after paths in the tree changed.
+
+    Only results affected by the changed paths are detected again, the other
+    ones are reused from the previous results. File masks for added files are
+    discovered as well. The parameters have to match the previous discovery,
+    see discover for their description.
+
+    Returns the updated results and their changes.
+    """
+    from .watch import (  # ruff:ignore[import-outside-top-level]
+        DiscoveryDelta,
+        is_result_affected,
+    )
+
+    previous = list(previous)
+    reuse: dict[str, dict[str, list[DiscoveryResult]]] = {}
+    for result in previous:
+        if not is_result_affected(result, paths):
+            reuse.setdefault(result.meta["discovery"], {}).setdefault(
+                result["filemask"], []
+            ).append(result)
+    results = sorted(
+        iter_discover(
+            root,
+            mock=mock,
+            source_language=source_language,
+            eager=eager,
+            hint=hint,
+            probe_limit=probe_limit,
+            cache=cache,
+            formats=formats,
+            backends=backends,
+            skip_claimed=skip_claimed,
+            finder=finder,
+            reuse=reuse,
+        )
+    )
+    delta = DiscoveryDelta(paths)
+    names = {result.meta["discovery"] for result in (*previous, *results)}
+    for name in sorted(names):
+        current = [result for result in results if result.meta["discovery"] == name]
+        delta.compare(
+            [result for result in previous if result.meta["discovery"] == name],
+            current,
+        )
+        if any(result["filemask"] not in reuse.get(name, {}) for result in current):
+            delta.backends.append(name)
+    return results, delta
+
+
+def watch(  # ruff:ignore[too-many-arguments]
+    root: PurePath | str,
+    *,
+    source_language: str = "en",
+    eager: bool = False,
+    hint: str | None = None,
+    probe_limit: int | None = PROBE_LIMIT,
+    cache: SniffCache | None = None,
+    formats: Collection[str] | None = None,
+    backends: Collection[str] | None = None,
+    interval: float | None = None,
+) -> Generator[DiscoveryDelta]:
+    """
+    Watch the tree and yield changes of discovery results.
+
+    The first change contains all results as added, the following ones are
+    yielded whenever changes in the tree change the results. The tree is
+    checked for changes every interval seconds, WATCH_INTERVAL by default, see
+    discover for description of the other parameters.
+    """
+    from .watch import (  # ruff:ignore[import-outside-top-level]
+        WATCH_INTERVAL,
+        DiscoveryWatcher,
+    )
+
+    watcher = DiscoveryWatcher(
+        root,
+        get_backends(formats, backends),
+        source_language=source_language,
+        eager=eager,
+        hint=hint,
+        probe_limit=probe_limit,
+        cache=cache,
+    )
+    yield watcher.update(())
+    yield from watcher.watch(WATCH_INTERVAL if interval is None else interval)
+
+
+def get_budget(
+    max_bytes: int | None, max_files: int | None, max_time: float | None
+) -> SniffBudget | None:
+    """Return sniffing budget with the limits, None when unlimited."""
+    if max_bytes is None and max_files is None and max_time is None:
+        return None
+    return SniffBudget(max_bytes=max_bytes, max_files=max_files, max_time=max_time)
+
+
+def get_daemon_request(params: Namespace) -> DiscoveryRequest:
+    """Return daemon request for the command line parameters."""
+    return {
+        "root": Path(params.directory).resolve().as_posix(),
+        "source_language": params.source_language,
+        "eager": params.eager,
+        "hint": params.hint,
+        "hint_only": params.hint_only,
+        "probe_limit": params.probe_limit,
+        "formats": params.formats,
+        "backends": params.backends,
+        "limit": params.limit,
+        "skip_claimed": params.skip_claimed,
+        "refresh": params.refresh,
+        "timeout": params.timeout,
+        "max_sniff_bytes": params.max_sniff_bytes,
+        "max_sniff_files": params.max_sniff_files,
+        "max_sniff_time": params.max_sniff_time,
+    }
+
+
+def discover_daemon(socket: str, params: Namespace) -> list[DiscoveryResult] | None:
+    """
+    Perform command line discovery using the daemon.
+
+    Returns None if the daemon is not running, is busy or could not access
+    the files.
+    """
+    from .client import (  # ruff:ignore[import-outside-top-level]
+        DaemonBusyError,
+        DaemonFileError,
+        request_discovery,
+    )
+
+    try:
+        return request_discovery(socket, get_daemon_request(params))
+    except (OSError, DaemonBusyError, DaemonFileError):
+        return None
+
+
+def iter_discover_daemon(
+    socket: str,
+    params: Namespace,
+    cancel: CancellationToken | None = None,
+) -> Generator[DiscoveryResult]:
+    """
+    Perform command line discovery using the daemon, yielding results.
+
+    Results are yielded as the daemon sends them. Discovery continues in this
+    process if the daemon is not running, is busy or could not access the
+    files, results already yielded are skipped. Interrupted discovery is
+    reported in cancel.
+    """
+    from .client import (  # ruff:ignore[import-outside-top-level]
+        DaemonBusyError,
+        DaemonFileError,
+        DiscoveryStream,
+    )
+
+    stream = DiscoveryStream(socket, get_daemon_request(params))
+    yielded: list[DiscoveryResult] = []
+    try:
+        for result in stream:
+            yielded.append(result)
+            yield result
+    except (OSError, DaemonBusyError, DaemonFileError):
+        for result in iter_discover_local(params, cancel):
+            if result not in yielded:
+                yield result
+        return
+    if stream.incomplete and cancel is not None:
+        cancel.interrupted = True
+
+
+def iter_discover_local(
+    params: Namespace,
+    cancel: CancellationToken | None = None,
+    stats: DiscoveryStats | None = None,
+) -> Generator[DiscoveryResult]:
+    """Perform command line discovery in this process, yielding results."""
+    from .cache import SniffCache  # ruff:ignore[import-outside-top-level]
+
+    cache = SniffCache(params.cache) if params.cache else None
+    try:
+        yield from islice(
+            iter_discover(
+                params.directory,
+                source_language=params.source_language,
+                eager=params.eager,
+                hint=params.hint,
+                probe_limit=params.probe_limit,
+                cache=cache,
+                hint_only=params.hint_only,
+                formats=params.formats,
+                backends=params.backends,
+                skip_claimed=params.skip_claimed,
+                cancel=cancel,
+                budget=get_budget(
+                    params.max_sniff_bytes,
+                    params.max_sniff_files,
+                    params.max_sniff_time,
+                ),
+                stats=stats,
+            ),
+            params.limit,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def discover_local(
+    params: Namespace, stats: DiscoveryStats | None = None
+) -> list[DiscoveryResult]:
+    """Perform command line discovery in this process."""
+    cancel = None if params.timeout is None else CancellationToken(params.timeout)
+    results = sorted(iter_discover_local(params, cancel, stats))
+    if cancel is not None and cancel.interrupted:
+        mark_incomplete(results)
+    return results
+
+
+def watch_local(params: Namespace, stdout: TextIO) -> None:
+    """Perform command line discovery in watch mode until interrupted."""
+    from .cache import SniffCache  # ruff:ignore[import-outside-top-level]
+
+    cache = SniffCache(params.cache) if params.cache else None
+    try:
+        for delta in watch(
+            params.directory,
+            source_language=params.source_language,
+            eager=params.eager,
+            hint=params.hint,
+            probe_limit=params.probe_limit,
+            cache=cache,
+            formats=params.formats,
+            backends=params.backends,
+            interval=params.watch_interval,
+        ):
+            for title, results in (
+                ("Removed", delta.removed),
+                ("Added", delta.added),
+                ("Changed", delta.changed),
+            ):
+                for match in sorted(results):
+                    print_match(stdout, title, match)
+            stdout.flush()
+    except KeyboardInterrupt:
+        return
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def print_match(stdout: TextIO, title: str, match: DiscoveryResult) -> None:
+    """Print a discovery result."""
+    origin = " ({})".format(match.meta["origin"]) if match.meta["origin"] else ""
+    incomplete = " [incomplete]" if match.meta.get("incomplete") else ""
+    print(f"== {title}{origin}{incomplete} ==", file=stdout)
+    for key, value in sorted(match.items()):
+        print(f"{key:15}: {value}", file=stdout)
+    print(file=stdout)
+
+
+def get_result_message(result: DiscoveryResult) -> dict[str, object]:
+    """Return result as a JSON serializable message."""
+    return {"match": result.match, "meta": result.meta}
+
+
+def write_json(
+    stdout: TextIO, results: list[DiscoveryResult], stats: DiscoveryStats | None
+) -> None:
+    """Write results as a JSON document."""
+    data: dict[str, object] = {
+        "results": [get_result_message(result) for result in results],
+        "count": len(results),
+        "incomplete": any(result.meta.get("incomplete") for result in results),
+    }
+    if stats is not None:
+        data["stats"] = stats.as_dict()
+    json.dump(data, stdout, indent=2)
+    print(file=stdout)
+
+
+def write_ndjson(
+    stdout: TextIO, params: Namespace, stats: DiscoveryStats | None
+) -> None:
+    """
+    Write a JSON line for each result as soon as it is found.
+
+    The last line reports the number of results and whether discovery was
+    interrupted.
+    """
+    cancel = None if params.timeout is None else CancellationToken(params.timeout)
+    if params.socket:
+        results = iter_discover_daemon(params.socket, params, cancel)
+    else:
+        results = iter_discover_local(params, cancel, stats)
+    count = 0
+    incomplete = False
+    for result in results:
+        print(json.dumps(get_result_message(result)), file=stdout, flush=True)
+        count += 1
+        incomplete |= result.meta.get("incomplete", False)
+    done: dict[str, object] = {
+        "done": True,
+        "count": count,
+        "incomplete": incomplete or (cancel is not None and cancel.interrupted),
+    }
+    if stats is not None:
+        done["stats"] = stats.as_dict()
+    print(json.dumps(done), file=stdout, flush=True)
+
+
+def print_stats(stdout: TextIO, stats: DiscoveryStats) -> None:
+    """Print timings and file access of discovery phases."""
+    print("== Statistics ==", file=stdout)
+    print(
+        f"{'Phase':40} {'Calls':>7} {'Time [ms]':>10} {'Files':>7} {'Bytes':>10}",
+        file=stdout,
+    )
+    for phase in stats.get_phases():
+        name = phase.name
+        if "." in name:
+            name = "  " + name.split(".", 1)[1]
+        calls = phase.calls or ""
+        print(
+            f"{name:40} {calls:>7} {phase.time * 1000:>10.2f} "
+            f"{phase.files_opened:>7} {phase.bytes_read:>10}",
+            file=stdout,
+        )
+    print(file=stdout)
+    width = max([15, *map(len, stats.counters)])
+    for name, value in sorted(stats.counters.items()):
+        print(f"{name:{width}}: {value}", file=stdout)
+    print(file=stdout)
+
+
+def print_slow_files(stdout: TextIO, stats: DiscoveryStats) -> None:
+    """Print files which took long to inspect."""
+    print("== Slow files ==", file=stdout)
+    for slow in sorted(stats.slow_files, key=lambda slow: slow.time, reverse=True):
+        print(f"{slow.time * 1000:10.2f} ms: {slow.path} ({slow.phase})", file=stdout)
+    print(file=stdout)
+
+
+def get_parser() -> ArgumentParser:
+    """Return parser of the command line arguments."""
+    from .watch import WATCH_INTERVAL  # ruff:ignore[import-outside-top-level]
 
     parser = ArgumentParser(
         description="Weblate translation discovery utility.",
@@ -78,21 +648,217 @@ def cli(stdout: TextIO | None = None, args: list[str] | None = None) -> int:
         action="store_true",
     )
     parser.add_argument("--hint", help="File mask hint for the discovery", default=None)
+    parser.add_argument(
+        "--hint-only",
+        help="Discover only the hinted file mask",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--probe-limit",
+        help="Maximal number of files inspected per match, all files by default",
+        type=int,
+        default=PROBE_LIMIT,
+    )
+    parser.add_argument(
+        "--cache", help="File where to cache format detection", default=None
+    )
+    parser.add_argument(
+        "--file-format",
+        help="Limit discovery to backends for a file format, can be repeated",
+        action="append",
+        dest="formats",
+        default=None,
+    )
+    parser.add_argument(
+        "--backend",
+        help="Limit discovery to a backend class, can be repeated",
+        action="append",
+        dest="backends",
+        default=None,
+    )
+    parser.add_argument(
+        "--limit",
+        help="Stop discovery after a number of results",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--skip-claimed",
+        help="Skip file masks already discovered by another backend",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--timeout",
+        help="Stop discovery after a number of seconds, printing results found so far",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--max-sniff-bytes",
+        help="Detect formats from file names after reading a number of bytes",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--max-sniff-files",
+        help="Detect formats from file names after opening a number of files",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--max-sniff-time",
+        help="Detect formats from file names after a number of seconds of sniffing",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--format",
+        help="Output format, ndjson writes each result as soon as it is found",
+        choices=("text", "json", "ndjson"),
+        dest="output_format",
+        default="text",
+    )
+    parser.add_argument(
+        "--stats",
+        help="Print timings and file access of discovery phases after the results",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        help="Write cProfile statistics of the discovery to a file",
+        default=None,
+    )
+    parser.add_argument(
+        "--trace-slow",
+        help="Print files inspected for at least a number of milliseconds",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--socket",
+        help="Discovery daemon socket, discovery runs locally if it is not running",
+        default=None,
+    )
+    parser.add_argument(
+        "--refresh",
+        help="List files again instead of reusing the listing kept by the daemon",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--watch",
+        help="Watch the directory and print changes of the results",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        help="Seconds between checking the directory for changes",
+        type=float,
+        default=WATCH_INTERVAL,
+    )
     parser.add_argument("directory", help="Directory where to perform discovery")
+    return parser
 
+
+def check_params(parser: ArgumentParser, params: Namespace) -> None:
+    """Reject conflicting command line arguments."""
+    if params.hint_only and not params.hint:
+        parser.error("--hint-only requires --hint")
+    if params.watch and params.output_format != "text":
+        parser.error("--watch supports only text output")
+    if params.probe_limit is not None and params.probe_limit < 1:
+        parser.error("--probe-limit has to be at least 1")
+    if params.limit is not None and params.limit < 0:
+        parser.error("--limit can not be negative")
+    if params.socket:
+        import socket  # ruff:ignore[import-outside-top-level]
+
+        if not hasattr(socket, "AF_UNIX"):
+            parser.error("--socket is not supported on this platform")
+    # Options are compared to their defaults, so explicit zero values count
+    passed = {
+        name
+        for name, value in vars(params).items()
+        if value != parser.get_default(name)
+    }
+    for option, conflicts in CLI_CONFLICTS.items():
+        if option not in passed:
+            continue
+        for name in conflicts:
+            if name in passed:
+                parser.error(
+                    "--{} can not be used with --{}".format(
+                        name.replace("_", "-"), option
+                    )
+                )
+
+
+def run_profiled(
+    params: Namespace, func: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs
+) -> T:
+    """Run function, profiling it when requested on the command line."""
+    if not params.profile:
+        return func(*args, **kwargs)
+    import cProfile  # ruff:ignore[import-outside-top-level]
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(params.profile)
+
+
+def discover_cli(
+    params: Namespace, stats: DiscoveryStats | None
+) -> list[DiscoveryResult]:
+    """Perform command line discovery using the daemon or in this process."""
+    if params.socket:
+        results = discover_daemon(params.socket, params)
+        if results is not None:
+            return results
+    return run_profiled(params, discover_local, params, stats)
+
+
+def cli(stdout: TextIO | None = None, args: list[str] | None = None) -> int:
+    """Command line execution entry point."""
+    from .client import DaemonError  # ruff:ignore[import-outside-top-level]
+
+    stdout = stdout if stdout is not None else sys.stdout
+    parser = get_parser()
     params = parser.parse_args(args)
+    check_params(parser, params)
+    try:
+        get_backends(params.formats, params.backends)
+    except ValueError as error:
+        parser.error(str(error))
 
-    for pos, match in enumerate(
-        discover(
-            params.directory,
-            source_language=params.source_language,
-            eager=params.eager,
-            hint=params.hint,
-        ),
-    ):
-        origin = " ({})".format(match.meta["origin"]) if match.meta["origin"] else ""
-        print(f"== Match {pos + 1}{origin} ==", file=stdout)
-        for key, value in sorted(match.items()):
-            print(f"{key:15}: {value}", file=stdout)
-        print(file=stdout)
+    if params.watch:
+        watch_local(params, stdout)
+        return 0
+
+    stats = None
+    if params.stats or params.trace_slow is not None:
+        slow_threshold = None if params.trace_slow is None else params.trace_slow / 1000
+        stats = DiscoveryStats(slow_threshold=slow_threshold)
+    try:
+        if params.output_format == "ndjson":
+            run_profiled(params, write_ndjson, stdout, params, stats)
+            return 0
+        results = discover_cli(params, stats)
+    except DaemonError as error:
+        parser.error(str(error))
+
+    if params.output_format == "json":
+        write_json(stdout, results, stats)
+        return 0
+    for pos, match in enumerate(results):
+        print_match(stdout, f"Match {pos + 1}", match)
+    if stats is not None and params.stats:
+        print_stats(stdout, stats)
+    if stats is not None and params.trace_slow is not None:
+        print_slow_files(stdout, stats)
     return 0
@@ -0,0 +1,100 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Limits of file content inspected by a discovery run."""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+# Budget accounting file access of the sniffing in progress and its start
+ACTIVE_BUDGET: ContextVar[tuple[SniffBudget, float] | None] = ContextVar(
+    "active_budget", default=None
+)
+
+
+class BudgetExhaustedError(Exception):
+    """Sniffing budget has been exhausted."""
+
+
+class SniffBudget:
+    """
+    Limits of content based format detection within a discovery run.
+
+    Files opened, bytes read and time spent while detecting format from the
+    content are counted together for all backends. Once any of the limits is
+    reached, formats are detected from the file names only.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int | None = None,
+        max_files: int | None = None,
+        max_time: float | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_time = max_time
+        self.bytes_read = 0
+        self.files_opened = 0
+        self.parse_time = 0.0
+        self.lock = threading.Lock()
+
+    def is_exceeded(self, *, elapsed: float = 0.0, strict: bool = True) -> bool:
+        """
+        Check whether usage is over the limits.
+
+        Elapsed time of the sniffing in progress is added to the parse time.
+        Usage at the limit is accepted unless strict.
+        """
+        usage = (
+            (self.bytes_read, self.max_bytes),
+            (self.files_opened, self.max_files),
+            (self.parse_time + elapsed, self.max_time),
+        )
+        if strict:
+            return any(limit is not None and used > limit for used, limit in usage)
+        return any(limit is not None and used >= limit for used, limit in usage)
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether no budget is left for further sniffing."""
+        return self.is_exceeded(strict=False)
+
+    @contextmanager
+    def spend(self) -> Generator[None]:
+        """
+        Account file access and time of sniffing within the block.
+
+        Raises BudgetExhaustedError when the budget is already exhausted or
+        runs out while reading files.
+        """
+        if self.exhausted:
+            msg = "Sniffing budget is exhausted"
+            raise BudgetExhaustedError(msg)
+        started = monotonic()
+        token = ACTIVE_BUDGET.set((self, started))
+        try:
+            yield
+        finally:
+            ACTIVE_BUDGET.reset(token)
+            with self.lock:
+                self.parse_time += monotonic() - started
+
+    def charge(self, started: float, *, files: int = 0, size: int = 0) -> None:
+        """Account file access, raising BudgetExhaustedError when over limit."""
+        with self.lock:
+            self.files_opened += files
+            self.bytes_read += size
+        if self.is_exceeded(elapsed=monotonic() - started):
+            msg = "Sniffing budget has run out"
+            raise BudgetExhaustedError(msg)
@@ -0,0 +1,255 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Caching of content based format detection."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from copy import deepcopy
+from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING, Self, TypedDict, cast
+
+if TYPE_CHECKING:
+    from os import PathLike
+    from pathlib import PurePath
+    from types import TracebackType
+
+    from .discovery.result import ResultDict
+    from .finder import Finder
+
+# Increase whenever detection rules change in a way that invalidates stored
+# outcomes without a package release.
+SNIFF_RULES_VERSION = 1
+SNIFF_CACHE_MAX_ENTRIES = 10000
+# Matches the amount of data inspected by format detection, so files sharing
+# a fingerprint can not be told apart by it.
+DEDUP_BLOCK_SIZE = 1024 * 1024
+# Result keys referencing paths, these do not affect format detection
+PATH_KEYS = frozenset(("filemask", "template", "new_base", "intermediate"))
+
+FileStat = tuple[str, int, int]
+
+
+class SniffChanges(TypedDict):
+    """Changes made to a result by format detection."""
+
+    updated: dict[str, object]
+    removed: list[str]
+
+
+class SniffOutcome(TypedDict):
+    """Stored format detection outcome."""
+
+    result: ResultDict
+    probed: int
+
+
+def get_cache_version() -> str:
+    """Return version identifying detection rules."""
+    try:
+        package_version = version("translation-finder")
+    except PackageNotFoundError:
+        package_version = "unknown"
+    return f"{package_version}:{SNIFF_RULES_VERSION}"
+
+
+class SniffCache:
+    """
+    SQLite based cache of format detection outcomes.
+
+    Entries are keyed by discovery class, its input, the root directory and
+    the probe limit, and are valid only while size and modification time of
+    the inspected files are unchanged.
+    All entries are dropped when the package or detection rules version
+    changes, least recently used entries are evicted beyond max_entries.
+    The cache can be shared by threads.
+    """
+
+    def __init__(
+        self,
+        path: str | PathLike[str],
+        max_entries: int = SNIFF_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.version = get_cache_version()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS sniff ("
+                "key TEXT PRIMARY KEY, files TEXT, outcome TEXT, used INTEGER"
+                ")"
+            )
+            stored = self.connection.execute(
+                "SELECT value FROM meta WHERE name = 'version'"
+            ).fetchone()
+            if stored is None or stored[0] != self.version:
+                self.connection.execute("DELETE FROM sniff")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                    (self.version,),
+                )
+            self.counter: int = self.connection.execute(
+                "SELECT COALESCE(MAX(used), 0) FROM sniff"
+            ).fetchone()[0]
+
+    def __enter__(self) -> Self:
+        """Context manager entry."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close cache on context manager exit."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return number of cached entries."""
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM sniff").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    @staticmethod
+    def get_key(
+        discovery: str, result: ResultDict, *, root: str, probe_limit: int | None
+    ) -> str:
+        """
+        Return cache key for a detection input.
+
+        The outcome depends on the inspected tree and on the number of files
+        sampled, so both are included.
+        """
+        return json.dumps([discovery, root, probe_limit, result], sort_keys=True)
+
+    def get(self, key: str, files: list[FileStat]) -> SniffOutcome | None:
+        """Return cached outcome if still valid."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT files, outcome FROM sniff WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] != json.dumps(files):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.counter += 1
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE sniff SET used = ? WHERE key = ?", (self.counter, key)
+                )
+        return json.loads(row[1])
+
+    def set(self, key: str, files: list[FileStat], outcome: SniffOutcome) -> None:
+        """Store detection outcome."""
+        with self.lock, self.connection:
+            self.counter += 1
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sniff VALUES (?, ?, ?, ?)",
+                (key, json.dumps(files), json.dumps(outcome), self.counter),
+            )
+            self.connection.execute(
+                "DELETE FROM sniff WHERE used <= ?",
+                (self.counter - self.max_entries,),
+            )
+
+
+class SniffDedup:
+    """
+    Reuse format detection outcome for identical files within a run.
+
+    Files are compared by size first and fingerprinted only when another
+    inspected file has the same size.
+    """
+
+    def __init__(self, block_size: int = DEDUP_BLOCK_SIZE) -> None:
+        self.block_size = block_size
+        self.lookups = 0
+        self.hits = 0
+        self._fingerprints: dict[str, str] = {}
+        self._by_size: dict[tuple[str, int], list[tuple[PurePath, SniffChanges]]] = {}
+
+    def __repr__(self) -> str:
+        """Textual representation with deduplication statistics."""
+        return f"<SniffDedup {self.hits}/{self.lookups} ratio={self.ratio:.2f}>"
+
+    @property
+    def ratio(self) -> float:
+        """Ratio of detections reused from identical files."""
+        if not self.lookups:
+            return 0.0
+        return self.hits / self.lookups
+
+    @staticmethod
+    def get_key(discovery: str, result: ResultDict) -> str:
+        """Return key for a detection input, ignoring paths."""
+        return json.dumps(
+            [
+                discovery,
+                {key: value for key, value in result.items() if key not in PATH_KEYS},
+            ],
+            sort_keys=True,
+        )
+
+    @staticmethod
+    def get_changes(original: ResultDict, result: ResultDict) -> SniffChanges:
+        """Return changes made to the result by format detection."""
+        return {
+            "updated": deepcopy(
+                {
+                    key: value
+                    for key, value in result.items()
+                    if original.get(key) != value
+                }
+            ),
+            "removed": [key for key in original if key not in result],
+        }
+
+    @staticmethod
+    def apply_changes(result: ResultDict, changes: SniffChanges) -> None:
+        """Apply stored changes to a result."""
+        data = cast("dict[str, object]", result)
+        for key in changes["removed"]:
+            data.pop(key, None)
+        data.update(deepcopy(changes["updated"]))
+
+    def get_fingerprint(self, finder: Finder, path: PurePath) -> str:
+        """Return cached file fingerprint."""
+        name = path.as_posix()
+        if name not in self._fingerprints:
+            self._fingerprints[name] = finder.fingerprint(path, self.block_size)
+        return self._fingerprints[name]
+
+    def lookup(self, finder: Finder, key: str, path: PurePath) -> SniffChanges | None:
+        """Return changes made for an identical file."""
+        self.lookups += 1
+        candidates = self._by_size.get((key, finder.stat(path).st_size))
+        if not candidates:
+            return None
+        fingerprint = self.get_fingerprint(finder, path)
+        for candidate, changes in candidates:
+            if self.get_fingerprint(finder, candidate) == fingerprint:
+                self.hits += 1
+                return changes
+        return None
+
+    def record(
+        self, finder: Finder, key: str, path: PurePath, changes: SniffChanges
+    ) -> None:
+        """Record changes made to a result for a file."""
+        self._by_size.setdefault((key, finder.stat(path).st_size), []).append(
+            (path, changes)
+        )
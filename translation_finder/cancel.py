@@ -0,0 +1,58 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Cooperative cancellation of discovery."""
+
+from __future__ import annotations
+
+import threading
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .discovery.result import DiscoveryResult
+
+
+class DiscoveryCancelledError(Exception):
+    """Discovery was cancelled or its deadline has passed."""
+
+
+class CancellationToken:
+    """
+    Cancellation of a discovery run, optionally with a deadline.
+
+    Discovery checks the token between directory reads, between backends and
+    before inspecting file content, so it stops shortly after cancellation.
+    """
+
+    def __init__(self, timeout: float | None = None) -> None:
+        self.deadline = None if timeout is None else monotonic() + timeout
+        self.interrupted = False
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation, it can be called from any thread."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested or the deadline has passed."""
+        return self._event.is_set() or (
+            self.deadline is not None and monotonic() >= self.deadline
+        )
+
+    def check(self) -> None:
+        """Raise DiscoveryCancelledError when cancelled."""
+        if self.cancelled:
+            self.interrupted = True
+            msg = "Discovery was cancelled"
+            raise DiscoveryCancelledError(msg)
+
+
+def mark_incomplete(results: Iterable[DiscoveryResult]) -> None:
+    """Mark results of an interrupted discovery."""
+    for result in results:
+        result.meta["incomplete"] = True
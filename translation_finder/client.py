@@ -0,0 +1,115 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Client for the discovery daemon."""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+from typing import TYPE_CHECKING, Required, TypedDict
+
+from .cancel import mark_incomplete
+from .discovery.result import DiscoveryResult
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from os import PathLike
+
+# Seconds to wait for the daemon to send next message
+DAEMON_TIMEOUT = 300.0
+
+
+class DaemonError(Exception):
+    """Error reported by the discovery daemon."""
+
+
+class DaemonBusyError(DaemonError):
+    """Discovery daemon has no room for the request."""
+
+
+class DaemonFileError(DaemonError):
+    """Discovery daemon failed to access the files."""
+
+
+class DiscoveryRequest(TypedDict, total=False):
+    """Discovery request sent to the daemon."""
+
+    root: Required[str]
+    source_language: str
+    eager: bool
+    hint: str | None
+    hint_only: bool
+    probe_limit: int | None
+    formats: list[str] | None
+    backends: list[str] | None
+    limit: int | None
+    skip_claimed: bool
+    refresh: bool
+    timeout: float | None
+    max_sniff_bytes: int | None
+    max_sniff_files: int | None
+    max_sniff_time: float | None
+
+
+class DiscoveryStream:
+    """
+    Discovery results streamed by the daemon listening on a Unix socket.
+
+    Results are yielded in the order they are found, incomplete is set once
+    the daemon reports discovery was interrupted.
+    """
+
+    def __init__(
+        self,
+        path: str | PathLike[str],
+        request: DiscoveryRequest,
+        timeout: float = DAEMON_TIMEOUT,
+    ) -> None:
+        self.path = path
+        self.request = request
+        self.timeout = timeout
+        self.incomplete = False
+
+    def __iter__(self) -> Generator[DiscoveryResult]:
+        """Perform discovery and yield results as the daemon sends them."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            connection.connect(os.fspath(self.path))
+            connection.sendall(json.dumps(self.request).encode() + b"\n")
+            with connection.makefile("rb") as stream:
+                for line in stream:
+                    message = json.loads(line)
+                    if "error" in message:
+                        if message.get("busy"):
+                            raise DaemonBusyError(message["error"])
+                        if "errno" in message:
+                            raise DaemonFileError(message["error"])
+                        raise DaemonError(message["error"])
+                    if message.get("done"):
+                        self.incomplete = message.get("incomplete", False)
+                        return
+                    result = DiscoveryResult(message["match"])
+                    result.meta = message["meta"]
+                    yield result
+        msg = "Incomplete response from the discovery daemon"
+        raise DaemonError(msg)
+
+
+def request_discovery(
+    path: str | PathLike[str],
+    request: DiscoveryRequest,
+    timeout: float = DAEMON_TIMEOUT,
+) -> list[DiscoveryResult]:
+    """
+    Perform discovery using the daemon listening on a Unix socket.
+
+    Results are sorted the same way discover does.
+    """
+    stream = DiscoveryStream(path, request, timeout)
+    results = sorted(stream)
+    if stream.incomplete:
+        mark_incomplete(results)
+    return results
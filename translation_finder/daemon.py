@@ -0,0 +1,379 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Discovery daemon keeping imports and file listings warm between requests."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import socket
+import stat
+import threading
+from argparse import ArgumentParser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from socketserver import StreamRequestHandler, UnixStreamServer
+from time import monotonic
+from types import NoneType
+from typing import TYPE_CHECKING, NamedTuple, cast
+
+from .api import get_budget, get_result_message, iter_discover
+from .cancel import CancellationToken
+from .discovery.base import PROBE_LIMIT
+from .finder import Finder
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from os import PathLike
+
+    from .client import DiscoveryRequest
+
+DAEMON_WORKERS = 4
+# Number of requests waiting for a worker before new ones are rejected
+DAEMON_QUEUE_SIZE = 64
+# Seconds a file listing is reused for the same root
+SNAPSHOT_TTL = 60.0
+SNAPSHOT_MAX_ENTRIES = 16
+MAX_REQUEST_SIZE = 64 * 1024
+# Permissions of the socket, connecting clients can list and read any
+# directory the daemon can access
+SOCKET_MODE = 0o600
+BUSY_MESSAGE = b'{"error": "Discovery daemon is busy", "busy": true}\n'
+
+REQUEST_TYPES: dict[str, tuple[type, ...]] = {
+    "root": (str,),
+    "source_language": (str,),
+    "eager": (bool,),
+    "hint": (str, NoneType),
+    "hint_only": (bool,),
+    "probe_limit": (int, NoneType),
+    "formats": (list, NoneType),
+    "backends": (list, NoneType),
+    "limit": (int, NoneType),
+    "skip_claimed": (bool,),
+    "refresh": (bool,),
+    "timeout": (int, float, NoneType),
+    "max_sniff_bytes": (int, NoneType),
+    "max_sniff_files": (int, NoneType),
+    "max_sniff_time": (int, float, NoneType),
+}
+
+
+def parse_request(line: bytes) -> DiscoveryRequest:
+    """Parse and validate a discovery request."""
+    try:
+        data = json.loads(line)
+    except ValueError as error:
+        msg = f"Invalid request: {error}"
+        raise ValueError(msg) from error
+    if not isinstance(data, dict) or not isinstance(data.get("root"), str):
+        msg = "Request needs a root directory"
+        raise ValueError(msg)  # ruff:ignore[type-check-without-type-error]
+    if not Path(data["root"]).is_absolute():
+        msg = "Root directory has to be an absolute path"
+        raise ValueError(msg)
+    for key, value in data.items():
+        expected = REQUEST_TYPES.get(key)
+        if expected is None:
+            msg = f"Unknown request parameter: {key}"
+            raise ValueError(msg)
+        if (
+            not isinstance(value, expected)
+            or (isinstance(value, bool) and bool not in expected)
+            or (
+                isinstance(value, list)
+                and not all(isinstance(item, str) for item in value)
+            )
+        ):
+            msg = f"Invalid request parameter: {key}"
+            raise ValueError(msg)
+    if (data.get("limit") or 0) < 0:
+        msg = "Limit can not be negative"
+        raise ValueError(msg)
+    return cast("DiscoveryRequest", data)
+
+
+class Snapshot(NamedTuple):
+    """File listing with modification times of the listed directories."""
+
+    created: float
+    finder: Finder
+    mtimes: dict[str, int]
+
+
+def get_mtimes(root: str, dirnames: Iterable[str]) -> dict[str, int] | None:
+    """Return modification times of the directories, None when one is missing."""
+    path = Path(root)
+    try:
+        return {name: (path / name).stat().st_mtime_ns for name in ("", *dirnames)}
+    except OSError:
+        return None
+
+
+class SnapshotStore:
+    """
+    Recently used file listings keyed by root directory.
+
+    Listings are reused for ttl seconds as long as none of the listed
+    directories has changed, adding or removing a file updates modification
+    time of its directory. Least recently used listings are dropped beyond
+    max_entries.
+    """
+
+    def __init__(
+        self, ttl: float = SNAPSHOT_TTL, max_entries: int = SNAPSHOT_MAX_ENTRIES
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._snapshots: OrderedDict[str, Snapshot] = OrderedDict()
+
+    def is_current(self, root: str, snapshot: Snapshot) -> bool:
+        """Check whether the listing can be reused."""
+        return (
+            monotonic() - snapshot.created < self.ttl
+            and get_mtimes(root, snapshot.finder.dirnames) == snapshot.mtimes
+        )
+
+    def get(self, root: str, *, refresh: bool = False) -> Finder:
+        """Return file listing for a root, listing files when needed."""
+        with self._lock:
+            snapshot = self._snapshots.get(root)
+        if snapshot is not None and not refresh and self.is_current(root, snapshot):
+            with self._lock:
+                if root in self._snapshots:
+                    self._snapshots.move_to_end(root)
+                self.hits += 1
+            return snapshot.finder
+        with self._lock:
+            self.misses += 1
+        created = monotonic()
+        finder = Finder(root)
+        # Changes made while listing are caught by the next check unless the
+        # directory was modified again before the times are read
+        mtimes = get_mtimes(root, finder.dirnames)
+        if mtimes is None:
+            return finder
+        with self._lock:
+            self._snapshots[root] = Snapshot(created, finder, mtimes)
+            self._snapshots.move_to_end(root)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+        return finder
+
+
+class DiscoveryHandler(StreamRequestHandler):
+    """Handle a single discovery request."""
+
+    def send(self, message: dict[str, object]) -> None:
+        """Send a message to the client."""
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+
+    def iter_results(
+        self, request: DiscoveryRequest, cancel: CancellationToken
+    ) -> Iterator[dict[str, object]]:
+        """Perform discovery and yield messages with the results."""
+        root = request["root"]
+        server = cast("DiscoveryServer", self.server)
+        finder = server.snapshots.get(root, refresh=request.get("refresh", False))
+        results = iter_discover(
+            root,
+            finder=finder,
+            source_language=request.get("source_language", "en"),
+            eager=request.get("eager", False),
+            hint=request.get("hint"),
+            hint_only=request.get("hint_only", False),
+            probe_limit=request.get("probe_limit", PROBE_LIMIT),
+            formats=request.get("formats"),
+            backends=request.get("backends"),
+            skip_claimed=request.get("skip_claimed", False),
+            cancel=cancel,
+            budget=get_budget(
+                request.get("max_sniff_bytes"),
+                request.get("max_sniff_files"),
+                request.get("max_sniff_time"),
+            ),
+        )
+        for result in islice(results, request.get("limit")):
+            yield get_result_message(result)
+
+    def handle(self) -> None:
+        """Stream results of the requested discovery."""
+        count = 0
+        cancel = CancellationToken()
+        try:
+            request = parse_request(self.rfile.readline(MAX_REQUEST_SIZE))
+            cancel = CancellationToken(request.get("timeout"))
+            for message in self.iter_results(request, cancel):
+                self.send(message)
+                count += 1
+        except BrokenPipeError:
+            return
+        except OSError as error:
+            # Files might have changed since the listing, the client can
+            # perform discovery itself
+            self.send({"error": str(error), "errno": error.errno})
+            return
+        except ValueError as error:
+            self.send({"error": str(error)})
+            return
+        self.send({"done": True, "count": count, "incomplete": cancel.interrupted})
+
+
+class DiscoveryServer(UnixStreamServer):
+    """
+    Unix socket server performing discovery in a pool of worker threads.
+
+    Requests beyond the pool size wait in a queue, the client is told the
+    daemon is busy when the queue is full.
+
+    Clients can request discovery in any directory readable by the daemon,
+    so the socket is accessible only by its owner unless mode allows more.
+    Permissions are set before listening, so no client can connect earlier.
+    """
+
+    def __init__(
+        self,
+        path: str | PathLike[str],
+        *,
+        workers: int = DAEMON_WORKERS,
+        queue_size: int = DAEMON_QUEUE_SIZE,
+        snapshots: SnapshotStore | None = None,
+        mode: int = SOCKET_MODE,
+    ) -> None:
+        self.path = Path(path)
+        self.mode = mode
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self.snapshots = snapshots if snapshots is not None else SnapshotStore()
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        remove_stale_socket(self.path)
+        super().__init__(os.fspath(self.path), DiscoveryHandler)
+
+    def server_bind(self) -> None:
+        """Bind the socket and restrict its permissions."""
+        super().server_bind()
+        self.path.chmod(self.mode)
+
+    def process_request(
+        self,
+        request: socket.socket | tuple[bytes, socket.socket],
+        client_address: str,
+    ) -> None:
+        """Queue the request for a worker thread."""
+        with self._pending_lock:
+            busy = self.pending >= self.capacity
+            if not busy:
+                self.pending += 1
+        if busy:
+            if isinstance(request, socket.socket):
+                with contextlib.suppress(OSError):
+                    request.sendall(BUSY_MESSAGE)
+            self.shutdown_request(request)
+            return
+        self._executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(
+        self,
+        request: socket.socket | tuple[bytes, socket.socket],
+        client_address: str,
+    ) -> None:
+        """Handle the request in a worker thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # ruff:ignore[blind-except]
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._pending_lock:
+                self.pending -= 1
+
+    def server_close(self) -> None:
+        """Stop workers and remove the socket."""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+        self.path.unlink(missing_ok=True)
+
+
+def remove_stale_socket(path: Path) -> None:
+    """Remove socket left behind by a daemon which is no longer running."""
+    try:
+        mode = path.lstat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        msg = f"Not a socket: {path}"
+        raise FileExistsError(msg)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(os.fspath(path))
+        except OSError:
+            path.unlink()
+            return
+    msg = f"Discovery daemon is already running: {path}"
+    raise FileExistsError(msg)
+
+
+def main(args: list[str] | None = None) -> int:
+    """Daemon entry point."""
+    parser = ArgumentParser(
+        description="Weblate translation discovery daemon.",
+        epilog="This utility is developed at <{}>.".format(
+            "https://github.com/WeblateOrg/translation-finder",
+        ),
+    )
+    parser.add_argument("--socket", help="Unix socket to listen on", required=True)
+    parser.add_argument(
+        "--workers",
+        help="Number of concurrently processed requests",
+        type=int,
+        default=DAEMON_WORKERS,
+    )
+    parser.add_argument(
+        "--queue-size",
+        help="Number of requests waiting for a worker",
+        type=int,
+        default=DAEMON_QUEUE_SIZE,
+    )
+    parser.add_argument(
+        "--snapshot-ttl",
+        help="Seconds a file listing is reused for the same directory",
+        type=float,
+        default=SNAPSHOT_TTL,
+    )
+    parser.add_argument(
+        "--max-snapshots",
+        help="Number of directories with kept file listing",
+        type=int,
+        default=SNAPSHOT_MAX_ENTRIES,
+    )
+    parser.add_argument(
+        "--socket-mode",
+        help="Octal permissions of the socket, only the owner can connect by default",
+        type=partial(int, base=8),
+        default=SOCKET_MODE,
+    )
+    params = parser.parse_args(args)
+
+    try:
+        server = DiscoveryServer(
+            params.socket,
+            workers=params.workers,
+            queue_size=params.queue_size,
+            snapshots=SnapshotStore(params.snapshot_ttl, params.max_snapshots),
+            mode=params.socket_mode,
+        )
+    except OSError as error:
+        parser.error(str(error))
+    with server, contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
+    return 0
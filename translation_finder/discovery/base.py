@@ -8,30 +8,56 @@ from __future__ import annotations
 
 import fnmatch
 import re
+from contextlib import nullcontext
+from copy import deepcopy
+from functools import lru_cache
 from itertools import chain
 from pathlib import Path
-from typing import TYPE_CHECKING, ClassVar
+from typing import TYPE_CHECKING, ClassVar, cast
 
 from charset_normalizer import from_fp
 from weblate_language_data.country_codes import COUNTRIES
 from weblate_language_data.language_codes import LANGUAGES
 
+from translation_finder.budget import BudgetExhaustedError
 from translation_finder.data import LANGUAGES_BLACKLIST
 
 from .result import DiscoveryResult
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Generator, Iterable, Mapping, Sequence
+    from contextlib import AbstractContextManager
+    from functools import _CacheInfo
     from pathlib import PurePath
 
+    from translation_finder.budget import SniffBudget
+    from translation_finder.cache import FileStat, SniffCache, SniffDedup
+    from translation_finder.cancel import CancellationToken
     from translation_finder.finder import Finder
+    from translation_finder.stats import DiscoveryStats
 
     from .result import FileFormatParams, ResultDict
 
+    # New base candidates by directory and by directory and file name
+    NewBaseIndex = tuple[
+        dict[str, tuple[int, PurePath]],
+        dict[tuple[str, str], tuple[int, PurePath]],
+    ]
+
 TOKEN_SPLIT = re.compile(r"([_.-])")
 
+# Default number of files inspected when detecting format from content, None
+# inspects all of them
+PROBE_LIMIT: int | None = None
+# Number of path components and tokens kept by the classifier
+CLASSIFIER_CACHE_SIZE = 65536
+
 LOCALES = {"latn", "cyrl", "hant", "hans"}
 
+# Merged lookup tables, each classification needs a single lookup
+LANGUAGE_CODES = frozenset(LANGUAGES - LANGUAGES_BLACKLIST)
+COUNTRY_CODES = frozenset(COUNTRIES | LOCALES)
+
 EXTENSION_MAP = (
     (".po", "po"),
     ("strings.xml", "aresource"),
@@ -90,65 +116,37 @@ TEMPLATE_REPLACEMENTS = (
 )
 
 
-class BaseDiscovery:
-    """Abstract base class for discovery."""
+class TokenClassifier:
+    """
+    Classifier of path components shared by all discoveries.
 
-    file_format: ClassVar[str] = ""
-    file_format_params: ClassVar[FileFormatParams | None] = None
-    mask: ClassVar[str | tuple[str, ...]] = "*.*"
-    new_base_mask: ClassVar[str | None] = None
-    origin: ClassVar[str | None] = None
-    priority: ClassVar[int] = 1000
-    requires_template: ClassVar[bool] = False
-    uses_template: ClassVar[bool] = False
+    The same directory and file names are classified for every file below
+    them and by every backend, so the results are kept in bounded caches.
+    """
 
-    def __init__(self, finder: Finder, source_language: str = "en") -> None:
-        self.finder: Finder = finder
-        self.source_language: str = source_language
-        self._new_base_by_directory: dict[str, tuple[int, PurePath]] | None = None
-        self._new_base_by_name: dict[tuple[str, str], tuple[int, PurePath]] | None = (
-            None
-        )
+    def __init__(self, maxsize: int = CLASSIFIER_CACHE_SIZE) -> None:
+        self.is_language_code = lru_cache(maxsize=maxsize)(self._is_language_code)
+        self.get_wildcard = lru_cache(maxsize=maxsize)(self._get_wildcard)
 
     @staticmethod
     def is_country_code(code: str) -> bool:
         """Check whether string looks like a country code."""
-        code = code.lower()
-        return code in COUNTRIES or code in LOCALES
+        return code.lower() in COUNTRY_CODES
 
-    @classmethod
-    def is_language_code(cls, code: str) -> bool:
+    @staticmethod
+    def _is_language_code(code: str) -> bool:
         """Analysis whether passed parameter looks like language code."""
         code = code.lower().replace("-", "_")
-        if code in LANGUAGES and code not in LANGUAGES_BLACKLIST:
+        if code in LANGUAGE_CODES:
             return True
 
-        if "_" in code:
-            lang, country = code.split("_", 1)
-            if (
-                lang in LANGUAGES
-                and lang not in LANGUAGES_BLACKLIST
-                and cls.is_country_code(country)
-            ):
-                return True
-
-        return False
-
-    @staticmethod
-    def detect_format(filemask: str) -> str:
-        """Detect format based on the file mask."""
-        filemask = filemask.lower()
-        for end, result in EXTENSION_MAP:
-            if filemask.endswith(end):
-                return result
-        return ""
+        if "_" not in code:
+            return False
+        lang, country = code.split("_", 1)
+        return lang in LANGUAGE_CODES and country in COUNTRY_CODES
 
-    def get_wildcard(self, part: str) -> str | None:
-        """
-        Generate language wilcard for a path part.
-
-        Retruns None if not possible.
-        """
+    def _get_wildcard(self, part: str) -> str | None:
+        """Generate language wilcard for a path part."""
         if self.is_language_code(part):
             return "*"
         if "." in part:
@@ -182,6 +180,168 @@ class BaseDiscovery:
                     )
         return None
 
+    def cache_info(self) -> dict[str, _CacheInfo]:
+        """Return cache statistics."""
+        return {
+            "is_language_code": self.is_language_code.cache_info(),
+            "get_wildcard": self.get_wildcard.cache_info(),
+        }
+
+    @property
+    def hit_rate(self) -> float:
+        """Ratio of classifications answered from the cache."""
+        hits = lookups = 0
+        for info in self.cache_info().values():
+            hits += info.hits
+            lookups += info.hits + info.misses
+        if not lookups:
+            return 0.0
+        return hits / lookups
+
+    def cache_clear(self) -> None:
+        """Clear caches and statistics."""
+        self.is_language_code.cache_clear()
+        self.get_wildcard.cache_clear()
+
+
+CLASSIFIER = TokenClassifier()
+
+
+def substitute_tokens(
+    tokens: list[str], needle: list[str], replacement: str
+) -> str | None:
+    """
+    Replace token sequence delimited by separators or string boundaries.
+
+    Both token lists are produced by TOKEN_SPLIT, so words are at even
+    positions. Separators around a match are consumed, so matches can not
+    share them. None is returned when there is no match.
+    """
+    size = len(needle)
+    result: list[str] = []
+    copied = start = 0
+    while start + size <= len(tokens):
+        if tokens[start : start + size] == needle:
+            result.extend(tokens[copied:start])
+            result.append(replacement)
+            copied = start + size
+            # Skip the word following the consumed separator
+            start = copied + 3
+        else:
+            start += 2
+    if not result:
+        return None
+    result.extend(tokens[copied:])
+    return "".join(result)
+
+
+class ClaimRegistry:
+    """
+    Registry of file masks claimed by discovery backends within a run.
+
+    With skip_claimed, backends skip masks already claimed by another backend
+    before any template, format or parameter detection is done.
+    """
+
+    def __init__(self, *, skip_claimed: bool = False) -> None:
+        self.skip_claimed = skip_claimed
+        self.claims: dict[str, str] = {}
+        self.skipped = 0
+
+    def claim(self, filemask: str, owner: str) -> None:
+        """Claim file mask for a backend unless already claimed."""
+        self.claims.setdefault(filemask, owner)
+
+    def should_skip(self, filemask: str, owner: str) -> bool:
+        """Check whether backend should skip a file mask."""
+        if not self.skip_claimed:
+            return False
+        claimed = self.claims.get(filemask)
+        if claimed is None or claimed == owner:
+            return False
+        self.skipped += 1
+        return True
+
+
+class BaseDiscovery:  # ruff:ignore[too-many-public-methods]
+    """Abstract base class for discovery."""
+
+    file_format: ClassVar[str] = ""
+    file_format_params: ClassVar[FileFormatParams | None] = None
+    mask: ClassVar[str | tuple[str, ...]] = "*.*"
+    new_base_mask: ClassVar[str | None] = None
+    origin: ClassVar[str | None] = None
+    priority: ClassVar[int] = 1000
+    requires_template: ClassVar[bool] = False
+    sniffs_template: ClassVar[bool] = False
+    uses_template: ClassVar[bool] = False
+    # Whether get_masks yields a hint matching the mask, other discoveries
+    # check the hint against masks derived on their own
+    accepts_hints: ClassVar[bool] = True
+
+    def __init__(  # ruff:ignore[too-many-arguments]
+        self,
+        finder: Finder,
+        source_language: str = "en",
+        *,
+        probe_limit: int | None = PROBE_LIMIT,
+        cache: SniffCache | None = None,
+        dedup: SniffDedup | None = None,
+        hint_only: bool = False,
+        claims: ClaimRegistry | None = None,
+        reuse: Mapping[str, Sequence[DiscoveryResult]] | None = None,
+        cancel: CancellationToken | None = None,
+        budget: SniffBudget | None = None,
+        stats: DiscoveryStats | None = None,
+    ) -> None:
+        if probe_limit is not None and probe_limit < 1:
+            msg = "Probe limit has to be at least 1"
+            raise ValueError(msg)
+        self.finder: Finder = finder
+        self.source_language: str = source_language
+        self.probe_limit: int | None = probe_limit
+        self.cache: SniffCache | None = cache
+        self.dedup: SniffDedup | None = dedup
+        self.hint_only: bool = hint_only
+        self.claims: ClaimRegistry | None = claims
+        # Previous results by file mask, these are yielded without detection
+        self.reuse: Mapping[str, Sequence[DiscoveryResult]] = reuse or {}
+        self.cancel: CancellationToken | None = cancel
+        self.budget: SniffBudget | None = budget
+        self.stats: DiscoveryStats | None = stats
+        self._probed: dict[str, int] = {}
+        # File masks detected without sniffing due to exhausted budget
+        self._unsniffed: set[str] = set()
+        # Built lazily, possibly by several threads running detect
+        self._new_base_index: NewBaseIndex | None = None
+
+    @staticmethod
+    def is_country_code(code: str) -> bool:
+        """Check whether string looks like a country code."""
+        return CLASSIFIER.is_country_code(code)
+
+    @classmethod
+    def is_language_code(cls, code: str) -> bool:
+        """Analysis whether passed parameter looks like language code."""
+        return CLASSIFIER.is_language_code(code)
+
+    @staticmethod
+    def detect_format(filemask: str) -> str:
+        """Detect format based on the file mask."""
+        filemask = filemask.lower()
+        for end, result in EXTENSION_MAP:
+            if filemask.endswith(end):
+                return result
+        return ""
+
+    def get_wildcard(self, part: str) -> str | None:  # ruff:ignore[no-self-use]
+        """
+        Generate language wilcard for a path part.
+
+        Retruns None if not possible.
+        """
+        return CLASSIFIER.get_wildcard(part)
+
     def fill_in_new_base(self, result: ResultDict) -> None:
         """Extend the result for new_base and intermediate parameters."""
         if self.new_base_mask is None:
@@ -223,29 +383,97 @@ class BaseDiscovery:
         if best_result is not None:
             result["new_base"] = best_result
 
-    def _index_new_bases(
-        self,
-    ) -> tuple[
-        dict[str, tuple[int, PurePath]],
-        dict[tuple[str, str], tuple[int, PurePath]],
-    ]:
-        """Index possible new-base files for repeated constant-time lookups."""
-        if self._new_base_by_directory is None or self._new_base_by_name is None:
-            self._new_base_by_directory = {}
-            self._new_base_by_name = {}
-            if self.new_base_mask is not None:
-                for position, match in enumerate(
-                    self.finder.filter_masks(self.new_base_mask)
-                ):
-                    directory = "/".join(match.parts[:-1]).lower()
-                    candidate = (position, match)
-                    self._new_base_by_directory.setdefault(directory, candidate)
-                    self._new_base_by_name.setdefault(
-                        (directory, match.parts[-1].lower()),
-                        candidate,
-                    )
+    def _index_new_bases(self) -> NewBaseIndex:
+        """
+        Index possible new-base files for repeated constant-time lookups.
+
+        The index is published in a single assignment once complete, so
+        threads sharing the discovery never see it partially built.
+        """
+        if self._new_base_index is not None:
+            return self._new_base_index
+        by_directory: dict[str, tuple[int, PurePath]] = {}
+        by_name: dict[tuple[str, str], tuple[int, PurePath]] = {}
+        if self.new_base_mask is not None:
+            for position, match in enumerate(
+                self.finder.filter_masks(self.new_base_mask)
+            ):
+                directory = "/".join(match.parts[:-1]).lower()
+                candidate = (position, match)
+                by_directory.setdefault(directory, candidate)
+                by_name.setdefault((directory, match.parts[-1].lower()), candidate)
+        self._new_base_index = (by_directory, by_name)
+        return self._new_base_index
+
+    def iter_probe_paths(self, result: ResultDict) -> Generator[PurePath]:
+        """
+        Yield paths to inspect when detecting format from content.
+
+        The template comes first, followed by language files. When probe_limit
+        is set, only evenly spaced language files are included, so the sample
+        is deterministic and covers the whole mask.
+        """
+        filemask = result["filemask"]
+        paths: list[PurePath] = []
+        if "template" in result:
+            paths.extend(self.finder.mask_matches(result["template"]))
+        seen = {path.as_posix() for path in paths}
+        language_paths = [
+            path
+            for path in self.finder.mask_matches(filemask)
+            if path.as_posix() not in seen
+        ]
+        if self.probe_limit is not None:
+            remaining = max(self.probe_limit - len(paths), 0)
+            if len(language_paths) > remaining:
+                language_paths = [
+                    language_paths[pos * len(language_paths) // remaining]
+                    for pos in range(remaining)
+                ]
+        paths.extend(language_paths)
+        for path in paths:
+            self._probed[filemask] = self._probed.get(filemask, 0) + 1
+            yield path
+
+    def fill_in_probed(self, result: DiscoveryResult) -> None:
+        """Record number of files inspected for the result."""
+        if probed := self._probed.get(result["filemask"]):
+            result.meta["probed"] = probed
+        if result["filemask"] in self._unsniffed:
+            result.meta["sniffed"] = False
+
+    def measure(self, phase: str) -> AbstractContextManager[None]:
+        """Measure a phase of this discovery when statistics are collected."""
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.measure(f"{self.__class__.__name__}.{phase}")
+
+    def spend_budget(self) -> AbstractContextManager[None]:
+        """Account sniffing within the block to the budget."""
+        if self.budget is None:
+            return nullcontext()
+        return self.budget.spend()
+
+    def sniff_format_within_budget(self, result: ResultDict) -> None:
+        """
+        Adjust format unless the budget runs out.
 
-        return self._new_base_by_directory, self._new_base_by_name
+        When it runs out, the result keeps formats based on the file names.
+        """
+        if type(self).adjust_format is BaseDiscovery.adjust_format:
+            self.sniff_format(result)
+            return
+        # Nested values can be adjusted in place before the budget runs out
+        original = deepcopy(result)
+        try:
+            with self.spend_budget():
+                self.sniff_format(result)
+        except BudgetExhaustedError:
+            data = cast("dict[str, object]", result)
+            data.clear()
+            data.update(original)
+            self._probed.pop(result["filemask"], None)
+            self._unsniffed.add(result["filemask"])
 
     def has_storage(self, name: str) -> bool:
         """Check whether finder has a storage."""
@@ -294,27 +522,188 @@ class BaseDiscovery:
         """Override detected format, based on the file content."""
         return
 
+    def _get_cache_files(self, result: ResultDict) -> list[FileStat] | None:
+        """
+        Return status of files which might be inspected by adjust_format.
+
+        Returns None if the files can not be checked for changes.
+        """
+        paths: dict[str, PurePath] = {}
+        for mask in (result.get("template"), result["filemask"]):
+            if mask is not None:
+                paths.update(
+                    (path.as_posix(), path) for path in self.finder.mask_matches(mask)
+                )
+        files: list[FileStat] = []
+        for name, path in sorted(paths.items()):
+            try:
+                stat = self.finder.stat(path)
+            except (OSError, TypeError):
+                return None
+            files.append((name, stat.st_size, stat.st_mtime_ns))
+        return files
+
+    def content_sniff_path(self, result: ResultDict) -> PurePath | None:
+        """
+        Return the file inspected by adjust_format.
+
+        Returns None when the detection might inspect several files, in which
+        case the outcome can not be reused for identical files.
+        """
+        if not self.sniffs_template or "template" not in result:
+            return None
+        return next(iter(self.finder.mask_matches(result["template"])), None)
+
+    def sniff_format(self, result: ResultDict) -> None:
+        """Adjust format, reusing outcome for identical or unchanged files."""
+        self._probed.pop(result["filemask"], None)
+        if self.dedup is None or (path := self.content_sniff_path(result)) is None:
+            self._sniff_format(result)
+            return
+
+        key = self.dedup.get_key(self.__class__.__name__, result)
+        try:
+            changes = self.dedup.lookup(self.finder, key, path)
+        except (OSError, TypeError):
+            self._sniff_format(result)
+            return
+        if changes is not None:
+            self.dedup.apply_changes(result, changes)
+            return
+
+        # Nested values such as file_format_params are adjusted in place
+        original = deepcopy(result)
+        self._sniff_format(result)
+        self.dedup.record(
+            self.finder, key, path, self.dedup.get_changes(original, result)
+        )
+
+    def _sniff_format(self, result: ResultDict) -> None:
+        """Adjust format, reusing cached outcome when available."""
+        filemask = result["filemask"]
+        if (
+            self.cache is None
+            or type(self).adjust_format is BaseDiscovery.adjust_format
+            or (files := self._get_cache_files(result)) is None
+        ):
+            self.adjust_format(result)
+            return
+
+        key = self.cache.get_key(
+            self.__class__.__name__,
+            result,
+            root=self.finder.root.as_posix(),
+            probe_limit=self.probe_limit,
+        )
+        outcome = self.cache.get(key, files)
+        if outcome is not None:
+            data = cast("dict[str, object]", result)
+            data.clear()
+            data.update(outcome["result"])
+            if outcome["probed"]:
+                self._probed[filemask] = outcome["probed"]
+            return
+
+        self.adjust_format(result)
+        self.cache.set(
+            key,
+            files,
+            {"result": result.copy(), "probed": self._probed.get(filemask, 0)},
+        )
+
     def discover(
         self, *, eager: bool = False, hint: str | None = None
     ) -> Generator[DiscoveryResult]:
         """Yield translation configurations matching this discovery."""
         discovered = set()
-        for result in self.get_masks(eager=eager, hint=hint):
+        for result in self.iter_masks(eager=eager, hint=hint):
             if result["filemask"] in discovered:
                 continue
-            self.fill_in_template(result)
-            if self.requires_template and "template" not in result:
+            detected = self.detect(result, eager=eager)
+            if detected is None:
                 continue
-            self.adjust_format(result)
-            self.fill_in_new_base(result)
-            self.fill_in_file_format(result)
-            self.fill_in_file_format_params(result)
             discovered.add(result["filemask"])
-            discovery_result = DiscoveryResult(result)
-            discovery_result.meta["discovery"] = self.__class__.__name__
-            discovery_result.meta["origin"] = self.origin
-            discovery_result.meta["priority"] = self.priority
-            yield discovery_result
+            yield from detected
+
+    def iter_masks(
+        self, *, eager: bool = False, hint: str | None = None
+    ) -> Generator[ResultDict]:
+        """Yield file masks to detect, skipping ones claimed by other discovery."""
+        if self.hint_only and self.accepts_hints:
+            masks = self.get_hint_masks(hint)
+        elif self.hint_only:
+            masks = self.get_derived_hint_masks(hint, eager=eager)
+        else:
+            masks = self.get_masks(eager=eager, hint=hint)
+        owner = self.__class__.__name__
+        if self.stats is not None:
+            masks = self.stats.measure_iter(f"{owner}.get_masks", masks)
+        for result in masks:
+            if self.claims is not None and self.claims.should_skip(
+                result["filemask"], owner
+            ):
+                continue
+            yield result
+
+    def detect(
+        self, result: ResultDict, *, eager: bool = False
+    ) -> list[DiscoveryResult] | None:
+        """
+        Complete the file mask into translation configurations.
+
+        Returns None when the file mask is not usable by this discovery, raises
+        DiscoveryCancelledError when cancelled before inspecting file content.
+        """
+        owner = self.__class__.__name__
+        if (reused := self.reuse.get(result["filemask"])) is not None:
+            if self.claims is not None:
+                self.claims.claim(result["filemask"], owner)
+            return [item.copy() for item in reused]
+        # The index is shared by all results, it is looked up only in parent
+        # directories of the file mask, which is_result_affected checks
+        self._index_new_bases()
+        with self.finder.track() as access:
+            results = self._detect(result, eager=eager)
+        if results is not None:
+            for item in results:
+                item.access = access
+        return results
+
+    def _detect(
+        self, result: ResultDict, *, eager: bool = False
+    ) -> list[DiscoveryResult] | None:
+        """Complete the file mask, see detect."""
+        owner = self.__class__.__name__
+        with self.measure("fill_in_template"):
+            self.fill_in_template(result)
+        if self.requires_template and "template" not in result:
+            return None
+        if self.cancel is not None:
+            self.cancel.check()
+        with self.measure("adjust_format"):
+            self.sniff_format_within_budget(result)
+        with self.measure("fill_in_new_base"):
+            self.fill_in_new_base(result)
+        self.fill_in_file_format(result)
+        self.fill_in_file_format_params(result)
+        if self.claims is not None:
+            self.claims.claim(result["filemask"], owner)
+        discovery_result = DiscoveryResult(result)
+        discovery_result.meta["discovery"] = owner
+        discovery_result.meta["origin"] = self.origin
+        discovery_result.meta["priority"] = self.priority
+        self.fill_in_probed(discovery_result)
+        with self.measure("expand"):
+            return list(self.expand(discovery_result, eager=eager))
+
+    def expand(  # ruff:ignore[no-self-use]
+        self,
+        result: DiscoveryResult,
+        *,
+        eager: bool = False,
+    ) -> Generator[DiscoveryResult]:
+        """Yield translation configurations for a detected result."""
+        yield result
 
     @property
     def masks_list(self) -> tuple[str, ...]:
@@ -325,7 +714,7 @@ class BaseDiscovery:
             return (self.mask,)
         return self.mask
 
-    def filter_files(self) -> Generator[PurePath]:
+    def filter_files(self) -> Iterable[PurePath]:
         """Filter possible file matches."""
         return self.finder.filter_masks(self.masks_list)
 
@@ -337,10 +726,8 @@ class BaseDiscovery:
 
         It is expected to contain duplicates.
         """
-        if hint:
-            for mask in self.masks_list:
-                if fnmatch.fnmatch(hint, mask):
-                    yield {"filemask": hint}
+        yield from self.get_hint_masks(hint)
+        shapes: set[str] = set()
         for path in self.filter_files():
             parts = list(path.parts)
             if eager:
@@ -353,22 +740,70 @@ class BaseDiscovery:
                     result["new_base"] = result["template"] = "/".join(path.parts)
                 yield result
                 continue
-            skip = set()
-            for pos, part in enumerate(parts):
-                if pos in skip:
-                    continue
-                wildcard = self.get_wildcard(part)
-                if wildcard:
-                    mask_parts = parts.copy()
-                    match = re.compile(f"(^|[._-]){re.escape(part)}($|[._-])")
-                    for i, current in enumerate(mask_parts):
-                        if match.findall(current):
-                            skip.add(i)
-                            mask_parts[i] = match.sub(
-                                f"\\g<1>{wildcard}\\g<2>", current
-                            )
-                    mask_parts[pos] = wildcard
-                    yield {"filemask": "/".join(mask_parts)}
+            wildcards = [self.get_wildcard(part) for part in parts]
+            shape = self.get_path_shape(parts, wildcards)
+            if shape is not None:
+                # Paths of the same shape differ only in the language code
+                if shape not in shapes:
+                    shapes.add(shape)
+                    yield {"filemask": shape}
+                continue
+            yield from self.get_path_masks(parts, wildcards)
+
+    def matches_hint(self, hint: str) -> bool:
+        """Check whether hint is accepted by this discovery."""
+        return self.accepts_hints and any(
+            fnmatch.fnmatch(hint, mask) for mask in self.masks_list
+        )
+
+    def get_hint_masks(self, hint: str | None) -> Generator[ResultDict]:
+        """Return hint if it matches masks of this discovery."""
+        if hint and self.matches_hint(hint):
+            yield {"filemask": hint}
+
+    def get_derived_hint_masks(
+        self, hint: str | None, *, eager: bool = False
+    ) -> Generator[ResultDict]:
+        """Return masks derived by this discovery which are equal to the hint."""
+        for result in self.get_masks(eager=eager, hint=hint):
+            if result["filemask"] == hint:
+                yield result
+
+    @staticmethod
+    def get_path_masks(
+        parts: list[str], wildcards: list[str | None]
+    ) -> Generator[ResultDict]:
+        """Return masks for every language dependent part of a path."""
+        tokens = [TOKEN_SPLIT.split(part) for part in parts]
+        skip = set()
+        for pos, wildcard in enumerate(wildcards):
+            if pos in skip or not wildcard:
+                continue
+            mask_parts = parts.copy()
+            for i, current in enumerate(tokens):
+                replaced = substitute_tokens(current, tokens[pos], wildcard)
+                if replaced is not None:
+                    skip.add(i)
+                    mask_parts[i] = replaced
+            mask_parts[pos] = wildcard
+            yield {"filemask": "/".join(mask_parts)}
+
+    @staticmethod
+    def get_path_shape(parts: list[str], wildcards: list[str | None]) -> str | None:
+        """
+        Return mask for paths with a single language dependent part.
+
+        This is the mask generic derivation would produce, provided the language
+        code does not appear in other parts. None is returned otherwise.
+        """
+        positions = [pos for pos, wildcard in enumerate(wildcards) if wildcard]
+        if len(positions) != 1:
+            return None
+        pos = positions[0]
+        part = parts[pos]
+        if any(part in other for i, other in enumerate(parts) if i != pos):
+            return None
+        return "/".join([*parts[:pos], cast("str", wildcards[pos]), *parts[pos + 1 :]])
 
 
 class MonoTemplateDiscovery(BaseDiscovery):
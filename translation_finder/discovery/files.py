@@ -6,12 +6,17 @@
 
 from __future__ import annotations
 
+import codecs
 import csv
 import json
 import re
 import tomllib
 import warnings
+from contextlib import closing
+from enum import Enum
+from functools import cache
 from io import StringIO
+from itertools import chain
 from typing import TYPE_CHECKING, ClassVar, cast
 from xml.parsers import expat
 
@@ -19,6 +24,8 @@ from ruamel.yaml import YAML
 from ruamel.yaml.error import YAMLError, YAMLFutureWarning
 
 from translation_finder.api import register_discovery
+from translation_finder.budget import BudgetExhaustedError
+from translation_finder.finder import scan_chunks
 
 from .base import (
     BaseDiscovery,
@@ -28,8 +35,9 @@ from .base import (
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Generator, Iterable, Iterator
     from pathlib import PurePath
+    from xml.parsers.expat import XMLParserType
 
     from translation_finder.finder import Finder
 
@@ -42,11 +50,33 @@ LARAVEL_BYTES_RE = re.compile(
     re.MULTILINE,
 )
 GWT_PLURAL_RE = re.compile(r"^[^#!\s][^:=\n]*\[[a-zA-Z_]+\]\s*[:=]", re.MULTILINE)
+# Same as GWT_PLURAL_RE, skipping the UTF-8 BOM which is stripped when decoding.
+GWT_PLURAL_BYTES_RE = re.compile(
+    rb"^(?:\xef\xbb\xbf|(?!\xef\xbb\xbf))[^#!\s][^:=\n]*\[[a-zA-Z_]+\]\s*[:=]",
+    re.MULTILINE,
+)
+XWIKI_PROPERTIES_MARKERS = ("XWiki Core localization", "# XWiki")
+XWIKI_PROPERTIES_BYTES_RE = re.compile(
+    b"|".join(re.escape(marker.encode()) for marker in XWIKI_PROPERTIES_MARKERS)
+)
 FORMAT_SNIFF_MAX_BYTES = 1024 * 1024
+XML_SNIFF_CHUNK_SIZE = 4096
+XML_SNIFF_MAX_ELEMENTS = 16
 CSV_DIALECT_SNIFF_MAX_CHARS = 1024
+CSV_DELIMITERS = ",;\t"
 CSV_SAMPLE_ROWS = 100
 SIMPLE_CSV_COLUMNS = 2
 YAML_INSPECTION_MAX_DEPTH = 128
+TOML_SNIFF_MAX_LINES = 1000
+TOML_MESSAGES_TABLE_RE = re.compile(
+    r"""\[\[\s*(?:messages|"messages"|'messages')\s*\]\]\s*(?:#.*)?"""
+)
+TOML_MESSAGES_HEADER_RE = re.compile(
+    r"""\[\[?\s*(?:messages|"messages"|'messages')\s*[.\]]"""
+)
+TOML_HEADER_RE = re.compile(r"(?:\[[^\[\]#\"']+\]|\[\[[^\[\]#\"']+\]\])\s*(?:#.*)?")
+TOML_MESSAGES_KEY_RE = re.compile(r"""(?:messages|"messages"|'messages')\s*(?:\.|$)""")
+TOML_ID_KEY_RE = re.compile(r"""(?:id|"id"|'id')\s*(?:\.|$)""")
 CSV_FIELDNAMES = {
     "context",
     "developer_comments",
@@ -62,31 +92,6 @@ CSV_FIELDNAMES = {
 }
 
 
-class _QtRootFoundError(Exception):
-    """Stop Qt XML parsing after the root element."""
-
-
-def _get_qt_ts_version(content: str) -> str | None:
-    """Return the version from a Qt TS root element."""
-    version: str | None = None
-    parser = expat.ParserCreate()
-
-    def handle_start(name: str, attributes: dict[str, str]) -> None:
-        nonlocal version
-        if name == "TS":
-            version = attributes.get("version")
-        raise _QtRootFoundError
-
-    parser.StartElementHandler = handle_start
-    try:
-        parser.Parse(content, False)  # ruff: ignore[boolean-positional-value-in-call]
-    except _QtRootFoundError:
-        return version
-    except expat.ExpatError:
-        return None
-    return None
-
-
 def _detect_utf32_encoding(content: bytes) -> str | None:
     """Detect standard UTF-32 byte orders from a BOM or XML opening marker."""
     if content.startswith((b"\x00\x00\xfe\xff", b"\xff\xfe\x00\x00")):
@@ -191,6 +196,34 @@ def _is_sniff_content_over_limit(
     return sample is not None and not sample[1]
 
 
+def _scan_markers(
+    finder: Finder,
+    path: PurePath,
+    markers: tuple[bytes | re.Pattern[bytes], ...],
+) -> int | None:
+    """Return index of the first marker found within the sniffing limit."""
+    if not hasattr(path, "open"):
+        return None
+    try:
+        return finder.scan(path, markers, limit=FORMAT_SNIFF_MAX_BYTES)
+    except OSError:
+        return None
+
+
+def _scan_all_markers(
+    finder: Finder,
+    path: PurePath,
+    markers: tuple[bytes | re.Pattern[bytes], ...],
+) -> set[int] | None:
+    """Return indexes of all markers found within the sniffing limit."""
+    if not hasattr(path, "open"):
+        return None
+    try:
+        return finder.scan_all(path, markers, limit=FORMAT_SNIFF_MAX_BYTES)
+    except OSError:
+        return None
+
+
 def _read_text_sample(
     finder: Finder,
     path: PurePath,
@@ -215,32 +248,353 @@ def _read_text_sniff_content(
     return _decode_content(content)
 
 
-def _iter_result_paths(finder: Finder, result: ResultDict) -> Generator[PurePath]:
-    """Yield unique paths referenced by a discovery result."""
-    seen: set[str] = set()
-    for mask in (result.get("template"), result["filemask"]):
-        if mask is None:
+class PropertiesMarker(Enum):
+    """Format marker found in Java properties."""
+
+    XWIKI = "xwiki"
+    GWT = "gwt"
+    NONE = "none"
+
+
+# Markers in order of the scanned patterns
+PROPERTIES_MARKERS = (PropertiesMarker.XWIKI, PropertiesMarker.GWT)
+
+
+class _XMLSniffStopError(Exception):
+    """Stop XML parsing once the sniffer has seen enough."""
+
+
+class _XMLSniffer:
+    """
+    Incremental XML sniffer.
+
+    The file is fed to expat in small chunks and the sniffer records the root
+    element, its attributes and the names of the first elements following it.
+    Parsing stops as soon as :meth:`is_complete` is satisfied, which is usually
+    within the first chunk.
+    """
+
+    max_elements: ClassVar[int] = XML_SNIFF_MAX_ELEMENTS
+    text_elements: ClassVar[frozenset[str]] = frozenset()
+
+    def __init__(self) -> None:
+        self.root: str | None = None
+        self.attributes: dict[str, str] = {}
+        self.elements: list[str] = []
+        self.texts: dict[str, list[str]] = {}
+        self.bytes_read = 0
+        self._text: list[str] | None = None
+
+    def is_complete(self) -> bool:
+        """Check whether enough of the document has been seen."""
+        return self.root is not None and len(self.elements) >= self.max_elements
+
+    def start_element(self, name: str, attributes: dict[str, str]) -> None:
+        """Record element start."""
+        if self.root is None:
+            self.root = name
+            self.attributes = attributes
+        elif len(self.elements) < self.max_elements:
+            self.elements.append(name)
+        if name in self.text_elements:
+            self._text = []
+        if self.is_complete():
+            raise _XMLSniffStopError
+
+    def end_element(self, name: str) -> None:
+        """Record text of the elements listed in text_elements."""
+        if self._text is not None and name in self.text_elements:
+            self.texts.setdefault(name, []).append("".join(self._text))
+            self._text = None
+            if self.is_complete():
+                raise _XMLSniffStopError
+
+    def character_data(self, data: str) -> None:
+        """Collect text content."""
+        if self._text is not None:
+            self._text.append(data)
+
+    def feed(self, parser: XMLParserType, finder: Finder, path: PurePath) -> None:
+        """Feed the file to the parser in chunks."""
+        decoder: codecs.IncrementalDecoder | None = None
+        # The parser stops the sniffing by raising, close the file right away
+        with closing(
+            finder.iter_chunks(path, XML_SNIFF_CHUNK_SIZE, FORMAT_SNIFF_MAX_BYTES)
+        ) as chunks:
+            for chunk in chunks:
+                if not self.bytes_read and (encoding := _detect_utf32_encoding(chunk)):
+                    # Expat does not support UTF-32, feed it decoded text
+                    decoder = codecs.getincrementaldecoder(encoding)("replace")
+                self.bytes_read += len(chunk)
+                if decoder is None:
+                    parser.Parse(chunk)
+                else:
+                    parser.Parse(decoder.decode(chunk))
+        if self.bytes_read >= FORMAT_SNIFF_MAX_BYTES:
+            # Only a sample was read, its end is not the end of the document
+            return
+        final = True
+        if decoder is None:
+            parser.Parse(b"", final)
+        else:
+            parser.Parse(decoder.decode(b"", final=final), final)
+
+    def sniff(self, finder: Finder, path: PurePath) -> bool | None:
+        """
+        Parse the file until complete.
+
+        Returns False if it can not be read and None if it is not well-formed
+        before enough of the document has been seen, for example when using
+        an undeclared entity. The outcome is then inconclusive and callers
+        fall back to looking for markers in the content.
+        """
+        if not hasattr(path, "open"):
+            return False
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = self.start_element
+        if self.text_elements:
+            parser.EndElementHandler = self.end_element
+            parser.CharacterDataHandler = self.character_data
+        try:
+            self.feed(parser, finder, path)
+        except OSError:
+            return False
+        except _XMLSniffStopError:
+            pass
+        except expat.ExpatError:
+            return None
+        return True
+
+
+class _QtSniffer(_XMLSniffer):
+    """Qt Linguist sniffer, only the root element matters."""
+
+    max_elements = 0
+
+
+class _AndroidSniffer(_XMLSniffer):
+    """Android resources sniffer looking for moko plural elements."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.plural = False
+
+    def is_complete(self) -> bool:
+        """Check whether enough of the document has been seen."""
+        return self.plural
+
+    def start_element(self, name: str, attributes: dict[str, str]) -> None:
+        """Record element start."""
+        self.plural |= name == "plural"
+        super().start_element(name, attributes)
+
+
+class _XliffSniffer(_XMLSniffer):
+    """XLIFF sniffer detecting format variants."""
+
+    apple_markers = (":dict", "NSStringPluralRuleType")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.file_format: str | None = None
+        self.inline = False
+
+    @property
+    def is_xliff2(self) -> bool:
+        """Check whether the root declares XLIFF 2."""
+        return self.attributes.get("version") in {"2.0", "2.1"}
+
+    def is_complete(self) -> bool:
+        """Check whether enough of the document has been seen."""
+        return self.file_format is not None
+
+    def start_element(self, name: str, attributes: dict[str, str]) -> None:
+        """Record element start."""
+        if self.root is None:
+            pass
+        elif self.is_xliff2:
+            if name in {"pc", "sc", "ec"}:
+                self.file_format = "xliff2-placeables"
+        elif attributes.get("restype", "").startswith("x-gettext"):
+            self.file_format = "poxliff"
+        elif attributes.get("original") == "Localizable.strings" or any(
+            marker in value
+            for value in attributes.values()
+            for marker in self.apple_markers
+        ):
+            self.file_format = "apple-xliff"
+        elif name in {"x", "g"}:
+            self.inline = True
+        super().start_element(name, attributes)
+
+    @staticmethod
+    def get_marker_format(content: bytes) -> str | None:
+        """Return format variant based on markers in the content."""
+        if b'version="2.0"' in content or b'version="2.1"' in content:
+            if b"<pc" in content or b"<sc" in content or b"<ec" in content:
+                return "xliff2-placeables"
+            return "xliff2"
+        if b'restype="x-gettext' in content:
+            return "poxliff"
+        if (
+            b"NSStringPluralRuleType" in content
+            or b'original="Localizable.strings"' in content
+            or b":dict" in content
+        ):
+            return "apple-xliff"
+        if b"<x " not in content and b"<g " not in content:
+            return "plainxliff"
+        return None
+
+    def get_file_format(self) -> str | None:
+        """Return detected format variant."""
+        if self.file_format is not None:
+            return self.file_format
+        if self.is_xliff2:
+            return "xliff2"
+        if self.root is not None and not self.inline:
+            return "plainxliff"
+        return None
+
+
+class _XWikiSniffer(_XMLSniffer):
+    """XWiki document sniffer."""
+
+    text_elements = frozenset(("syntaxId", "className"))
+
+    @property
+    def is_xwiki(self) -> bool:
+        """Check whether this is an XWiki document."""
+        return self.root == "xwikidoc"
+
+    @property
+    def is_page_properties(self) -> bool:
+        """Check whether the XWiki document stores translation properties."""
+        return any(
+            syntax.startswith("plain/") for syntax in self.texts.get("syntaxId", ())
+        ) or "XWiki.TranslationDocumentClass" in self.texts.get("className", ())
+
+    def is_complete(self) -> bool:
+        """Check whether enough of the document has been seen."""
+        return self.root is not None and (not self.is_xwiki or self.is_page_properties)
+
+
+def _is_toml_value_complete(value: str) -> bool:
+    """Check whether a TOML value does not continue on following lines."""
+    if '"""' in value or "'''" in value:
+        return False
+    if not value.startswith(("[", "{")):
+        return True
+    if any(char in value for char in "\"'#"):
+        return False
+    return value.count("[") + value.count("{") == value.count("]") + value.count("}")
+
+
+def _sniff_go_i18n_toml(content: str) -> bool | None:
+    """
+    Check whether the first ``[[messages]]`` table has an ``id`` key.
+
+    This is a line-oriented scan which avoids parsing the whole document. It
+    returns None when the answer cannot be determined reliably without a
+    parser, for example for multi-line values, dotted ``messages`` keys or when
+    there is no ``[[messages]]`` table at all.
+    """
+    root_table = True
+    in_messages = False
+    seen_messages = False
+    # TOML only knows LF and CRLF newlines, str.splitlines() would split more
+    for number, raw_line in enumerate(content.split("\n", TOML_SNIFF_MAX_LINES)):
+        if number >= TOML_SNIFF_MAX_LINES:
+            break
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
             continue
-        for path in finder.mask_matches(mask):
-            key = path.as_posix()
-            if key in seen:
+        if line.startswith("["):
+            root_table = False
+            if TOML_MESSAGES_TABLE_RE.fullmatch(line):
+                if seen_messages:
+                    # The second array item has started, the first one is complete
+                    return False
+                in_messages = seen_messages = True
                 continue
-            seen.add(key)
-            yield path
+            if TOML_MESSAGES_HEADER_RE.match(line) or not TOML_HEADER_RE.fullmatch(
+                line
+            ):
+                break
+            in_messages = False
+            continue
+
+        key, separator, value = line.partition("=")
+        key = key.strip()
+        if (
+            not separator
+            or "\\" in key
+            or not _is_toml_value_complete(value.strip())
+            or (root_table and TOML_MESSAGES_KEY_RE.match(key))
+        ):
+            break
+        if in_messages and TOML_ID_KEY_RE.match(key):
+            return True
+    else:
+        if seen_messages:
+            return False
+    return None
+
+
+@cache
+def _get_csv_dialect(
+    delimiter: str, quotechar: str, *, skipinitialspace: bool
+) -> type[csv.Dialect]:
+    """Return CSV dialect with given parameters."""
+    return type(
+        "CSVHeaderDialect",
+        (csv.excel,),
+        {
+            "delimiter": delimiter,
+            "quotechar": quotechar,
+            "skipinitialspace": skipinitialspace,
+        },
+    )
+
+
+def _detect_csv_header_dialect(line: str) -> type[csv.Dialect] | None:
+    """Detect CSV dialect from a Weblate CSV header line."""
+    line = line.removeprefix("\ufeff").rstrip("\r")
+    for delimiter in CSV_DELIMITERS:
+        fields = line.split(delimiter)
+        if len(fields) < SIMPLE_CSV_COLUMNS:
+            continue
+        quotechar = '"'
+        skipinitialspace = False
+        for field in fields:
+            name = field.strip()
+            skipinitialspace |= field[:1].isspace()
+            if len(name) > 1 and name[0] == name[-1] and name[0] in "\"'":
+                quotechar = name[0]
+                name = name[1:-1]
+            if name.lower() not in CSV_FIELDNAMES:
+                break
+        else:
+            return _get_csv_dialect(
+                delimiter, quotechar, skipinitialspace=skipinitialspace
+            )
+    return None
 
 
 def _read_csv_rows(finder: Finder, path: PurePath) -> list[list[str]] | None:
     """Parse a small CSV sample."""
     text = _read_text_sample(finder, path)
-    if not text or not any(delimiter in text for delimiter in ",;\t"):
+    if not text or not any(delimiter in text for delimiter in CSV_DELIMITERS):
         return None
 
-    try:
-        dialect = csv.Sniffer().sniff(
-            text[:CSV_DIALECT_SNIFF_MAX_CHARS], delimiters=",;\t"
-        )
-    except csv.Error:
-        dialect = csv.excel
+    dialect = _detect_csv_header_dialect(text.split("\n", 1)[0])
+    if dialect is None:
+        try:
+            dialect = csv.Sniffer().sniff(
+                text[:CSV_DIALECT_SNIFF_MAX_CHARS], delimiters=CSV_DELIMITERS
+            )
+        except csv.Error:
+            dialect = csv.excel
 
     rows: list[list[str]] = []
     try:
@@ -300,10 +654,10 @@ def _is_csv_simple(rows: list[list[str]]) -> bool:
     return not header or set(header) <= {"context", "id", "source", "target"}
 
 
-def _detect_csv_format(finder: Finder, result: ResultDict) -> str | None:
+def _detect_csv_format(finder: Finder, paths: Iterable[PurePath]) -> str | None:
     """Detect CSV format variants based on file content."""
     detected_simple = False
-    for path in _iter_result_paths(finder, result):
+    for path in paths:
         rows = _read_csv_rows(finder, path)
         if rows is None:
             continue
@@ -323,20 +677,19 @@ class GettextDiscovery(BaseDiscovery):
     mask = "*.po"
     new_base_mask = "*.pot"
 
-    def discover(
-        self, *, eager: bool = False, hint: str | None = None
+    def expand(  # ruff:ignore[no-self-use]
+        self, result: DiscoveryResult, *, eager: bool = False
     ) -> Generator[DiscoveryResult]:
-        """Yield translation configurations matching this discovery."""
-        for result in super().discover(eager=eager, hint=hint):
-            if "template" not in result:
-                yield result
-                continue
-            bi = result.copy()
-            del bi["template"]
-            yield bi
-            mono = result.copy()
-            mono["file_format"] = "po-mono"
-            yield mono
+        """Yield translation configurations for a detected result."""
+        if "template" not in result:
+            yield result
+            return
+        bi = result.copy()
+        del bi["template"]
+        yield bi
+        mono = result.copy()
+        mono["file_format"] = "po-mono"
+        yield mono
 
     def fill_in_new_base(self, result: ResultDict) -> None:
         """Extend the result for new_base and intermediate parameters."""
@@ -363,18 +716,21 @@ class QtDiscovery(BaseDiscovery):
     mask = "*.ts"
     new_base_mask = "*.ts"
 
+    def content_sniff_path(self, result: ResultDict) -> PurePath | None:
+        """Return the file inspected by adjust_format."""
+        return next(iter(self.finder.mask_matches(result["filemask"])), None)
+
     def adjust_format(self, result: ResultDict) -> None:
         """Detect legacy Qt Linguist files based on the TS root version."""
         path = next(iter(self.finder.mask_matches(result["filemask"])), None)
         if path is None:
             return
 
-        content = _read_text_sample(self.finder, path)
-        if content is None:
+        sniffer = _QtSniffer()
+        if not sniffer.sniff(self.finder, path) or sniffer.root != "TS":
             return
 
-        version = _get_qt_ts_version(content)
-        if version is not None and version.startswith("1."):
+        if sniffer.attributes.get("version", "").startswith("1."):
             result["file_format"] = "ts1"
 
 
@@ -385,35 +741,30 @@ class XliffDiscovery(BaseDiscovery):
     file_format = "xliff"
     mask = ("*.xliff", "*.xlf", "*.sdlxliff", "*.mxliff", "*.poxliff")
 
+    def content_sniff_path(self, result: ResultDict) -> PurePath | None:
+        """Return the file inspected by adjust_format."""
+        base = result["template"] if "template" in result else result["filemask"]
+        return next(iter(self.finder.mask_matches(base)), None)
+
     def adjust_format(self, result: ResultDict) -> None:
         """Override detected format, based on the file content."""
         base = result["template"] if "template" in result else result["filemask"]
 
         path = next(iter(self.finder.mask_matches(base)))
 
-        if not hasattr(path, "open"):
-            return
-
-        sample = _read_binary_sniff_sample(self.finder, path)
-        if sample is None:
+        sniffer = _XliffSniffer()
+        sniffed = sniffer.sniff(self.finder, path)
+        if sniffed is None:
+            content = _read_binary_sample(self.finder, path)
+            if content is None:
+                return
+            file_format = sniffer.get_marker_format(content)
+        elif sniffed:
+            file_format = sniffer.get_file_format()
+        else:
             return
-        content, _complete = sample
-        # Check for XLIFF 2.0 first
-        if b'version="2.0"' in content or b'version="2.1"' in content:
-            if b"<pc" in content or b"<sc" in content or b"<ec" in content:
-                result["file_format"] = "xliff2-placeables"
-            else:
-                result["file_format"] = "xliff2"
-        elif b'restype="x-gettext' in content:
-            result["file_format"] = "poxliff"
-        elif (
-            b"NSStringPluralRuleType" in content
-            or b'original="Localizable.strings"' in content
-            or b":dict" in content
-        ):
-            result["file_format"] = "apple-xliff"
-        elif b"<x " not in content and b"<g " not in content:
-            result["file_format"] = "plainxliff"
+        if file_format is not None:
+            result["file_format"] = file_format
 
 
 @register_discovery
@@ -433,22 +784,21 @@ class CSVDiscovery(MonoTemplateDiscovery):
 
     def adjust_format(self, result: ResultDict) -> None:
         """Override detected format, based on the file content."""
-        detected = _detect_csv_format(self.finder, result)
+        detected = _detect_csv_format(self.finder, self.iter_probe_paths(result))
         if detected is not None:
             result["file_format"] = detected
 
-    def discover(
-        self, *, eager: bool = False, hint: str | None = None
+    def expand(  # ruff:ignore[no-self-use]
+        self, result: DiscoveryResult, *, eager: bool = False
     ) -> Generator[DiscoveryResult]:
-        """Yield translation configurations matching this discovery."""
-        for result in super().discover(eager=eager, hint=hint):
-            if "template" not in result:
-                yield result
-                continue
-            bilingual = result.copy()
-            del bilingual["template"]
-            yield bilingual
+        """Yield translation configurations for a detected result."""
+        if "template" not in result:
             yield result
+            return
+        bilingual = result.copy()
+        del bilingual["template"]
+        yield bilingual
+        yield result
 
 
 @register_discovery
@@ -464,6 +814,8 @@ class AndroidDiscovery(BaseDiscovery):
     """Android string files discovery."""
 
     file_format = "aresource"
+    accepts_hints = False
+    sniffs_template = True
 
     def get_masks(
         self, *, eager: bool = False, hint: str | None = None
@@ -494,11 +846,13 @@ class AndroidDiscovery(BaseDiscovery):
 
         path = next(iter(self.finder.mask_matches(result["template"])))
 
-        if not hasattr(path, "open"):
-            return
-
-        content = _read_binary_sample(self.finder, path)
-        if content is not None and b"<plural " in content:
+        sniffer = _AndroidSniffer()
+        sniffed = sniffer.sniff(self.finder, path)
+        if sniffed is None:
+            plural = _scan_markers(self.finder, path, (b"<plural ",)) is not None
+        else:
+            plural = sniffed and sniffer.plural
+        if plural:
             result["file_format"] = "moko-resource"
 
 
@@ -507,6 +861,7 @@ class MOKODiscovery(BaseDiscovery):
     """Mobile Kotlin resources discovery."""
 
     file_format = "moko-resource"
+    accepts_hints = False
 
     def get_masks(
         self, *, eager: bool = False, hint: str | None = None
@@ -532,6 +887,7 @@ class OSXDiscovery(EncodingDiscovery):
     """OSX string properties files discovery."""
 
     file_format: ClassVar[str] = "strings"
+    accepts_hints: ClassVar[bool] = False
     file_format_params: ClassVar[dict[str, str | int | bool]] = {
         "strings_encoding": "utf-8",
     }
@@ -579,6 +935,7 @@ class StringsdictDiscovery(BaseDiscovery):
     """Stringsdict files discovery."""
 
     file_format = "stringsdict"
+    accepts_hints = False
 
     def get_masks(
         self, *, eager: bool = False, hint: str | None = None
@@ -623,23 +980,54 @@ class JavaDiscovery(EncodingDiscovery):
     def adjust_format(self, result: ResultDict) -> None:
         """Override detected format, based on the file content."""
         self.adjust_encoding(result)
-        for path in _iter_result_paths(self.finder, result):
-            content = _read_text_sample(self.finder, path)
-            if content is None:
+        for path in self.iter_probe_paths(result):
+            marker = self.scan_markers(path)
+            if marker is None:
                 continue
-            if (
-                "xwiki" in path.as_posix().lower()
-                or "XWiki Core localization" in content
-                or "# XWiki" in content
-            ):
+            if marker is PropertiesMarker.XWIKI or "xwiki" in path.as_posix().lower():
                 result["file_format"] = "xwiki-java-properties"
                 self.normalize_encoding_parameters(result)
                 return
-            if GWT_PLURAL_RE.search(content):
+            if marker is PropertiesMarker.GWT:
                 result["file_format"] = "gwt"
                 self.normalize_encoding_parameters(result)
                 return
 
+    def scan_markers(self, path: PurePath) -> PropertiesMarker | None:
+        """
+        Scan file for format markers.
+
+        Returns None for unreadable files.
+        """
+        if not hasattr(path, "open"):
+            return None
+        try:
+            with closing(
+                self.finder.iter_chunks(path, limit=FORMAT_SNIFF_MAX_BYTES)
+            ) as chunks:
+                return self.get_marker(chunks)
+        except OSError:
+            return None
+
+    @staticmethod
+    def get_marker(chunks: Iterator[bytes]) -> PropertiesMarker:
+        """Return format marker found in the file chunks."""
+        first = next(chunks, b"")
+        if first[:2] in {b"\xff\xfe", b"\xfe\xff"}:
+            # UTF-16 needs decoding before matching
+            content = _decode_sample_content(b"".join((first, *chunks)))
+            if any(marker in content for marker in XWIKI_PROPERTIES_MARKERS):
+                return PropertiesMarker.XWIKI
+            if GWT_PLURAL_RE.search(content):
+                return PropertiesMarker.GWT
+            return PropertiesMarker.NONE
+        marker = scan_chunks(
+            chain((first,), chunks), (XWIKI_PROPERTIES_BYTES_RE, GWT_PLURAL_BYTES_RE)
+        )
+        return (
+            PROPERTIES_MARKERS[marker] if marker is not None else PropertiesMarker.NONE
+        )
+
 
 @register_discovery
 class RESXDiscovery(BaseDiscovery):
@@ -732,6 +1120,7 @@ class JSONDiscovery(BaseDiscovery):
 
     file_format = "json-nested"
     mask = "*.json"
+    sniffs_template = True
 
     def read_json_data(self, path: PurePath) -> object | None:
         """Read and parse a complete JSON file."""
@@ -745,7 +1134,7 @@ class JSONDiscovery(BaseDiscovery):
 
     def has_template_less_content(self, result: ResultDict) -> bool:
         """Check whether a template-less JSON result looks translatable."""
-        for path in _iter_result_paths(self.finder, result):
+        for path in self.iter_probe_paths(result):
             if not hasattr(path, "open"):
                 return True
 
@@ -757,18 +1146,20 @@ class JSONDiscovery(BaseDiscovery):
                 return True
         return False
 
-    def discover(
-        self, *, eager: bool = False, hint: str | None = None
+    def expand(
+        self, result: DiscoveryResult, *, eager: bool = False
     ) -> Generator[DiscoveryResult]:
-        """Yield JSON configurations matching this discovery."""
-        for result in super().discover(eager=eager, hint=hint):
-            if (
-                not eager
-                and "template" not in result
-                and not self.has_template_less_content(result.match)
-            ):
-                continue
-            yield result
+        """Yield JSON configurations for a detected result."""
+        if not eager and "template" not in result:
+            try:
+                with self.spend_budget():
+                    if not self.has_template_less_content(result.match):
+                        return
+            except BudgetExhaustedError:
+                # Keep the result as when the content can not be read
+                self._unsniffed.add(result["filemask"])
+        self.fill_in_probed(result)
+        yield result
 
     @staticmethod
     def is_go_i18n_v2_dict(data: dict) -> bool:
@@ -1009,6 +1400,7 @@ class PHPDiscovery(MonoTemplateDiscovery):
 
     file_format = "php"
     mask = "*.php"
+    sniffs_template = True
 
     def adjust_format(self, result: ResultDict) -> None:
         """Override detected format, based on the file content."""
@@ -1017,15 +1409,8 @@ class PHPDiscovery(MonoTemplateDiscovery):
 
         path = next(iter(self.finder.mask_matches(result["template"])))
 
-        if not hasattr(path, "open"):
-            return
-
-        content = _read_binary_sample(self.finder, path)
-        if (
-            content is not None
-            and b"return [" in content
-            and LARAVEL_BYTES_RE.search(content)
-        ):
+        markers = (b"return [", LARAVEL_BYTES_RE)
+        if _scan_all_markers(self.finder, path, markers) == {0, 1}:
             result["file_format"] = "laravel"
 
 
@@ -1055,7 +1440,10 @@ class TXTDiscovery(MonoTemplateDiscovery, EnglishVariantsDiscovery):
 
     def adjust_format(self, result: ResultDict) -> None:
         """Override detected format, based on the file content."""
-        if _detect_csv_format(self.finder, result) == "csv-simple":
+        if (
+            _detect_csv_format(self.finder, self.iter_probe_paths(result))
+            == "csv-simple"
+        ):
             result["file_format"] = "csv-simple"
 
 
@@ -1119,6 +1507,7 @@ class TOMLDiscovery(BaseDiscovery):
 
     file_format = "toml"
     mask = "*.toml"
+    sniffs_template = True
 
     def adjust_format(self, result: ResultDict) -> None:
         """Override detected format, based on the file content."""
@@ -1133,6 +1522,11 @@ class TOMLDiscovery(BaseDiscovery):
         content = _read_text_sniff_content(self.finder, path)
         if content is None:
             return
+        go_i18n = _sniff_go_i18n_toml(content)
+        if go_i18n is not None:
+            if go_i18n:
+                result["file_format"] = "go-i18n-toml"
+            return
         try:
             data = tomllib.loads(content)
         except (tomllib.TOMLDecodeError, OSError, RecursionError) as error:
@@ -1241,6 +1635,7 @@ class FormatJSDiscovery(BaseDiscovery):
     """Format.JS JSON files discovery."""
 
     file_format = "formatjs"
+    accepts_hints = False
 
     def get_masks(
         self, *, eager: bool = False, hint: str | None = None
@@ -1280,14 +1675,22 @@ class FlatXMLDiscovery(MonoTemplateDiscovery):
 
     def adjust_format(self, result: ResultDict) -> None:
         """Override detected format, based on the file content."""
-        for path in _iter_result_paths(self.finder, result):
-            content = _read_text_sample(self.finder, path)
-            if content is None or "<xwikidoc" not in content:
+        for path in self.iter_probe_paths(result):
+            sniffer = _XWikiSniffer()
+            sniffed = sniffer.sniff(self.finder, path)
+            if sniffed is None:
+                content = _read_text_sample(self.finder, path)
+                if content is None or "<xwikidoc" not in content:
+                    continue
+                page_properties = (
+                    "XWiki.TranslationDocumentClass" in content
+                    or "<syntaxId>plain/" in content
+                )
+            elif sniffed and sniffer.is_xwiki:
+                page_properties = sniffer.is_page_properties
+            else:
                 continue
-            if (
-                "XWiki.TranslationDocumentClass" in content
-                or "<syntaxId>plain/" in content
-            ):
+            if page_properties:
                 result["file_format"] = "xwiki-page-properties"
             else:
                 result["file_format"] = "xwiki-fullpage"
@@ -1307,6 +1710,7 @@ class CMPDiscovery(BaseDiscovery):
     """Compose Multiplatform Resource files discovery."""
 
     file_format = "cmp-resource"
+    accepts_hints = False
 
     def get_masks(
         self, *, eager: bool = False, hint: str | None = None
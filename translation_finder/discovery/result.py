@@ -7,8 +7,12 @@
 from __future__ import annotations
 
 from collections import UserDict
+from copy import deepcopy
 from functools import total_ordering
-from typing import NotRequired, TypedDict, cast
+from typing import TYPE_CHECKING, NotRequired, TypedDict, cast
+
+if TYPE_CHECKING:
+    from translation_finder.finder import FinderAccess
 
 FileFormatParams = dict[str, str | int | bool]
 
@@ -20,6 +24,9 @@ class ResultMeta(TypedDict):
     file_format: NotRequired[str]
     discovery: str
     origin: str | None
+    probed: NotRequired[int]
+    incomplete: NotRequired[bool]
+    sniffed: NotRequired[bool]
 
 
 class ResultDict(TypedDict, total=False):
@@ -41,6 +48,9 @@ class DiscoveryResult(UserDict):
     Discovery result class.
 
     Subclass of a dict with meta dict containing additional information.
+
+    The access holds paths and queries used while detecting the result, it is
+    used to decide whether changes in the tree affect it.
     """
 
     data: ResultDict  # type: ignore[assignment]
@@ -53,6 +63,7 @@ class DiscoveryResult(UserDict):
             "discovery": "",
             "origin": None,
         }
+        self.access: FinderAccess | None = None
 
     @property
     def _sort_key(self) -> tuple[int, str]:
@@ -84,7 +95,8 @@ class DiscoveryResult(UserDict):
         return f"{self.match!r} [meta:{self.meta!r}]"
 
     def copy(self) -> DiscoveryResult:
-        """Create a copy of the result."""
-        result = DiscoveryResult(self.data.copy())
-        result.meta = self.meta.copy()
+        """Create a copy of the result, not sharing nested values."""
+        result = DiscoveryResult(deepcopy(self.data))
+        result.meta = deepcopy(self.meta)
+        result.access = self.access
         return result
@@ -30,6 +30,7 @@ class TransifexDiscovery(BaseDiscovery):
 
     origin = "Transifex"
     priority = 500
+    accepts_hints = False
 
     typemap: ClassVar[dict[str, str]] = {
         "ANDROID": "aresource",
@@ -136,32 +137,31 @@ class TransifexDiscovery(BaseDiscovery):
             return None
         return rf"^(?!{re.escape(language)}$).+$"
 
-    def discover(
-        self, *, eager: bool = False, hint: str | None = None
+    def expand(
+        self, result: DiscoveryResult, *, eager: bool = False
     ) -> Generator[DiscoveryResult]:
         """Yield translation configurations matching Transifex configuration."""
-        for result in super().discover(eager=eager, hint=hint):
-            if (
-                result.get("file_format") != "po"
-                or "template" not in result
-                or not result["template"].lower().endswith(".po")
-            ):
-                yield result
-                continue
-
-            template = result["template"]
-            language_regex = self.get_language_regex(result["filemask"], template)
-
-            bilingual = result.copy()
-            del bilingual["template"]
-            bilingual["new_base"] = template
-            if language_regex is not None:
-                bilingual["language_regex"] = language_regex
-            yield bilingual
-
-            monolingual = result.copy()
-            monolingual["file_format"] = "po-mono"
-            yield monolingual
+        if (
+            result.get("file_format") != "po"
+            or "template" not in result
+            or not result["template"].lower().endswith(".po")
+        ):
+            yield result
+            return
+
+        template = result["template"]
+        language_regex = self.get_language_regex(result["filemask"], template)
+
+        bilingual = result.copy()
+        del bilingual["template"]
+        bilingual["new_base"] = template
+        if language_regex is not None:
+            bilingual["language_regex"] = language_regex
+        yield bilingual
+
+        monolingual = result.copy()
+        monolingual["file_format"] = "po-mono"
+        yield monolingual
 
     def get_masks(
         self, *, eager: bool = False, hint: str | None = None
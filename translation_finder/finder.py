@@ -6,18 +6,33 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
 import operator
 import re
+from bisect import bisect_left, insort
+from contextlib import closing, contextmanager, suppress
+from contextvars import ContextVar
 from fnmatch import fnmatch, translate
+from functools import lru_cache, partial
 from os import scandir
 from pathlib import Path, PurePath
-from typing import TYPE_CHECKING, overload
+from typing import IO, TYPE_CHECKING, overload
+
+from .budget import ACTIVE_BUDGET
+from .cancel import DiscoveryCancelledError
+from .stats import ACTIVE_STATS, count, measure
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable
+    from collections.abc import Callable, Generator, Iterable, Sequence
+    from functools import _CacheInfo
     from io import FileIO, TextIOWrapper
+    from os import stat_result
+
+    from _typeshed import OpenBinaryMode, OpenTextMode, WriteableBuffer
 
-    from _typeshed import OpenBinaryMode, OpenTextMode
+    from .cancel import CancellationToken
+    from .stats import DiscoveryStats
 
 EXCLUDES = {
     ".git",
@@ -38,6 +53,14 @@ EXCLUDES = {
     ".*_cache",
 }
 
+# Configuration directories listed in parents of a scope
+SCOPE_CONFIG_DIRS = {".tx"}
+
+SCAN_CHUNK_SIZE = 8192
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+# Number of compiled patterns and planned mask queries kept
+PATTERN_CACHE_SIZE = 4096
+
 
 def lc_convert(relative_path: str, relative: PurePath) -> tuple[str, str, PurePath]:
     """Convert path to lower case and extract directory and filename from it."""
@@ -49,30 +72,220 @@ def lc_convert(relative_path: str, relative: PurePath) -> tuple[str, str, PurePa
     return directory, filename, relative
 
 
+def escape_mask(mask: str) -> str:
+    """Escape characters in a file mask which are not wildcards."""
+    return mask.replace("[", "[[]").replace("?", "[?]")
+
+
+def match_marker(
+    marker: bytes | re.Pattern[bytes], content: bytes
+) -> tuple[bool, bytes]:
+    """
+    Match a marker in scanned content.
+
+    Returns whether it was found and the content to prepend to the next chunk.
+    """
+    if isinstance(marker, bytes):
+        if marker in content:
+            return True, b""
+        return False, content[max(len(content) - len(marker) + 1, 0) :]
+    end = content.rfind(b"\n") + 1
+    if marker.search(content, 0, end):
+        return True, b""
+    return False, content[end:]
+
+
+def scan_chunks(
+    chunks: Iterable[bytes], markers: Sequence[bytes | re.Pattern[bytes]]
+) -> int | None:
+    """Scan chunks for markers and return index of the first one found."""
+    found: int | None = None
+    pending = [b""] * len(markers)
+    for chunk in chunks:
+        for index, marker in enumerate(markers[:found]):
+            matched, pending[index] = match_marker(marker, pending[index] + chunk)
+            if matched:
+                found = index
+                break
+        if found == 0:
+            return found
+    for index, marker in enumerate(markers[:found]):
+        if isinstance(marker, re.Pattern) and marker.search(pending[index]):
+            return index
+    return found
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str) -> re.Pattern[str]:
+    """Compile regular expression, keeping more patterns than re does."""
+    return re.compile(pattern)
+
+
 PathListItem = tuple[PurePath, PurePath, str]
 PathListType = list[PathListItem]
 PathMockType = tuple[PathListType, PathListType]
 LowerPathListItem = tuple[str, str, PurePath]
 FileMatchItem = tuple[str, PurePath]
+QueryKey = tuple[str, str | None, frozenset[str] | None, frozenset[str] | None]
+
+lc_sort_key = operator.itemgetter(slice(2))
+file_sort_key = operator.itemgetter(0)
+
+# Usages recorded by Finder.track blocks in progress, innermost last
+ACTIVE_ACCESS: ContextVar[tuple[FinderAccess, ...]] = ContextVar(
+    "active_access", default=()
+)
+
+
+def remove_sorted(items: list, item: tuple, key: Callable) -> None:
+    """Remove item from a list sorted by key."""
+    position = bisect_left(items, key(item), key=key)
+    while items[position] != item:
+        position += 1
+    del items[position]
 
 
-class Finder:
+class FinderAccess:
+    """Paths and queries used through the finder."""
+
+    def __init__(self) -> None:
+        self.names: set[str] = set()
+        self.masks: set[str] = set()
+        self.queries: set[QueryKey] = set()
+
+    @staticmethod
+    def query_matches(query: QueryKey, path: str) -> bool:
+        """Check whether a query would return the path."""
+        fileglob, dirglob, candidate_names, candidate_suffixes = query
+        directory, filename, _relative = lc_convert(path, PurePath(path))
+        if (candidate_names is not None or candidate_suffixes is not None) and not (
+            (candidate_names is not None and filename in candidate_names)
+            or (
+                candidate_suffixes is not None
+                and Finder.get_suffix(filename) in candidate_suffixes
+            )
+        ):
+            return False
+        return (
+            dirglob is None or compile_pattern(dirglob).fullmatch(directory)
+        ) is not None and compile_pattern(fileglob).fullmatch(filename) is not None
+
+    def is_affected(self, path: str) -> bool:
+        """Check whether adding, removing or changing path affects the usage."""
+        if path in self.names:
+            return True
+        if any(fnmatch(path, escape_mask(mask)) for mask in self.masks):
+            return True
+        return any(self.query_matches(query, path) for query in self.queries)
+
+
+def track_name(name: str) -> None:
+    """Record path checked or read in the tracked blocks."""
+    for access in ACTIVE_ACCESS.get():
+        access.names.add(name)
+
+
+def track_mask(mask: str) -> None:
+    """Record mask matched in the tracked blocks."""
+    for access in ACTIVE_ACCESS.get():
+        access.masks.add(mask)
+
+
+def track_query(query: QueryKey) -> None:
+    """Record query run in the tracked blocks."""
+    for access in ACTIVE_ACCESS.get():
+        access.queries.add(query)
+
+
+class MeteredFileIO(io.FileIO):
+    """File charging bytes read to sniffing budget and statistics."""
+
+    def __init__(self, path: Path, meters: list[Callable[..., None]]) -> None:
+        super().__init__(path)
+        self.meters = meters
+
+    def charge(self, size: int) -> None:
+        """Charge bytes read to all meters."""
+        for meter in self.meters:
+            meter(size=size)
+
+    def readinto(self, buffer: WriteableBuffer, /) -> int | None:
+        """Read into a buffer, charging the bytes read."""
+        size = super().readinto(buffer)
+        if size:
+            self.charge(size)
+        return size
+
+    def readall(self) -> bytes:
+        """Read until the end of the file, charging the bytes read."""
+        data = super().readall()
+        self.charge(len(data))
+        return data
+
+
+def open_metered(path: Path, mode: str = "r", name: str | None = None) -> IO:
+    """Open file for reading, charging it to the active budget and statistics."""
+    meters: list[Callable[..., None]] = []
+    if (budget := ACTIVE_BUDGET.get()) is not None:
+        meters.append(partial(budget[0].charge, budget[1]))
+    if (phase := ACTIVE_STATS.get()) is not None:
+        phase.opened(name or path.as_posix())
+        meters.append(phase.charge)
+    if not meters:
+        return path.open(mode=mode)
+    for meter in meters:
+        meter(files=1)
+    raw = MeteredFileIO(path, meters)
+    if "b" in mode:
+        return io.BufferedReader(raw)
+    return io.TextIOWrapper(io.BufferedReader(raw), encoding="locale")
+
+
+class Finder:  # ruff:ignore[too-many-public-methods]
     """Finder for files which might be considered translations."""
 
     def __init__(
         self,
         root: PurePath | str,
         mock: PathMockType | None = None,
+        *,
+        scope: str | None = None,
+        cancel: CancellationToken | None = None,
+        stats: DiscoveryStats | None = None,
     ) -> None:
         if not isinstance(root, PurePath):
             root = Path(root)
         self.root = root
+        self.cancel = cancel
+        # Number of symlinks and excluded entries skipped while listing
+        self.excluded = 0
+        # Directory listed recursively and its parents, listed only shallowly
+        self.scope: str | None = None
+        self.scope_parents: set[str] = set()
+        self.lookups: dict[str, bool] = {}
         if mock is None:
             files: PathListType = []
             dirs: PathListType = []
-            self.list_files(root, files, dirs)
+            # Cancelled listing keeps files listed so far
+            with measure(stats, "scan"), suppress(DiscoveryCancelledError):
+                if scope:
+                    self.scope = scope
+                    self.list_scope(scope, files, dirs)
+                else:
+                    self.list_files(root, files, dirs)
         else:
             files, dirs = mock
+        if stats is not None:
+            stats.count("scan.dirs", len(dirs))
+            stats.count("scan.files", len(files))
+            stats.count("scan.excluded", self.excluded)
+        with measure(stats, "index"):
+            self.build_index(files, dirs)
+
+    def build_index(self, files: PathListType, dirs: PathListType) -> None:
+        """Build lookup structures for the listed files and dirs."""
+        # Results are shared by all backends issuing the same query
+        self.query = lru_cache(maxsize=None)(self._query)
         # For the has_file/has_dir
         self.filenames = {relative_path for absolute, relative, relative_path in files}
         self.dirnames = {relative_path for absolute, relative, relative_path in dirs}
@@ -81,7 +294,7 @@ class Finder:
             lc_convert(relative_path, relative)
             for absolute, relative, relative_path in files
         ]
-        self.lc_files.sort(key=operator.itemgetter(slice(2)))
+        self.lc_files.sort(key=lc_sort_key)
         self.lc_files_by_name: dict[str, list[LowerPathListItem]] = {}
         self.lc_files_by_suffix: dict[str, list[LowerPathListItem]] = {}
         for lc_item in self.lc_files:
@@ -97,7 +310,7 @@ class Finder:
         self.files = [
             (relative_path, relative) for absolute, relative, relative_path in files
         ]
-        self.files.sort(key=operator.itemgetter(0))
+        self.files.sort(key=file_sort_key)
         self.files_by_path = dict(self.files)
         self.files_by_name: dict[str, list[FileMatchItem]] = {}
         self.files_by_suffix: dict[str, list[FileMatchItem]] = {}
@@ -149,29 +362,50 @@ class Finder:
 
         return names, suffixes
 
+    @classmethod
+    def get_mask_scope(cls, mask: str) -> str | None:
+        """Return directory containing all matches of a mask."""
+        parts = []
+        for part in mask.split("/")[:-1]:
+            if cls.has_glob_magic(part):
+                break
+            parts.append(part)
+        return "/".join(parts) or None
+
     def process_path(self, path: PurePath) -> tuple[PurePath, PurePath, str]:
         """Convert path to relative path."""
         relative = path.relative_to(self.root)
         return (path, relative, relative.as_posix())
 
     def list_files(
-        self, root: PurePath, files: PathListType, dirs: PathListType
+        self,
+        root: PurePath,
+        files: PathListType,
+        dirs: PathListType,
+        *,
+        recursive: bool = True,
     ) -> None:
         """
         Recursively list files and dirs in a path.
 
         It skips excluded files.
         """
+        if self.cancel is not None:
+            self.cancel.check()
         with scandir(root) as matches:
             for match in matches:
                 if match.is_symlink():
+                    self.excluded += 1
                     continue
                 is_dir = match.is_dir()
                 path = Path(match.path)
                 if any(path.match(exclude) for exclude in EXCLUDES):
+                    self.excluded += 1
                     continue
                 if is_dir:
                     dirs.append(self.process_path(path))
+                    if not recursive:
+                        continue
                     try:
                         self.list_files(path, files, dirs)
                     except OSError:
@@ -179,16 +413,82 @@ class Finder:
                 else:
                     files.append(self.process_path(path))
 
+    def list_scope(self, scope: str, files: PathListType, dirs: PathListType) -> None:
+        """
+        List files and dirs within a scope directory.
+
+        Parent directories of the scope are listed without recursion, so files
+        placed next to the scope are found as well, together with configuration
+        directories such as Transifex .tx in them.
+        """
+        path = Path(self.root)
+        parent = ""
+        for name in scope.split("/"):
+            self.scope_parents.add(parent)
+            parent = f"{parent}/{name}" if parent else name
+            entries: PathListType = []
+            try:
+                self.list_files(path, files, entries, recursive=False)
+            except OSError:
+                return
+            dirs.extend(entries)
+            for absolute, _relative, relative_path in entries:
+                if absolute.name in SCOPE_CONFIG_DIRS and absolute.name != name:
+                    self.scope_parents.add(relative_path)
+                    with suppress(OSError):
+                        self.list_files(absolute, files, dirs, recursive=False)
+            path /= name
+            if all(entry[0] != path for entry in entries):
+                return
+        try:
+            self.list_files(path, files, dirs)
+        except OSError:
+            return
+
+    def _in_scope(self, name: str) -> bool:
+        """Check whether path would have been listed by the scoped finder."""
+        if self.scope is None or name.startswith(f"{self.scope}/"):
+            return True
+        parent = name.rsplit("/", 1)[0] if "/" in name else ""
+        return parent in self.scope_parents
+
+    def _lookup(self, name: str) -> bool:
+        """Check whether path outside the scope exists and is not excluded."""
+        if name not in self.lookups:
+            path = Path(self.root)
+            found = True
+            for part in name.split("/"):
+                path /= part
+                if path.is_symlink() or any(
+                    path.match(exclude) for exclude in EXCLUDES
+                ):
+                    found = False
+                    break
+            self.lookups[name] = found and path.exists()
+        return self.lookups[name]
+
     def has_file(self, name: str) -> bool:
         """Check whether file exists."""
-        return name in self.filenames
+        track_name(name)
+        if name in self.filenames:
+            return True
+        if self._in_scope(name):
+            return False
+        return self._lookup(name) and Path(self.root, name).is_file()
 
     def has_dir(self, name: str) -> bool:
         """Check whether dir exists."""
-        return name in self.dirnames
+        track_name(name)
+        if name in self.dirnames:
+            return True
+        if self._in_scope(name):
+            return False
+        return self._lookup(name) and Path(self.root, name).is_dir()
 
     def mask_matches(self, mask: str) -> Generator[PurePath]:
         """Return all mask matches."""
+        track_mask(mask)
+        count("mask_matches")
         candidates: tuple[FileMatchItem, ...] | list[FileMatchItem]
         if "*" not in mask:
             match = self.files_by_path.get(mask)
@@ -203,7 +503,7 @@ class Finder:
                 candidates = self.files
 
         # Avoid dealing [ as a special char
-        mask = mask.replace("[", "[[]").replace("?", "[?]")
+        mask = escape_mask(mask)
         for name, path in candidates:
             if fnmatch(name, mask):
                 yield path
@@ -228,30 +528,34 @@ class Finder:
                     candidates[item[2]] = item
 
         result = list(candidates.values())
-        result.sort(key=operator.itemgetter(slice(2)))
+        result.sort(key=lc_sort_key)
         return result
 
+    @classmethod
+    @lru_cache(maxsize=PATTERN_CACHE_SIZE)
+    def plan_masks(
+        cls, masks: tuple[str, ...]
+    ) -> tuple[str, frozenset[str] | None, frozenset[str] | None]:
+        """Return file name pattern and candidate hints for masks."""
+        candidates = cls.mask_candidates(masks)
+        fileglob = "|".join(translate(mask) for mask in masks)
+        if candidates is None:
+            return fileglob, None, None
+        return fileglob, frozenset(candidates[0]), frozenset(candidates[1])
+
     def filter_masks(
         self,
         masks: str | Iterable[str],
         dirglob: str | None = None,
-    ) -> Generator[PurePath]:
+    ) -> tuple[PurePath, ...]:
         """Filter lowercase file names against fnmatch-style masks."""
         masks = (masks,) if isinstance(masks, str) else tuple(masks)
         if not masks:
-            return
-
-        candidates = self.mask_candidates(masks)
-        if candidates is None:
-            candidate_names = candidate_suffixes = None
-        else:
-            candidate_names, candidate_suffixes = candidates
+            return ()
 
-        yield from self.filter_files(
-            "|".join(translate(mask) for mask in masks),
-            dirglob,
-            candidate_names=candidate_names,
-            candidate_suffixes=candidate_suffixes,
+        fileglob, candidate_names, candidate_suffixes = self.plan_masks(masks)
+        return self.cached_query(
+            (fileglob, dirglob or None, candidate_names, candidate_suffixes)
         )
 
     def filter_files(
@@ -261,28 +565,249 @@ class Finder:
         *,
         candidate_names: Iterable[str] | None = None,
         candidate_suffixes: Iterable[str] | None = None,
-    ) -> Generator[PurePath]:
-        """Filter lowercase file names against glob."""
-        fileglob_re = re.compile(fileglob)
-        dirglob_re = re.compile(dirglob) if dirglob else None
-        for directory, filename, path in self.get_lc_candidates(
-            candidate_names,
-            candidate_suffixes,
-        ):
-            if dirglob_re and not dirglob_re.fullmatch(directory):
-                continue
+    ) -> tuple[PurePath, ...]:
+        """
+        Filter lowercase file names against glob.
 
-            if fileglob_re.fullmatch(filename):
-                yield path
+        Results are cached, so the same tuple is returned for the same query.
+        """
+        return self.cached_query(
+            (
+                fileglob,
+                dirglob or None,
+                None
+                if candidate_names is None
+                else frozenset(name.lower() for name in candidate_names),
+                None
+                if candidate_suffixes is None
+                else frozenset(suffix.lower() for suffix in candidate_suffixes),
+            )
+        )
+
+    def cached_query(self, query: QueryKey) -> tuple[PurePath, ...]:
+        """Run the query, reusing results of identical queries."""
+        track_query(query)
+        return self.query(*query)
+
+    def _query(
+        self,
+        fileglob: str,
+        dirglob: str | None,
+        candidate_names: frozenset[str] | None,
+        candidate_suffixes: frozenset[str] | None,
+    ) -> tuple[PurePath, ...]:
+        """Filter lowercase file names against glob without caching."""
+        fileglob_re = compile_pattern(fileglob)
+        dirglob_re = compile_pattern(dirglob) if dirglob else None
+        return tuple(
+            path
+            for directory, filename, path in self.get_lc_candidates(
+                candidate_names,
+                candidate_suffixes,
+            )
+            if (dirglob_re is None or dirglob_re.fullmatch(directory))
+            and fileglob_re.fullmatch(filename)
+        )
+
+    def cache_info(self) -> dict[str, _CacheInfo]:
+        """Return query and pattern cache statistics."""
+        return {
+            "query": self.query.cache_info(),
+            "plan_masks": self.plan_masks.cache_info(),
+            "compile_pattern": compile_pattern.cache_info(),
+        }
+
+    @contextmanager
+    def track(self) -> Generator[FinderAccess]:  # ruff:ignore[no-self-use]
+        """
+        Record paths and queries used within the block.
+
+        Blocks can be nested, usage is recorded in all of them. Recording
+        follows the context, so it is not mixed between threads.
+        """
+        access = FinderAccess()
+        token = ACTIVE_ACCESS.set((*ACTIVE_ACCESS.get(), access))
+        try:
+            yield access
+        finally:
+            ACTIVE_ACCESS.reset(token)
+
+    def update(self, added: PathMockType, removed: PathMockType) -> None:
+        """
+        Update the index with added and removed files and dirs.
+
+        Cached queries and lookups are discarded.
+        """
+        for item in removed[0]:
+            self.remove_file(item[2])
+        for item in added[0]:
+            self.add_file(item)
+        self.dirnames.difference_update(item[2] for item in removed[1])
+        self.dirnames.update(item[2] for item in added[1])
+        self.query.cache_clear()
+        self.lookups.clear()
+
+    def add_file(self, item: PathListItem) -> None:
+        """Add file to the index."""
+        absolute, relative, relative_path = item
+        if relative_path in self.files_by_path:
+            return
+        self.filenames.add(relative_path)
+        self.absolutes[relative_path] = absolute
+        self.files_by_path[relative_path] = relative
+        lc_item = lc_convert(relative_path, relative)
+        insort(self.lc_files, lc_item, key=lc_sort_key)
+        file_item = (relative_path, relative)
+        insort(self.files, file_item, key=file_sort_key)
+        for lc_index, file_index in self.get_index_lists(lc_item, relative_path):
+            insort(lc_index, lc_item, key=lc_sort_key)
+            insort(file_index, file_item, key=file_sort_key)
+
+    def remove_file(self, relative_path: str) -> None:
+        """Remove file from the index."""
+        relative = self.files_by_path.pop(relative_path, None)
+        if relative is None:
+            return
+        self.filenames.discard(relative_path)
+        del self.absolutes[relative_path]
+        lc_item = lc_convert(relative_path, relative)
+        remove_sorted(self.lc_files, lc_item, lc_sort_key)
+        file_item = (relative_path, relative)
+        remove_sorted(self.files, file_item, file_sort_key)
+        for lc_index, file_index in self.get_index_lists(lc_item, relative_path):
+            remove_sorted(lc_index, lc_item, lc_sort_key)
+            remove_sorted(file_index, file_item, file_sort_key)
+
+    def get_index_lists(
+        self, lc_item: LowerPathListItem, relative_path: str
+    ) -> list[tuple[list[LowerPathListItem], list[FileMatchItem]]]:
+        """Return name and suffix index lists containing a file."""
+        result = []
+        lc_filename = lc_item[1]
+        filename = relative_path.rsplit("/", 1)[-1]
+        result.append(
+            (
+                self.lc_files_by_name.setdefault(lc_filename, []),
+                self.files_by_name.setdefault(filename, []),
+            )
+        )
+        if suffix := self.get_suffix(lc_filename):
+            result.append(
+                (
+                    self.lc_files_by_suffix.setdefault(suffix, []),
+                    self.files_by_suffix.setdefault(suffix, []),
+                )
+            )
+        return result
 
     @overload
     def open(self, path: PurePath, mode: OpenTextMode = "r") -> TextIOWrapper: ...
     @overload
     def open(self, path: PurePath, mode: OpenBinaryMode) -> FileIO: ...
     def open(self, path, mode="r"):
-        """Open file from the finder."""
+        """Open file from the finder, accounting it to the active sniff budget."""
+        track_name(path.as_posix())
+        path_obj = self.absolutes[path.as_posix()]
+        if not isinstance(path_obj, Path):
+            msg = "Not a real file"
+            raise TypeError(msg)
+        return open_metered(path_obj, mode, path.as_posix())
+
+    def stat(self, path: PurePath) -> stat_result:
+        """Return file status from the finder."""
+        track_name(path.as_posix())
         path_obj = self.absolutes[path.as_posix()]
         if not isinstance(path_obj, Path):
             msg = "Not a real file"
             raise TypeError(msg)
-        return path_obj.open(mode=mode)
+        return path_obj.stat()
+
+    def fingerprint(
+        self, path: PurePath, block_size: int = FINGERPRINT_BLOCK_SIZE
+    ) -> str:
+        """
+        Return content fingerprint of a file.
+
+        It covers the file size and up to block_size bytes from the start and
+        the end of the file, so files up to twice the block size are hashed
+        completely.
+        """
+        size = self.stat(path).st_size
+        digest = hashlib.blake2b(str(size).encode())
+        with self.open(path, "rb") as handle:
+            digest.update(handle.read(block_size))
+            if size > block_size:
+                handle.seek(max(size - block_size, block_size))
+                digest.update(handle.read(block_size))
+        return digest.hexdigest()
+
+    def iter_chunks(
+        self,
+        path: PurePath,
+        chunk_size: int = SCAN_CHUNK_SIZE,
+        limit: int | None = None,
+    ) -> Generator[bytes]:
+        """Read file in chunks, stopping after limit bytes."""
+        remaining = limit
+        with self.open(path, "rb") as handle:
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = handle.read(size)
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def scan(
+        self,
+        path: PurePath,
+        markers: Sequence[bytes | re.Pattern[bytes]],
+        chunk_size: int = SCAN_CHUNK_SIZE,
+        limit: int | None = None,
+    ) -> int | None:
+        """
+        Scan file for markers and return index of the first one found.
+
+        Earlier markers take precedence and scanning stops as soon as the first
+        marker is found. Byte markers are matched across chunk boundaries,
+        regular expressions are matched against complete lines only.
+        """
+        with closing(self.iter_chunks(path, chunk_size, limit)) as chunks:
+            return scan_chunks(chunks, markers)
+
+    def scan_all(
+        self,
+        path: PurePath,
+        markers: Sequence[bytes | re.Pattern[bytes]],
+        chunk_size: int = SCAN_CHUNK_SIZE,
+        limit: int | None = None,
+    ) -> set[int]:
+        """
+        Scan file for markers and return indexes of all found ones.
+
+        Scanning stops once all markers are found, they are matched the same
+        way as in scan.
+        """
+        found: set[int] = set()
+        pending = [b""] * len(markers)
+        with closing(self.iter_chunks(path, chunk_size, limit)) as chunks:
+            for chunk in chunks:
+                for index, marker in enumerate(markers):
+                    if index in found:
+                        continue
+                    matched, pending[index] = match_marker(
+                        marker, pending[index] + chunk
+                    )
+                    if matched:
+                        found.add(index)
+                if len(found) == len(markers):
+                    return found
+        found.update(
+            index
+            for index, marker in enumerate(markers)
+            if index not in found
+            and isinstance(marker, re.Pattern)
+            and marker.search(pending[index])
+        )
+        return found
@@ -0,0 +1,250 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Timings and counters of discovery phases."""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple, TypedDict, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable, Mapping
+    from contextlib import AbstractContextManager
+    from functools import _CacheInfo
+
+    CacheInfoGetter = Callable[[], Mapping[str, _CacheInfo]]
+
+T = TypeVar("T")
+
+# Phase in progress, collecting its file access
+ACTIVE_STATS: ContextVar[PhaseMeter | None] = ContextVar("active_stats", default=None)
+
+
+class PhaseStats(NamedTuple):
+    """Timing and file access of a phase."""
+
+    name: str
+    calls: int
+    time: float
+    files_opened: int
+    bytes_read: int
+
+
+class SlowFile(NamedTuple):
+    """File which took long to inspect."""
+
+    phase: str
+    path: str
+    time: float
+
+
+class StatsDict(TypedDict):
+    """Serialized discovery statistics."""
+
+    counters: dict[str, int]
+    timings: dict[str, float]
+    calls: dict[str, int]
+    files_opened: dict[str, int]
+    bytes_read: dict[str, int]
+    slow_files: list[SlowFile]
+
+
+class DiscoveryStats:
+    """
+    Timings and counters collected during discovery.
+
+    Phases are named by the backend class and method, for example
+    ``JSONDiscovery.adjust_format``, and the scan and index build of the
+    finder are named ``scan`` and ``index``. Files opened, bytes read and
+    mask matches are counted while a phase is measured.
+
+    With slow_threshold, files inspected for at least the number of seconds
+    are recorded in slow_files. A file is inspected from opening it until
+    the next file is opened or the phase ends, so parsing its content after
+    closing it is included.
+    """
+
+    def __init__(self, *, slow_threshold: float | None = None) -> None:
+        self.slow_threshold = slow_threshold
+        self.counters: Counter[str] = Counter()
+        self.timings: defaultdict[str, float] = defaultdict(float)
+        self.calls: Counter[str] = Counter()
+        self.files_opened: Counter[str] = Counter()
+        self.bytes_read: Counter[str] = Counter()
+        self.slow_files: list[SlowFile] = []
+        self.lock = threading.Lock()
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increase a counter."""
+        with self.lock:
+            self.counters[name] += value
+
+    def charge(self, phase: str, *, files: int = 0, size: int = 0) -> None:
+        """Account file access of a phase."""
+        with self.lock:
+            self.counters["files_opened"] += files
+            self.counters["bytes_read"] += size
+            self.files_opened[phase] += files
+            self.bytes_read[phase] += size
+
+    def trace(self, phase: str, path: str, elapsed: float) -> None:
+        """Record file inspection if it was slow."""
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            with self.lock:
+                self.slow_files.append(SlowFile(phase, path, elapsed))
+
+    @contextmanager
+    def measure(self, name: str, calls: int = 1) -> Generator[None]:
+        """Measure time spent in the block."""
+        meter = PhaseMeter(self, name)
+        token = ACTIVE_STATS.set(meter)
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - started
+            meter.finish_file()
+            ACTIVE_STATS.reset(token)
+            with self.lock:
+                self.timings[name] += elapsed
+                self.calls[name] += calls
+
+    @contextmanager
+    def measure_caches(self, name: str, get_info: CacheInfoGetter) -> Generator[None]:
+        """
+        Count cache hits and misses within the block.
+
+        The caches can be shared with other threads, their lookups made in the
+        meantime are counted as well.
+        """
+        before = get_info()
+        try:
+            yield
+        finally:
+            for cache, info in get_info().items():
+                hits, misses = info.hits, info.misses
+                previous = before.get(cache)
+                # Cleared caches start counting from zero
+                if previous and previous.hits <= hits and previous.misses <= misses:
+                    hits -= previous.hits
+                    misses -= previous.misses
+                self.count(f"{name}.{cache}.hits", hits)
+                self.count(f"{name}.{cache}.misses", misses)
+
+    def measure_iter(self, name: str, items: Iterable[T]) -> Generator[T]:
+        """Yield items, measuring time spent producing them as a single call."""
+        iterator = iter(items)
+        with self.lock:
+            self.calls[name] += 1
+        while True:
+            with self.measure(name, calls=0):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def get_phases(self) -> list[PhaseStats]:
+        """
+        Return statistics of measured phases.
+
+        Phases of a backend are preceded by the backend totals.
+        """
+        with self.lock:
+            phases = [
+                PhaseStats(
+                    name,
+                    self.calls[name],
+                    time,
+                    self.files_opened[name],
+                    self.bytes_read[name],
+                )
+                for name, time in sorted(self.timings.items())
+            ]
+        result: list[PhaseStats] = []
+        backends: dict[str, list[PhaseStats]] = {}
+        for phase in phases:
+            if "." in phase.name:
+                backends.setdefault(phase.name.split(".", 1)[0], []).append(phase)
+            else:
+                result.append(phase)
+        for backend, backend_phases in backends.items():
+            result.append(
+                PhaseStats(
+                    backend,
+                    0,
+                    sum(phase.time for phase in backend_phases),
+                    sum(phase.files_opened for phase in backend_phases),
+                    sum(phase.bytes_read for phase in backend_phases),
+                )
+            )
+            result.extend(backend_phases)
+        return result
+
+    def as_dict(self) -> StatsDict:
+        """Return statistics as a dictionary."""
+        with self.lock:
+            return {
+                "counters": dict(sorted(self.counters.items())),
+                "timings": dict(sorted(self.timings.items())),
+                "calls": dict(sorted(self.calls.items())),
+                "files_opened": dict(sorted(self.files_opened.items())),
+                "bytes_read": dict(sorted(self.bytes_read.items())),
+                "slow_files": list(self.slow_files),
+            }
+
+
+class PhaseMeter:
+    """File access of a phase in progress."""
+
+    def __init__(self, stats: DiscoveryStats, name: str) -> None:
+        self.stats = stats
+        self.name = name
+        self.path: str | None = None
+        self.started = 0.0
+
+    def charge(self, *, files: int = 0, size: int = 0) -> None:
+        """Account file access."""
+        self.stats.charge(self.name, files=files, size=size)
+
+    def opened(self, path: str) -> None:
+        """Start inspecting a file."""
+        if self.stats.slow_threshold is None:
+            return
+        self.finish_file()
+        self.path = path
+        self.started = perf_counter()
+
+    def finish_file(self) -> None:
+        """Finish inspecting the current file."""
+        if self.path is not None:
+            self.stats.trace(self.name, self.path, perf_counter() - self.started)
+            self.path = None
+
+
+def measure(stats: DiscoveryStats | None, name: str) -> AbstractContextManager[None]:
+    """Measure the block when statistics are collected."""
+    if stats is None:
+        return nullcontext()
+    return stats.measure(name)
+
+
+def measure_caches(
+    stats: DiscoveryStats | None, name: str, get_info: CacheInfoGetter
+) -> AbstractContextManager[None]:
+    """Count cache hits and misses within the block when statistics are collected."""
+    if stats is None:
+        return nullcontext()
+    return stats.measure_caches(name, get_info)
+
+
+def count(name: str, value: int = 1) -> None:
+    """Increase a counter of the phase in progress, if it is measured."""
+    if (meter := ACTIVE_STATS.get()) is not None:
+        meter.stats.count(name, value)
@@ -0,0 +1,82 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Asyncio API tests."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import threading
+from typing import TYPE_CHECKING
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from .aio import aiter_discover, discover_async
+from .api import discover
+from .cancel import CancellationToken
+from .discovery.base import BaseDiscovery
+
+if TYPE_CHECKING:
+    from .discovery.result import DiscoveryResult, ResultDict
+
+TEST_DATA = pathlib.Path(__file__).parent / "test_data"
+
+
+class AsyncDiscoveryTest(IsolatedAsyncioTestCase):
+    async def test_discover(self) -> None:
+        self.assertEqual(await discover_async(TEST_DATA), discover(TEST_DATA))
+        self.assertEqual(
+            await discover_async(TEST_DATA, eager=True, concurrency=1),
+            discover(TEST_DATA, eager=True),
+        )
+
+    async def test_iterator(self) -> None:
+        results = [result async for result in aiter_discover(TEST_DATA)]
+        self.assertEqual(
+            sorted(map(repr, results)), sorted(map(repr, discover(TEST_DATA)))
+        )
+
+    async def test_parameters(self) -> None:
+        self.assertEqual(
+            await discover_async(
+                TEST_DATA, hint="locales/*.po", hint_only=True, formats=["po"]
+            ),
+            discover(TEST_DATA, hint="locales/*.po", hint_only=True, formats=["po"]),
+        )
+        with self.assertRaises(ValueError):
+            await discover_async(TEST_DATA, hint_only=True)
+
+    async def test_hint_only_derived_masks(self) -> None:
+        hint = "app/src/res/main/values-*/strings.xml"
+        results = await discover_async(TEST_DATA, hint=hint, hint_only=True)
+        self.assertEqual(results, discover(TEST_DATA, hint=hint, hint_only=True))
+        self.assertIn(
+            "AndroidDiscovery", {result.meta["discovery"] for result in results}
+        )
+
+    async def test_cancel(self) -> None:
+        cancel = CancellationToken(0)
+        self.assertEqual(await discover_async(TEST_DATA, cancel=cancel), [])
+        self.assertTrue(cancel.interrupted)
+
+    async def test_close(self) -> None:
+        original = BaseDiscovery.detect
+        detected = []
+        lock = threading.Lock()
+
+        def detect(
+            discovery: BaseDiscovery, result: ResultDict, *, eager: bool = False
+        ) -> list[DiscoveryResult] | None:
+            with lock:
+                detected.append(result["filemask"])
+            return original(discovery, result, eager=eager)
+
+        with patch.object(BaseDiscovery, "detect", detect):
+            cancel = CancellationToken()
+            iterator = aiter_discover(TEST_DATA, concurrency=1, cancel=cancel)
+            await anext(iterator)
+            await iterator.aclose()
+            await asyncio.sleep(0)
+            self.assertTrue(cancel.cancelled)
+        self.assertLess(len(detected), len(discover(TEST_DATA)))
@@ -3,12 +3,20 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 """High level API tests."""
 
+import json
 import pathlib
+import subprocess  # ruff:ignore[suspicious-subprocess-import]
+import sys
 import tempfile
 from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
 
-from .api import cli, discover
-from .finder import PurePath
+from .api import cli, discover, iter_discover
+from .cancel import CancellationToken
+from .discovery.base import LANGUAGE_CODES, BaseDiscovery
+from .discovery.result import DiscoveryResult, ResultDict
+from .finder import PathMockType, PurePath
 from .test_discovery import DiscoveryTestCase
 
 TEST_DATA = pathlib.Path(__file__).parent / "test_data"
@@ -273,3 +281,260 @@ class APITest(DiscoveryTestCase):
                 },
             ],
         )
+
+    def test_probe_limit(self) -> None:
+        languages = sorted(code for code in LANGUAGE_CODES if len(code) == len("cs"))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            (root / "messages.properties").write_text("key=Value\n", encoding="utf-8")
+            for language in languages[:23]:
+                (root / f"messages_{language}.properties").write_text(
+                    "key=Value\n", encoding="utf-8"
+                )
+            # Not included in the sample of ten files
+            (root / f"messages_{languages[1]}.properties").write_text(
+                "key[one]=Value\n", encoding="utf-8"
+            )
+            self.assertEqual(discover(root)[0]["file_format"], "gwt")
+            self.assertEqual(
+                discover(root, probe_limit=10)[0]["file_format"], "properties"
+            )
+            output = StringIO()
+            cli(output, [root.as_posix()])
+            self.assertIn("gwt", output.getvalue())
+            with self.assertRaises(ValueError):
+                discover(root, probe_limit=0)
+            with self.assertRaises(SystemExit):
+                cli(StringIO(), ["--probe-limit", "0", root.as_posix()])
+
+    def test_hint_only(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            for name in (
+                "po/cs/app.po",
+                "po/de/app.po",
+                "pot/app.pot",
+                "other/cs.po",
+                "locales/cs.json",
+            ):
+                (root / name).parent.mkdir(parents=True, exist_ok=True)
+                (root / name).write_text("{}", encoding="utf-8")
+            hint = "po/*/app.po"
+
+            expected = [
+                result
+                for result in discover(root, hint=hint)
+                if result["filemask"] == hint
+            ]
+            results = discover(root, hint=hint, hint_only=True)
+            output = StringIO()
+            cli(output, ["--hint", hint, "--hint-only", root.as_posix()])
+
+        self.assertEqual(results, expected)
+        self.assert_discovery(
+            results,
+            [{"filemask": hint, "new_base": "pot/app.pot", "file_format": "po"}],
+        )
+        self.assertNotIn("locales", output.getvalue())
+        with self.assertRaises(ValueError):
+            discover(root, hint_only=True)
+
+    def test_hint_only_derived_masks(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            for name in (
+                "app/src/res/main/values/strings.xml",
+                "app/src/res/main/values-cs/strings.xml",
+                "app/src/res/main/values-de/strings.xml",
+                "other/values/strings.xml",
+                "locales/cs.json",
+            ):
+                (root / name).parent.mkdir(parents=True, exist_ok=True)
+                (root / name).write_text("<resources/>", encoding="utf-8")
+            (root / ".tx").mkdir()
+            (root / ".tx" / "config").write_text(
+                "[main]\n\n[app.strings]\n"
+                "file_filter = app/src/res/main/values-<lang>/strings.xml\n"
+                "source_file = app/src/res/main/values/strings.xml\n"
+                "type = ANDROID\n",
+                encoding="utf-8",
+            )
+            hint = "app/src/res/main/values-*/strings.xml"
+
+            expected = [
+                result
+                for result in discover(root, hint=hint)
+                if result["filemask"] == hint
+            ]
+            results = discover(root, hint=hint, hint_only=True)
+
+        self.assertEqual(results, expected)
+        discoveries = {result.meta["discovery"] for result in results}
+        self.assertIn("AndroidDiscovery", discoveries)
+        self.assertIn("TransifexDiscovery", discoveries)
+
+    def test_backend_selection(self) -> None:
+        paths = ["locales/cs.po", "locales/de.po", "locales/cs.json", "res/cs.ts"]
+        mock: PathMockType = (
+            [(PurePath(path), PurePath(path), path) for path in paths],
+            [],
+        )
+        full = discover(PurePath("."), mock=mock)
+
+        self.assertEqual(
+            discover(PurePath("."), mock=mock, formats=["po", "json-nested"]),
+            [result for result in full if result["file_format"] != "ts"],
+        )
+        self.assertEqual(
+            discover(PurePath("."), mock=mock, backends=["QtDiscovery"]),
+            [result for result in full if result["file_format"] == "ts"],
+        )
+        self.assertEqual(len(discover(PurePath("."), mock=mock, limit=1)), 1)
+        with self.assertRaises(ValueError):
+            discover(PurePath("."), mock=mock, limit=-1)
+        self.assertEqual(sorted(iter_discover(PurePath("."), mock=mock)), full)
+        with self.assertRaises(ValueError):
+            discover(PurePath("."), mock=mock, backends=["Missing"])
+
+    def test_cli_backend_selection(self) -> None:
+        output = StringIO()
+        cli(output, ["--file-format", "po", "--limit", "1", TEST_DATA.as_posix()])
+        self.assertIn("Match 1", output.getvalue())
+        self.assertNotIn("Match 2", output.getvalue())
+        self.assertIn("file_format    : po", output.getvalue())
+        with self.assertRaises(SystemExit):
+            cli(StringIO(), ["--backend", "Missing", TEST_DATA.as_posix()])
+        with self.assertRaises(SystemExit):
+            cli(StringIO(), ["--limit", "-1", TEST_DATA.as_posix()])
+        # Errors during discovery are not usage errors
+        with (
+            patch.object(BaseDiscovery, "discover", side_effect=ValueError("broken")),
+            self.assertRaisesRegex(ValueError, "broken"),
+        ):
+            cli(StringIO(), [TEST_DATA.as_posix()])
+
+    def test_skip_claimed(self) -> None:
+        full = discover(TEST_DATA)
+        results = discover(TEST_DATA, skip_claimed=True)
+
+        skipped = [result for result in full if result not in results]
+        self.assertEqual(
+            [(result["filemask"], result.meta["discovery"]) for result in skipped],
+            [
+                ("app/src/res/main/values-*/strings.xml", "AndroidDiscovery"),
+                ("locales/*.po", "GettextDiscovery"),
+            ],
+        )
+        self.assertEqual(
+            {result["filemask"] for result in results},
+            {result["filemask"] for result in full},
+        )
+
+    def test_cancel(self) -> None:
+        full = discover(TEST_DATA)
+        cancel = CancellationToken()
+        original = BaseDiscovery.sniff_format
+        sniffed: list[str] = []
+
+        def sniff_format(discovery: BaseDiscovery, result: ResultDict) -> None:
+            if not sniffed:
+                cancel.cancel()
+            sniffed.append(result["filemask"])
+            original(discovery, result)
+
+        with patch.object(BaseDiscovery, "sniff_format", sniff_format):
+            results = discover(TEST_DATA, cancel=cancel)
+        self.assertEqual(len(sniffed), 1)
+        self.assertTrue(results)
+        self.assertLess(len(results), len(full))
+        for result in results:
+            self.assertTrue(result.meta.pop("incomplete"))
+            self.assertIn(result, full)
+
+        self.assertEqual(discover(TEST_DATA, cancel=CancellationToken(60)), full)
+        cancel = CancellationToken(0)
+        self.assertEqual(discover(TEST_DATA, cancel=cancel), [])
+        self.assertTrue(cancel.interrupted)
+
+    def test_cli_timeout(self) -> None:
+        output = StringIO()
+        cli(output, ["--timeout", "0", TEST_DATA.as_posix()])
+        self.assertEqual(output.getvalue(), "")
+
+
+class FlushRecorder(StringIO):
+    """Output recording number of lines written at each flush."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.flushed: list[int] = []
+
+    def flush(self) -> None:
+        """Record number of lines written."""
+        super().flush()
+        self.flushed.append(self.getvalue().count("\n"))
+
+
+class CLIFormatTest(TestCase):
+    def test_json(self) -> None:
+        output = StringIO()
+        cli(output, ["--format", "json", TEST_DATA.as_posix()])
+        data = json.loads(output.getvalue())
+        results = discover(TEST_DATA)
+        self.assertEqual(data["count"], len(results))
+        self.assertFalse(data["incomplete"])
+        self.assertNotIn("stats", data)
+        self.assertEqual(
+            data["results"],
+            [{"match": item.match, "meta": item.meta} for item in results],
+        )
+
+    def test_json_stats(self) -> None:
+        output = StringIO()
+        cli(output, ["--format", "json", "--stats", TEST_DATA.as_posix()])
+        data = json.loads(output.getvalue())
+        self.assertIn("scan", data["stats"]["timings"])
+
+    def test_ndjson(self) -> None:
+        output = FlushRecorder()
+        cli(output, ["--format", "ndjson", TEST_DATA.as_posix()])
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        results = discover(TEST_DATA)
+        self.assertEqual(
+            lines[-1], {"done": True, "count": len(results), "incomplete": False}
+        )
+        streamed = []
+        for line in lines[:-1]:
+            result = DiscoveryResult(line["match"])
+            result.meta = line["meta"]
+            streamed.append(result)
+        self.assertEqual(sorted(streamed), results)
+        # Each result is flushed as soon as it is found
+        self.assertEqual(output.flushed, list(range(1, len(lines) + 1)))
+
+    def test_ndjson_timeout(self) -> None:
+        output = StringIO()
+        cli(output, ["--format", "ndjson", "--timeout", "0", TEST_DATA.as_posix()])
+        self.assertEqual(
+            json.loads(output.getvalue()),
+            {"done": True, "count": 0, "incomplete": True},
+        )
+
+
+class ImportTest(TestCase):
+    def test_lazy_imports(self) -> None:
+        code = (
+            "import sys, translation_finder; "
+            "print(sorted(set(sys.argv[1:]) & sys.modules.keys())); "
+            "translation_finder.discover_async; "
+            "print('asyncio' in sys.modules)"
+        )
+        modules = ["asyncio", "cProfile", "sqlite3", "translation_finder.client"]
+        output = subprocess.run(  # ruff:ignore[subprocess-without-shell-equals-true]
+            [sys.executable, "-c", code, *modules],
+            capture_output=True,
+            check=True,
+            cwd=pathlib.Path(__file__).parent.parent,
+            text=True,
+        )
+        self.assertEqual(output.stdout.splitlines(), ["[]", "True"])
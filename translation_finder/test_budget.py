@@ -0,0 +1,87 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Sniffing budget tests."""
+
+from __future__ import annotations
+
+from io import StringIO
+from typing import TYPE_CHECKING
+from unittest import TestCase
+
+from .api import cli, discover
+from .budget import BudgetExhaustedError, SniffBudget
+from .discovery.base import BaseDiscovery
+from .finder import Finder, PurePath
+from .test_api import TEST_DATA
+
+if TYPE_CHECKING:
+    from .discovery.result import ResultDict
+
+
+class SniffBudgetTest(TestCase):
+    def test_unlimited(self) -> None:
+        budget = SniffBudget()
+        self.assertEqual(discover(TEST_DATA, budget=budget), discover(TEST_DATA))
+        self.assertGreater(budget.files_opened, 0)
+        self.assertGreater(budget.bytes_read, 0)
+        self.assertGreater(budget.parse_time, 0)
+        self.assertFalse(budget.exhausted)
+
+    def test_exhausted(self) -> None:
+        budget = SniffBudget(max_files=0)
+        results = discover(TEST_DATA, budget=budget)
+        self.assertEqual(budget.files_opened, 0)
+        self.assertEqual(len(results), len(discover(TEST_DATA)))
+        unsniffed = {
+            result["filemask"]: result["file_format"]
+            for result in results
+            if result.meta.get("sniffed") is False
+        }
+        self.assertEqual(unsniffed["json/go-*.json"], "json-nested")
+        self.assertEqual(unsniffed["xliff/*.poxliff"], "xliff")
+        self.assertEqual(unsniffed["laravel/*.php"], "php")
+        # Gettext detection does not inspect the content
+        self.assertNotIn("locales/*.po", unsniffed)
+
+    def test_run_out(self) -> None:
+        budget = SniffBudget(max_bytes=1)
+        results = discover(TEST_DATA, budget=budget)
+        self.assertEqual(budget.files_opened, 1)
+        self.assertTrue(budget.exhausted)
+        self.assertEqual(len(results), len(discover(TEST_DATA)))
+        for result in results:
+            if result.meta.get("sniffed") is False:
+                self.assertNotIn("probed", result.meta)
+
+    def test_run_out_restores_nested(self) -> None:
+        class PartialDiscovery(BaseDiscovery):
+            def adjust_format(self, result: ResultDict) -> None:  # ruff:ignore[no-self-use]
+                result["file_format_params"]["properties_encoding"] = "utf-16"
+                raise BudgetExhaustedError
+
+        discovery = PartialDiscovery(Finder(PurePath("."), mock=([], [])))
+        result: ResultDict = {
+            "filemask": "*.properties",
+            "file_format_params": {"properties_encoding": "utf-8"},
+        }
+        discovery.sniff_format_within_budget(result)
+        self.assertEqual(
+            result,
+            {
+                "filemask": "*.properties",
+                "file_format_params": {"properties_encoding": "utf-8"},
+            },
+        )
+
+    def test_spend(self) -> None:
+        budget = SniffBudget(max_time=0)
+        self.assertTrue(budget.exhausted)
+        with self.assertRaises(BudgetExhaustedError), budget.spend():
+            pass
+
+    def test_cli(self) -> None:
+        output = StringIO()
+        cli(output, ["--max-sniff-files", "0", TEST_DATA.as_posix()])
+        self.assertIn("json/go-*.json", output.getvalue())
+        self.assertNotIn("go-i18n-json", output.getvalue())
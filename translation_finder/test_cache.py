@@ -0,0 +1,188 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Format detection cache tests."""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import shutil
+import tempfile
+from io import StringIO
+from typing import TYPE_CHECKING
+from unittest import TestCase
+from unittest.mock import patch
+
+from . import cache as cache_module
+from .api import cli, discover
+from .cache import SniffCache, SniffDedup
+from .discovery.base import LANGUAGE_CODES
+from .discovery.files import JavaDiscovery, XliffDiscovery
+from .finder import Finder
+
+if TYPE_CHECKING:
+    from .discovery.result import ResultDict
+
+
+class SniffCacheTest(TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = pathlib.Path(tmpdir.name)
+        (self.root / "locales").mkdir()
+        for language in ("en", "cs"):
+            (self.root / "locales" / f"{language}.xliff").write_text(
+                '<xliff version="2.0"><file/></xliff>', encoding="utf-8"
+            )
+        self.database = self.root / "cache.sqlite"
+
+    def discover(self, cache: SniffCache) -> list[dict[str, str]]:
+        return [dict(result) for result in discover(self.root, cache=cache)]
+
+    def test_warm_discovery(self) -> None:
+        with SniffCache(self.database) as cache:
+            expected = self.discover(cache)
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        with (
+            SniffCache(self.database) as cache,
+            patch.object(XliffDiscovery, "adjust_format", side_effect=AssertionError),
+        ):
+            self.assertEqual(self.discover(cache), expected)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+        self.assertEqual(expected[0]["file_format"], "xliff2")
+
+    def test_changed_file(self) -> None:
+        with SniffCache(self.database) as cache:
+            self.discover(cache)
+            (self.root / "locales" / "cs.xliff").write_text(
+                "<xliff><file/></xliff>", encoding="utf-8"
+            )
+            self.discover(cache)
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_rules_version(self) -> None:
+        with SniffCache(self.database) as cache:
+            self.discover(cache)
+            self.assertEqual(len(cache), 1)
+
+        with (
+            patch.object(cache_module, "SNIFF_RULES_VERSION", 0),
+            SniffCache(self.database) as cache,
+        ):
+            self.assertEqual(len(cache), 0)
+
+    def test_eviction(self) -> None:
+        with SniffCache(self.database, max_entries=2) as cache:
+            for name in ("first", "second", "third"):
+                cache.set(name, [], {"result": {"filemask": name}, "probed": 0})
+            self.assertEqual(len(cache), 2)
+            self.assertIsNone(cache.get("first", []))
+            self.assertEqual(
+                cache.get("third", []), {"result": {"filemask": "third"}, "probed": 0}
+            )
+
+    def test_probe_limit(self) -> None:
+        languages = sorted(code for code in LANGUAGE_CODES if len(code) == len("cs"))
+        (self.root / "messages.properties").write_text("key=Value\n", encoding="utf-8")
+        for language in languages[:23]:
+            (self.root / f"messages_{language}.properties").write_text(
+                "key=Value\n", encoding="utf-8"
+            )
+        # Not included in the sample of ten files
+        (self.root / f"messages_{languages[1]}.properties").write_text(
+            "key[one]=Value\n", encoding="utf-8"
+        )
+
+        def get_format(cache: SniffCache, probe_limit: int | None) -> str:
+            results = discover(
+                self.root, cache=cache, probe_limit=probe_limit, formats=["properties"]
+            )
+            return results[0]["file_format"]
+
+        with SniffCache(self.database) as cache:
+            self.assertEqual(get_format(cache, 10), "properties")
+            self.assertEqual(get_format(cache, None), "gwt")
+            self.assertEqual(get_format(cache, 10), "properties")
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_root(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            other = pathlib.Path(tmpdir)
+            shutil.copytree(self.root / "locales", other / "locales")
+            with SniffCache(self.database) as cache:
+                self.discover(cache)
+                discover(other, cache=cache)
+                self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_cli(self) -> None:
+        output = StringIO()
+        cli(output, ["--cache", self.database.as_posix(), self.root.as_posix()])
+        with SniffCache(self.database) as cache:
+            self.assertEqual(len(cache), 1)
+        self.assertIn("xliff2", output.getvalue())
+
+
+class SniffDedupTest(TestCase):
+    def test_identical_templates(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            contents = {
+                "first": {"key": "{{count}} items"},
+                "second": {"key": "{{count}} items"},
+                "third": {"key": "{{count}} items"},
+                "other": {"message": {"message": "Hello", "description": "Text"}},
+            }
+            for module, content in contents.items():
+                (root / module / "locales").mkdir(parents=True)
+                for language in ("en", "cs"):
+                    (root / module / "locales" / f"{language}.json").write_text(
+                        json.dumps(content), encoding="utf-8"
+                    )
+            dedup = SniffDedup()
+
+            results = discover(root, dedup=dedup)
+
+        self.assertEqual(
+            {result["filemask"]: result["file_format"] for result in results},
+            {
+                "first/locales/*.json": "i18next",
+                "second/locales/*.json": "i18next",
+                "third/locales/*.json": "i18next",
+                "other/locales/*.json": "webextension",
+            },
+        )
+        self.assertEqual((dedup.hits, dedup.lookups), (2, 4))
+        self.assertEqual(dedup.ratio, 0.5)
+
+    def test_nested_changes(self) -> None:
+        class TemplateJavaDiscovery(JavaDiscovery):
+            sniffs_template = True
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            for module in ("first", "second"):
+                (root / module).mkdir()
+                (root / module / "messages.properties").write_text(
+                    "key=Hodnota žluťoučká\n", encoding="utf-16"
+                )
+            dedup = SniffDedup()
+            discovery = TemplateJavaDiscovery(Finder(root), dedup=dedup)
+            results: list[ResultDict] = []
+            for module in ("first", "second"):
+                result: ResultDict = {
+                    "filemask": f"{module}/messages_*.properties",
+                    "template": f"{module}/messages.properties",
+                    "file_format": "properties",
+                    "file_format_params": {"properties_encoding": "iso-8859-1"},
+                }
+                discovery.sniff_format(result)
+                results.append(result)
+
+        self.assertEqual(dedup.hits, 1)
+        self.assertEqual(
+            [result["file_format_params"] for result in results],
+            [{"properties_encoding": "utf-16"}] * 2,
+        )
@@ -0,0 +1,315 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Discovery daemon tests."""
+
+from __future__ import annotations
+
+import errno
+import json
+import os
+import pathlib
+import socket
+import stat
+import tempfile
+import threading
+import time
+from io import StringIO
+from typing import TYPE_CHECKING, cast
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from .api import cli, discover
+from .client import (
+    DaemonBusyError,
+    DaemonError,
+    DaemonFileError,
+    request_discovery,
+)
+from .test_api import FlushRecorder
+
+# The daemon listens on a Unix socket, which is not available on Windows
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+if HAS_UNIX_SOCKETS:
+    from .daemon import (
+        DiscoveryHandler,
+        DiscoveryServer,
+        SnapshotStore,
+        parse_request,
+    )
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from .cancel import CancellationToken
+    from .client import DiscoveryRequest
+
+    # Discovery messages yielded by the handler
+    Messages = Iterator[dict[str, object]]
+
+
+@skipUnless(HAS_UNIX_SOCKETS, "Unix sockets are not supported")
+class DaemonTestCase(TestCase):
+    def setUp(self) -> None:
+        # Unix socket paths are limited in length, keep them short
+        tmpdir = tempfile.TemporaryDirectory(dir="/tmp")
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = pathlib.Path(tmpdir.name)
+        self.root = self.tmpdir / "repo"
+        (self.root / "locales").mkdir(parents=True)
+        for language in ("en", "cs", "de"):
+            (self.root / "locales" / f"{language}.po").write_text("", encoding="utf-8")
+        self.socket = self.tmpdir / "daemon.sock"
+
+    def start(self, *, workers: int = 2, queue_size: int = 2) -> DiscoveryServer:
+        server = DiscoveryServer(self.socket, workers=workers, queue_size=queue_size)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop() -> None:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+        self.addCleanup(stop)
+        return server
+
+
+class DaemonTest(DaemonTestCase):
+    def test_discovery(self) -> None:
+        server = self.start()
+        request: DiscoveryRequest = {"root": self.root.as_posix()}
+        self.assertEqual(request_discovery(self.socket, request), discover(self.root))
+        self.assertEqual(request_discovery(self.socket, request), discover(self.root))
+        self.assertEqual((server.snapshots.hits, server.snapshots.misses), (1, 1))
+
+    def test_refresh(self) -> None:
+        server = self.start()
+        root = self.root.as_posix()
+        request_discovery(self.socket, {"root": root})
+        (self.root / "locales" / "fr.po").write_text("", encoding="utf-8")
+        self.assertEqual(
+            request_discovery(self.socket, {"root": root, "refresh": True}),
+            discover(self.root),
+        )
+        self.assertEqual((server.snapshots.hits, server.snapshots.misses), (0, 2))
+
+    def test_changed(self) -> None:
+        server = self.start()
+        request: DiscoveryRequest = {"root": self.root.as_posix()}
+        request_discovery(self.socket, request)
+        (self.root / "locales" / "fr.po").write_text("", encoding="utf-8")
+        self.assertEqual(request_discovery(self.socket, request), discover(self.root))
+        (self.root / "locales" / "fr.po").unlink()
+        self.assertEqual(request_discovery(self.socket, request), discover(self.root))
+        self.assertEqual((server.snapshots.hits, server.snapshots.misses), (0, 3))
+
+    def test_limit(self) -> None:
+        self.start()
+        request: DiscoveryRequest = {
+            "root": self.root.as_posix(),
+            "backends": ["GettextDiscovery"],
+            "limit": 1,
+        }
+        self.assertEqual(len(request_discovery(self.socket, request)), 1)
+
+    def test_timeout(self) -> None:
+        self.start()
+        request: DiscoveryRequest = {"root": self.root.as_posix(), "timeout": 0}
+        self.assertEqual(request_discovery(self.socket, request), [])
+        request["timeout"] = 60
+        results = request_discovery(self.socket, request)
+        self.assertEqual(results, discover(self.root))
+
+    def test_invalid(self) -> None:
+        self.start()
+        with self.assertRaisesRegex(DaemonError, "absolute"):
+            request_discovery(self.socket, {"root": "repo"})
+        with self.assertRaisesRegex(DaemonError, "Unknown request parameter"):
+            request_discovery(
+                self.socket,
+                cast("DiscoveryRequest", {"root": self.root.as_posix(), "mask": "*"}),
+            )
+
+    def test_busy(self) -> None:
+        self.start(workers=1, queue_size=0)
+        blocking = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(blocking.close)
+        # The connection occupies the only worker until it sends a request
+        blocking.connect(str(self.socket))
+        with self.assertRaises(DaemonBusyError):
+            for _attempt in range(100):
+                request_discovery(self.socket, {"root": self.root.as_posix()})
+
+    def test_parse_request(self) -> None:
+        self.assertEqual(parse_request(b'{"root": "/srv"}'), {"root": "/srv"})
+        with self.assertRaisesRegex(ValueError, "Invalid request parameter: eager"):
+            parse_request(b'{"root": "/srv", "eager": 1}')
+        with self.assertRaisesRegex(ValueError, "Invalid request parameter: formats"):
+            parse_request(b'{"root": "/srv", "formats": [1]}')
+        with self.assertRaisesRegex(ValueError, "negative"):
+            parse_request(b'{"root": "/srv", "limit": -1}')
+        with self.assertRaisesRegex(ValueError, "Invalid request"):
+            parse_request(b"root")
+
+    def test_snapshot_eviction(self) -> None:
+        snapshots = SnapshotStore(max_entries=1)
+        first = snapshots.get(self.root.as_posix())
+        snapshots.get(self.tmpdir.as_posix())
+        self.assertIsNot(snapshots.get(self.root.as_posix()), first)
+        self.assertEqual((snapshots.hits, snapshots.misses), (0, 3))
+
+    def test_socket_mode(self) -> None:
+        self.start()
+        self.assertEqual(stat.S_IMODE(self.socket.stat().st_mode), 0o600)
+
+    def test_socket_mode_custom(self) -> None:
+        with DiscoveryServer(self.socket, mode=0o660):
+            self.assertEqual(stat.S_IMODE(self.socket.stat().st_mode), 0o660)
+
+    def test_stale_socket(self) -> None:
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(self.socket))
+        stale.close()
+        self.start()
+        with self.assertRaises(FileExistsError):
+            DiscoveryServer(self.socket)
+
+
+class DaemonCliTest(DaemonTestCase):
+    def test_cli(self) -> None:
+        self.start()
+        output = StringIO()
+        cli(output, ["--socket", self.socket.as_posix(), self.root.as_posix()])
+        expected = StringIO()
+        cli(expected, [self.root.as_posix()])
+        self.assertEqual(output.getvalue(), expected.getvalue())
+
+    def test_cli_ndjson(self) -> None:
+        self.start()
+        output = StringIO()
+        cli(
+            output,
+            [
+                "--format",
+                "ndjson",
+                "--socket",
+                self.socket.as_posix(),
+                self.root.as_posix(),
+            ],
+        )
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), len(discover(self.root)) + 1)
+        self.assertIn('"done": true', lines[-1])
+
+    def test_cli_refresh(self) -> None:
+        server = self.start()
+        args = ["--socket", self.socket.as_posix(), self.root.as_posix()]
+        cli(StringIO(), args)
+        cli(StringIO(), ["--refresh", *args])
+        self.assertEqual((server.snapshots.hits, server.snapshots.misses), (0, 2))
+
+    def test_cli_file_error(self) -> None:
+        self.start()
+        resources = self.root / "res"
+        resources.mkdir()
+        for suffix in ("", "_cs", "_de"):
+            (resources / f"messages{suffix}.properties").write_text(
+                "key=value\n", encoding="utf-8"
+            )
+        args = ["--socket", self.socket.as_posix(), self.root.as_posix()]
+        cli(StringIO(), args)
+        # Removal is not visible in the directory modification time, so the
+        # daemon reuses the listing and fails to open the file
+        status = resources.stat()
+        (resources / "messages_cs.properties").unlink()
+        os.utime(resources, ns=(status.st_atime_ns, status.st_mtime_ns))
+        with self.assertRaises(DaemonFileError):
+            request_discovery(self.socket, {"root": self.root.as_posix()})
+        output = StringIO()
+        cli(output, args)
+        expected = StringIO()
+        cli(expected, [self.root.as_posix()])
+        self.assertEqual(output.getvalue(), expected.getvalue())
+
+    def test_cli_ndjson_stream(self) -> None:
+        self.start()
+        output = FlushRecorder()
+        waited: list[bool] = []
+        iter_results = DiscoveryHandler.iter_results
+
+        def iter_slowly(
+            handler: DiscoveryHandler,
+            request: DiscoveryRequest,
+            cancel: CancellationToken,
+        ) -> Messages:
+            for message in iter_results(handler, request, cancel):
+                yield message
+                if not waited:
+                    # Continue once the client has written the first result
+                    handler.wfile.flush()
+                    for _attempt in range(100):
+                        if output.flushed:
+                            break
+                        time.sleep(0.01)
+                    waited.append(bool(output.flushed))
+
+        with patch.object(DiscoveryHandler, "iter_results", iter_slowly):
+            cli(
+                output,
+                [
+                    "--format",
+                    "ndjson",
+                    "--socket",
+                    self.socket.as_posix(),
+                    self.root.as_posix(),
+                ],
+            )
+        self.assertEqual(waited, [True])
+        self.assertEqual(output.flushed[-1], len(discover(self.root)) + 1)
+
+    def test_cli_ndjson_fallback(self) -> None:
+        self.start()
+        iter_results = DiscoveryHandler.iter_results
+
+        def iter_failing(
+            handler: DiscoveryHandler,
+            request: DiscoveryRequest,
+            cancel: CancellationToken,
+        ) -> Messages:
+            yield next(iter_results(handler, request, cancel))
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory")
+
+        output = StringIO()
+        with patch.object(DiscoveryHandler, "iter_results", iter_failing):
+            cli(
+                output,
+                [
+                    "--format",
+                    "ndjson",
+                    "--socket",
+                    self.socket.as_posix(),
+                    self.root.as_posix(),
+                ],
+            )
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        results = discover(self.root)
+        self.assertEqual(
+            lines[-1], {"done": True, "count": len(results), "incomplete": False}
+        )
+        self.assertEqual(
+            sorted(line["match"]["filemask"] for line in lines[:-1]),
+            sorted(result["filemask"] for result in results),
+        )
+
+    def test_cli_fallback(self) -> None:
+        output = StringIO()
+        cli(output, ["--socket", self.socket.as_posix(), self.root.as_posix()])
+        self.assertIn("locales/*.po", output.getvalue())
+
+
+class SocketSupportTest(TestCase):
+    def test_cli_unsupported(self) -> None:
+        with patch.dict(socket.__dict__), self.assertRaises(SystemExit):
+            socket.__dict__.pop("AF_UNIX", None)
+            cli(StringIO(), ["--socket", "daemon.sock", "."])
@@ -47,6 +47,7 @@ from .discovery.files import (
     MOKODiscovery,
     OSXDiscovery,
     PHPDiscovery,
+    PropertiesMarker,
     QtDiscovery,
     RCDiscovery,
     ResourceDictionaryDiscovery,
@@ -110,6 +111,47 @@ class DiscoveryBaseTest(DiscoveryTestCase):
         discovery.fill_in_template(result, "cs")
         self.assertEqual(result["template"], "locale/cs.json")
 
+    def test_classifier_cache(self) -> None:
+        classifier = base_module.TokenClassifier()
+        with patch.object(base_module, "CLASSIFIER", classifier):
+            self.assertEqual(classifier.hit_rate, 0.0)
+            discovery = JSONDiscovery(
+                self.get_finder(
+                    [f"locale/{code}/app/strings.json" for code in ("cs", "de", "en")]
+                )
+            )
+            list(discovery.discover())
+
+        info = classifier.cache_info()
+        self.assertEqual(info["get_wildcard"].misses, 6)
+        self.assertEqual(info["get_wildcard"].hits, 6)
+        self.assertGreater(classifier.hit_rate, 0)
+        self.assertEqual(
+            classifier.get_wildcard("strings-pt-BR.json"), "strings-*.json"
+        )
+
+    def test_path_shape_grouping(self) -> None:
+        paths = [
+            "locale/cs/LC_MESSAGES/django.po",
+            "locale/de/LC_MESSAGES/django.po",
+            "locale/de/LC_MESSAGES/djangojs.po",
+            "po/cs/cs.po",
+            "po/de/messages-de.po",
+            "po/pt_BR/pt_BR.po",
+        ]
+        discovery = GettextDiscovery(self.get_finder(paths))
+        masks = [result["filemask"] for result in discovery.get_masks()]
+        expected: list[str] = []
+        for path in discovery.filter_files():
+            parts = list(path.parts)
+            wildcards = [discovery.get_wildcard(part) for part in parts]
+            expected.extend(
+                result["filemask"]
+                for result in discovery.get_path_masks(parts, wildcards)
+            )
+        self.assertEqual(list(dict.fromkeys(masks)), list(dict.fromkeys(expected)))
+        self.assertEqual(masks.count("locale/*/LC_MESSAGES/django.po"), 1)
+
     def test_hint_without_matching_mask(self) -> None:
         discovery = JSONDiscovery(self.get_finder([]))
         self.assertEqual(list(discovery.get_masks(hint="messages.po")), [])
@@ -877,6 +919,30 @@ class AndroidTest(DiscoveryTestCase):
                 ],
             )
 
+    def test_plural_after_undeclared_entity(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            (tmppath / "res/values").mkdir(parents=True)
+            (tmppath / "res/values-cs").mkdir(parents=True)
+            content = (
+                '<resources><string name="title">a&nbsp;b</string>'
+                '<plural name="items"></plural></resources>'
+            )
+            (tmppath / "res/values/strings.xml").write_text(content)
+            (tmppath / "res/values-cs/strings.xml").write_text(content)
+
+            discovery = AndroidDiscovery(Finder(tmppath))
+            self.assert_discovery(
+                discovery.discover(),
+                [
+                    {
+                        "filemask": "res/values-*/strings.xml",
+                        "template": "res/values/strings.xml",
+                        "file_format": "moko-resource",
+                    },
+                ],
+            )
+
 
 class MOKOTest(DiscoveryTestCase):
     def test_basic(self) -> None:
@@ -1113,6 +1179,42 @@ class JavaTest(DiscoveryTestCase):
                     ],
                 )
 
+    def test_scan_markers(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            files = {
+                "plain.properties": b"key=value\n",
+                "gwt.properties": b"\xef\xbb\xbfkey[one]=value\n",
+                "comment.properties": b"\xef\xbb\xbf# key[one]=value\n",
+                "xwiki.properties": b"key[one]=value\n# XWiki\n",
+                "utf16.properties": "key[one]=value\n".encode("utf-16"),
+                "utf16be.properties": "\ufeff# XWiki\n".encode("utf-16-be"),
+            }
+            for name, content in files.items():
+                (tmppath / name).write_bytes(content)
+            finder = Finder(tmppath)
+            discovery = JavaDiscovery(finder)
+
+            with patch.object(finder, "open", wraps=finder.open) as opened:
+                markers = {
+                    name: discovery.scan_markers(next(finder.mask_matches(name)))
+                    for name in files
+                }
+
+        self.assertEqual(
+            markers,
+            {
+                "plain.properties": PropertiesMarker.NONE,
+                "gwt.properties": PropertiesMarker.GWT,
+                "comment.properties": PropertiesMarker.NONE,
+                "xwiki.properties": PropertiesMarker.XWIKI,
+                "utf16.properties": PropertiesMarker.GWT,
+                "utf16be.properties": PropertiesMarker.XWIKI,
+            },
+        )
+        # Byte order mark is detected from the scanned content
+        self.assertEqual(opened.call_count, len(files))
+
 
 class JoomlaTest(DiscoveryTestCase):
     def test_basic(self) -> None:
@@ -1253,6 +1355,26 @@ class XliffTest(DiscoveryTestCase):
             ],
         )
 
+    def test_undeclared_entity(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            content = (
+                '<xliff version="1.2"><file><body><trans-unit id="1">'
+                '<source>a&nbsp;b <x id="1"/></source>'
+                "</trans-unit></body></file></xliff>"
+            )
+            (tmppath / "en.xliff").write_text(content, encoding="utf-8")
+            discovery = XliffDiscovery(Finder(tmppath))
+            result: ResultDict = {
+                "filemask": "*.xliff",
+                "file_format": "xliff",
+                "template": "en.xliff",
+            }
+
+            discovery.adjust_format(result)
+
+        self.assertEqual(result["file_format"], "xliff")
+
 
 class WebExtensionTest(DiscoveryTestCase):
     def test_basic(self) -> None:
@@ -2250,6 +2372,38 @@ class TOMLDiscoveryTest(DiscoveryTestCase):
             ],
         )
 
+    def test_go_i18n_detected_without_parser(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            content = '[[messages]]\nid = "hello"\n' + 'other = "value"\n' * 10000
+            (tmppath / "en.toml").write_text(content, encoding="utf-8")
+            discovery = TOMLDiscovery(Finder(tmppath))
+            result: ResultDict = {"filemask": "*.toml", "template": "en.toml"}
+
+            with patch.object(files_module.tomllib, "loads") as loads:
+                discovery.adjust_format(result)
+
+        loads.assert_not_called()
+        self.assertEqual(result["file_format"], "go-i18n-toml")
+
+    def test_go_i18n_inline_messages_uses_parser(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            (tmppath / "en.toml").write_text(
+                'messages = [{id = "hello", translation = "Hello"}]\n',
+                encoding="utf-8",
+            )
+            discovery = TOMLDiscovery(Finder(tmppath))
+            result: ResultDict = {"filemask": "*.toml", "template": "en.toml"}
+
+            with patch.object(
+                files_module.tomllib, "loads", wraps=files_module.tomllib.loads
+            ) as loads:
+                discovery.adjust_format(result)
+
+        loads.assert_called_once()
+        self.assertEqual(result["file_format"], "go-i18n-toml")
+
 
 class ARBDiscoveryTest(DiscoveryTestCase):
     def test_basic(self) -> None:
@@ -2442,6 +2596,31 @@ class CSVHelperTest(DiscoveryTestCase):
                 [["source", "target"], ["Hello", "Ahoj"]],
             )
 
+    def test_read_csv_rows_header_skips_sniffer(self) -> None:
+        with patch.object(files_module.csv.Sniffer, "sniff") as sniff:
+            self.assertEqual(
+                self._read_rows("'source';'target'\n'Hello; world';'Ahoj'\n"),
+                [["source", "target"], ["Hello; world", "Ahoj"]],
+            )
+        sniff.assert_not_called()
+
+    def test_csv_header_dialect(self) -> None:
+        dialect = files_module._detect_csv_header_dialect(
+            '\ufeff"location", "Source", "target"\r'
+        )
+        self.assertIsNotNone(dialect)
+        dialect = cast("type[csv.Dialect]", dialect)
+        self.assertEqual(
+            (dialect.delimiter, dialect.quotechar, dialect.skipinitialspace),
+            (",", '"', True),
+        )
+        dialect = files_module._detect_csv_header_dialect("context\tid\tfuzzy")
+        self.assertIsNotNone(dialect)
+        dialect = cast("type[csv.Dialect]", dialect)
+        self.assertEqual(dialect.delimiter, "\t")
+        self.assertIsNone(files_module._detect_csv_header_dialect("source"))
+        self.assertIsNone(files_module._detect_csv_header_dialect("name,value"))
+
     def test_read_csv_rows_limits_dialect_sniffer_input(self) -> None:
         content = ',"' + "a" * 5 + '",' * 2048
         with patch.object(
@@ -2654,12 +2833,48 @@ class FormatSniffLimitTest(DiscoveryTestCase):
             }
 
             with patch.object(
-                files_module, "_read_binary_sniff_sample", return_value=None
+                files_module._XliffSniffer,
+                "sniff",
+                return_value=False,
             ):
                 discovery.adjust_format(result)
 
         self.assertEqual(result["file_format"], "xliff")
 
+    def test_xml_sniffer_stops_after_first_chunk(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            content = '<TS version="1.1">' + "<message/>" * 100000 + "</TS>"
+            (tmppath / "en.ts").write_text(content, encoding="utf-8")
+            finder = Finder(tmppath)
+            path = next(finder.mask_matches("en.ts"))
+            sniffer = files_module._QtSniffer()
+
+            self.assertTrue(sniffer.sniff(finder, path))
+
+        self.assertEqual(sniffer.root, "TS")
+        self.assertEqual(sniffer.attributes, {"version": "1.1"})
+        self.assertEqual(sniffer.bytes_read, files_module.XML_SNIFF_CHUNK_SIZE)
+
+    def test_xliff_sniffer_detects_utf32_variant(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            content = (
+                '<?xml version="1.0" encoding="UTF-32"?>'
+                '<xliff><file original="Localizable.strings"/></xliff>'
+            )
+            (tmppath / "en.xliff").write_bytes(content.encode("utf-32"))
+            discovery = XliffDiscovery(Finder(tmppath))
+            result: ResultDict = {
+                "filemask": "*.xliff",
+                "file_format": "xliff",
+                "template": "en.xliff",
+            }
+
+            discovery.adjust_format(result)
+
+        self.assertEqual(result["file_format"], "apple-xliff")
+
     def test_large_json_template_skips_content_refinement(self) -> None:
         with tempfile.TemporaryDirectory() as tmpdir:
             tmppath = Path(tmpdir)
@@ -2853,6 +3068,26 @@ class PHPDiscoveryTest(DiscoveryTestCase):
         discovery.adjust_format(result)
         self.assertEqual(result, {"filemask": "test/*.php"})
 
+    def test_single_read(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            (tmppath / "en.php").write_text(
+                "<?php\nreturn [\n    'items' => 'one|many',\n];\n", encoding="utf-8"
+            )
+            finder = Finder(tmppath)
+            discovery = PHPDiscovery(finder)
+            result: ResultDict = {
+                "filemask": "*.php",
+                "file_format": "php",
+                "template": "en.php",
+            }
+
+            with patch.object(finder, "open", wraps=finder.open) as opened:
+                discovery.adjust_format(result)
+
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(result["file_format"], "laravel")
+
     def test_laravel_plural_detection(self) -> None:
         tests = (
             (b"'apples' => 'one|many'", True),
@@ -3153,6 +3388,66 @@ class FlatXMLDiscoveryTest(DiscoveryTestCase):
             ],
         )
 
+    def test_probe_sample(self) -> None:
+        languages = [
+            "ar",
+            "bg",
+            "ca",
+            "cs",
+            "da",
+            "de",
+            "el",
+            "es",
+            "et",
+            "fi",
+            "fr",
+            "ga",
+            "he",
+            "hi",
+            "hr",
+            "hu",
+            "id",
+            "it",
+            "ja",
+            "ko",
+            "lt",
+            "lv",
+            "nl",
+            "pl",
+            "pt",
+            "ro",
+            "ru",
+            "sk",
+            "sv",
+            "uk",
+        ]
+        paths = ["strings/en.xml", *(f"strings/{code}.xml" for code in languages)]
+        discovery = FlatXMLDiscovery(self.get_finder(paths), probe_limit=4)
+        result: ResultDict = {"filemask": "strings/*.xml", "template": "strings/en.xml"}
+
+        self.assertEqual(
+            [path.as_posix() for path in discovery.iter_probe_paths(result)],
+            [
+                "strings/en.xml",
+                f"strings/{languages[0]}.xml",
+                f"strings/{languages[10]}.xml",
+                f"strings/{languages[20]}.xml",
+            ],
+        )
+        self.assertEqual(
+            [match.meta.get("probed") for match in discovery.discover()], [4]
+        )
+
+        discovery = FlatXMLDiscovery(self.get_finder(paths), probe_limit=None)
+        self.assertEqual(
+            [match.meta.get("probed") for match in discovery.discover()], [31]
+        )
+
+        discovery = FlatXMLDiscovery(self.get_finder(paths))
+        self.assertEqual(
+            [match.meta.get("probed") for match in discovery.discover()], [31]
+        )
+
     def test_template_required(self) -> None:
         discovery = FlatXMLDiscovery(
             self.get_finder(["tests/fixtures/cy_natural_2.xml"]),
@@ -4,12 +4,14 @@
 """File finder tests."""
 
 import pathlib
+import re
 import tempfile
 from fnmatch import translate
 from unittest import TestCase
 from unittest.mock import patch
 
-from .finder import Finder
+from .cancel import CancellationToken
+from .finder import ACTIVE_ACCESS, Finder
 
 
 class FinderTest(TestCase):
@@ -120,6 +122,23 @@ class FinderTest(TestCase):
             list(finder.filter_files(translate("resources.res[xw]"))),
         )
 
+    def test_query_cache(self) -> None:
+        finder = self.get_finder(["res/values/strings.xml", "locale/cs.po"])
+
+        first = finder.filter_files(
+            r"(strings.*|.*strings)\.xml", ".*/values", candidate_suffixes=(".xml",)
+        )
+        second = finder.filter_files(
+            r"(strings.*|.*strings)\.xml", ".*/values", candidate_suffixes=[".XML"]
+        )
+
+        self.assertIs(first, second)
+        self.assertEqual(first, (pathlib.PurePath("res/values/strings.xml"),))
+        self.assertIs(finder.filter_masks("*.po"), finder.filter_masks(["*.po"]))
+        info = finder.cache_info()
+        self.assertEqual((info["query"].hits, info["query"].misses), (2, 2))
+        self.assertGreater(info["compile_pattern"].currsize, 0)
+
     def test_mask_matches_uses_literal_question_and_bracket(self) -> None:
         finder = self.get_finder(
             [
@@ -234,3 +253,174 @@ class FinderTest(TestCase):
 
         self.assertEqual(finder.files, [])
         self.assertEqual(finder.dirnames, set())
+
+    def test_scope(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            for name in (
+                "README.md",
+                "locale/messages.pot",
+                "locale/cs/LC_MESSAGES/messages.po",
+                "locale/other/deep/file.po",
+                "other/messages.pot",
+                "build/messages.pot",
+            ):
+                (root / name).parent.mkdir(parents=True, exist_ok=True)
+                (root / name).write_text("", encoding="utf-8")
+
+            self.assertEqual(
+                Finder.get_mask_scope("locale/*/LC_MESSAGES/*.po"), "locale"
+            )
+            self.assertIsNone(Finder.get_mask_scope("*/messages.po"))
+            finder = Finder(root, scope="locale/cs")
+
+            self.assertEqual(
+                [path.as_posix() for path in finder.filter_files(".*")],
+                [
+                    "README.md",
+                    "locale/messages.pot",
+                    "locale/cs/LC_MESSAGES/messages.po",
+                ],
+            )
+            self.assertTrue(finder.has_dir("locale/other"))
+            self.assertTrue(finder.has_file("locale/other/deep/file.po"))
+            self.assertFalse(finder.has_file("locale/cs/missing.po"))
+            self.assertTrue(finder.has_file("other/messages.pot"))
+            self.assertFalse(finder.has_file("other/missing.pot"))
+            self.assertFalse(finder.has_file("build/messages.pot"))
+            self.assertFalse(finder.has_file("other"))
+
+    def test_iter_chunks_limit(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            (root / "data.txt").write_bytes(b"abcdefghij")
+            finder = Finder(root)
+            path = pathlib.PurePath("data.txt")
+
+            self.assertEqual(
+                list(finder.iter_chunks(path, 4, limit=6)), [b"abcd", b"ef"]
+            )
+            self.assertEqual(
+                list(finder.iter_chunks(path, 4)), [b"abcd", b"efgh", b"ij"]
+            )
+
+    def test_scan_markers(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            (root / "data.txt").write_bytes(b"first line\nkey = value\nlast")
+            finder = Finder(root)
+            path = pathlib.PurePath("data.txt")
+            key_re = re.compile(rb"^key =", re.MULTILINE)
+            last_re = re.compile(rb"^last$", re.MULTILINE)
+
+            # Byte markers spanning chunk boundary
+            self.assertEqual(finder.scan(path, (b"line\nkey",), chunk_size=3), 0)
+            self.assertIsNone(finder.scan(path, (b"missing",), chunk_size=3))
+            # Regular expressions on complete lines and trailing line
+            self.assertEqual(finder.scan(path, (key_re,), chunk_size=3), 0)
+            self.assertEqual(finder.scan(path, (last_re,), chunk_size=3), 0)
+            # Earlier markers take precedence
+            self.assertEqual(finder.scan(path, (b"last", key_re), chunk_size=3), 0)
+            self.assertEqual(finder.scan(path, (b"missing", key_re)), 1)
+            # Limit
+            self.assertIsNone(finder.scan(path, (key_re,), chunk_size=3, limit=14))
+            # All markers
+            self.assertEqual(
+                finder.scan_all(path, (b"last", key_re, last_re), chunk_size=3),
+                {0, 1, 2},
+            )
+            self.assertEqual(finder.scan_all(path, (b"missing", key_re)), {1})
+            self.assertEqual(
+                finder.scan_all(path, (b"first", key_re), chunk_size=3, limit=14),
+                {0},
+            )
+
+    def test_fingerprint(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = pathlib.Path(tmpdir)
+            (root / "first.txt").write_bytes(b"a" * 10 + b"b" + b"a" * 10)
+            (root / "second.txt").write_bytes(b"a" * 10 + b"c" + b"a" * 10)
+            (root / "third.txt").write_bytes(b"a" * 21)
+            finder = Finder(root)
+            first, second, third = (
+                finder.fingerprint(pathlib.PurePath(f"{name}.txt"), 10)
+                for name in ("first", "second", "third")
+            )
+            complete = finder.fingerprint(pathlib.PurePath("first.txt"), 11)
+
+        # Only prefix and suffix are considered
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+        self.assertNotEqual(first, complete)
+
+
+class FinderUpdateTest(TestCase):
+    def test_update(self) -> None:
+        paths = ["po/cs.po", "po/de.po", "po/DE.po", "web/en.json", "README"]
+        finder = FinderTest.get_finder(paths)
+        finder.filter_files(r".*\.po", "po")
+        changed = ["po/cs.po", "po/fr.po", "web/EN.json", "web/en.json", "LICENSE"]
+        finder.update(
+            (
+                [
+                    (pathlib.PurePath(path), pathlib.PurePath(path), path)
+                    for path in changed[1:3]
+                ],
+                [],
+            ),
+            (
+                [
+                    (pathlib.PurePath(path), pathlib.PurePath(path), path)
+                    for path in changed[::3]
+                ],
+                [],
+            ),
+        )
+        expected = FinderTest.get_finder(
+            ["po/de.po", "po/DE.po", "po/fr.po", "web/EN.json", "README"]
+        )
+        self.assertEqual(finder.lc_files, expected.lc_files)
+        self.assertEqual(finder.files, expected.files)
+        self.assertEqual(finder.filenames, expected.filenames)
+        for pattern in (r".*\.po", "en.json", r".*\.json"):
+            self.assertEqual(
+                finder.filter_files(pattern, candidate_suffixes=(".po", ".json")),
+                expected.filter_files(pattern, candidate_suffixes=(".po", ".json")),
+            )
+        for mask in ("po/*.po", "web/en.json", "*/*.json"):
+            self.assertEqual(
+                list(finder.mask_matches(mask)), list(expected.mask_matches(mask))
+            )
+
+    def test_cancel(self) -> None:
+        cancel = CancellationToken()
+        cancel.cancel()
+        finder = Finder(pathlib.Path(__file__).parent, cancel=cancel)
+        self.assertEqual(finder.files, [])
+        self.assertTrue(cancel.interrupted)
+
+    def test_track(self) -> None:
+        finder = FinderTest.get_finder(["po/cs.po", "po/de.po", "README"])
+        with finder.track() as access:
+            finder.filter_masks("*.po")
+            finder.has_file("po/messages.pot")
+            list(finder.mask_matches("docs/*.rst"))
+        finder.has_file("LICENSE")
+        self.assertTrue(access.is_affected("po/fr.po"))
+        self.assertTrue(access.is_affected("po/messages.pot"))
+        self.assertTrue(access.is_affected("docs/index.rst"))
+        self.assertFalse(access.is_affected("po/README"))
+        self.assertTrue(access.is_affected("README.po"))
+        self.assertFalse(access.is_affected("LICENSE"))
+        self.assertEqual(ACTIVE_ACCESS.get(), ())
+
+    def test_track_nested(self) -> None:
+        finder = FinderTest.get_finder(["po/cs.po", "README"])
+        with finder.track() as outer:
+            finder.has_file("README")
+            with finder.track() as inner:
+                finder.has_file("po/messages.pot")
+        self.assertTrue(outer.is_affected("README"))
+        self.assertTrue(outer.is_affected("po/messages.pot"))
+        self.assertFalse(inner.is_affected("README"))
+        self.assertTrue(inner.is_affected("po/messages.pot"))
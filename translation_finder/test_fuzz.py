@@ -6,7 +6,10 @@
 from __future__ import annotations
 
 import json
+import re
+import string
 import tempfile
+import tomllib
 import warnings
 from pathlib import Path, PurePath
 from typing import TYPE_CHECKING
@@ -14,9 +17,19 @@ from unittest import TestCase
 
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
+from weblate_language_data.country_codes import COUNTRIES
+from weblate_language_data.language_codes import LANGUAGES
 
 from .api import discover
-from .discovery.base import BaseDiscovery
+from .data import LANGUAGES_BLACKLIST
+from .discovery.base import (
+    LOCALES,
+    TOKEN_SPLIT,
+    BaseDiscovery,
+    TokenClassifier,
+    substitute_tokens,
+)
+from .discovery.files import _sniff_go_i18n_toml
 from .discovery.result import DiscoveryResult
 from .finder import Finder
 
@@ -33,6 +46,11 @@ FUZZ_SETTINGS = settings(
 LANGUAGE_CODES = st.sampled_from(
     ("en", "cs", "de", "es", "fr", "pt_BR", "pt-BR", "zh_Hans", "sr_Latn"),
 )
+CODE_TOKENS = st.one_of(
+    st.sampled_from(sorted(LANGUAGES | LANGUAGES_BLACKLIST)),
+    st.sampled_from(sorted(COUNTRIES | LOCALES)),
+    st.text(alphabet=string.ascii_lowercase, max_size=4),
+)
 EXTENSIONS = st.sampled_from(
     (
         "arb",
@@ -83,6 +101,43 @@ STRING_RESULT_FIELDS = (
     "new_base",
     "template",
 )
+TOML_LINES = st.sampled_from(
+    (
+        "",
+        "# comment",
+        "[[messages]]",
+        '[["messages"]]',
+        "[[ messages ]] # comment",
+        "[messages]",
+        "[messages.id]",
+        "[messages.other]",
+        "[[messages.other]]",
+        "[other]",
+        "[other.messages]",
+        "[[other]]",
+        "[broken",
+        "id = 1",
+        '"id" = "hello"',
+        "'id' = 'hello'",
+        "id.nested = 1",
+        "ids = 1",
+        "identifier = 1",
+        "description = 'id = 1'",
+        "messages = []",
+        "messages = [{id = 1}]",
+        "messages.id = 1",
+        'key = """',
+        'id = 1"""',
+        "key = [",
+        "]",
+        "key = [1, 2]",
+        "key = { id = 1 }",
+        'key = "[[messages]]"',
+        'key = "id\u2028id = 1"',
+    ),
+)
+TOKEN_WORDS = st.sampled_from(("", "cs", "de", "pt", "BR", "en", "x", "po", "json"))
+TOKEN_SEPARATORS = st.sampled_from(("_", ".", "-"))
 FileContent = str | bytes
 FileSet = dict[str, FileContent]
 
@@ -126,6 +181,16 @@ def path_name(draw: st.DrawFn) -> str:
 PATH_NAMES = st.lists(path_name(), min_size=1, max_size=16, unique=True)
 
 
+@st.composite
+def toml_document(draw: st.DrawFn) -> str:
+    """Generate TOML-like documents mixing messages tables and other content."""
+    lines = draw(st.lists(TOML_LINES, max_size=12))
+    if draw(st.booleans()):
+        key = draw(NAME_TOKEN)
+        lines.append(f"{key} = {json.dumps(draw(CONTENT_VALUE))}")
+    return draw(st.sampled_from(("\n", "\r\n"))).join(lines)
+
+
 def language_pair(directory: str, extension: str, content: FileContent) -> FileSet:
     """Build source and target files for template-based discovery."""
     return {
@@ -378,6 +443,39 @@ def make_dir_items(paths: Iterable[str]) -> list[tuple[PurePath, PurePath, str]]
     return make_path_items(directories)
 
 
+@st.composite
+def token_part(draw: st.DrawFn) -> str:
+    """Generate path part with repeated tokens and separators."""
+    words = draw(st.lists(TOKEN_WORDS, min_size=1, max_size=5))
+    separators = draw(
+        st.lists(TOKEN_SEPARATORS, min_size=len(words) - 1, max_size=len(words) - 1)
+    )
+    result = words[0]
+    for separator, word in zip(separators, words[1:], strict=True):
+        result += separator + word
+    return result or "x"
+
+
+def regex_path_masks(parts: list[str], wildcards: list[str | None]) -> list[str]:
+    """Derive masks using regular expression substitution."""
+    masks = []
+    skip = set()
+    for pos, part in enumerate(parts):
+        if pos in skip:
+            continue
+        wildcard = wildcards[pos]
+        if wildcard:
+            mask_parts = parts.copy()
+            match = re.compile(f"(^|[._-]){re.escape(part)}($|[._-])")
+            for i, current in enumerate(mask_parts):
+                if match.findall(current):
+                    skip.add(i)
+                    mask_parts[i] = match.sub(f"\\g<1>{wildcard}\\g<2>", current)
+            mask_parts[pos] = wildcard
+            masks.append("/".join(mask_parts))
+    return masks
+
+
 def write_files(root: Path, files: FileSet) -> None:
     """Write generated file content under a temporary root."""
     for filename, content in files.items():
@@ -424,6 +522,82 @@ class FuzzTest(TestCase):
             self.assertNotIn("/", wildcard)
             self.assertEqual(wildcard.strip(), wildcard)
 
+    @FUZZ_SETTINGS
+    @given(
+        tokens=st.lists(CODE_TOKENS, min_size=1, max_size=3),
+        separator=st.sampled_from(("_", "-")),
+        upper=st.booleans(),
+    )
+    def test_language_code_lookup_matches_source_data(
+        self, tokens: list[str], separator: str, *, upper: bool
+    ) -> None:
+        code = separator.join(tokens)
+        if upper:
+            code = code.upper()
+        normalized = code.lower().replace("-", "_")
+        lang, _separator, country = normalized.partition("_")
+        expected = (
+            normalized in LANGUAGES and normalized not in LANGUAGES_BLACKLIST
+        ) or (
+            "_" in normalized
+            and lang in LANGUAGES
+            and lang not in LANGUAGES_BLACKLIST
+            and (country in COUNTRIES or country in LOCALES)
+        )
+
+        self.assertEqual(TokenClassifier().is_language_code(code), expected)
+
+    @FUZZ_SETTINGS
+    @given(haystack=token_part(), needle=token_part())
+    def test_token_substitution_matches_regex(self, haystack: str, needle: str) -> None:
+        match = re.compile(f"(^|[._-]){re.escape(needle)}($|[._-])")
+        expected = (
+            match.sub("\\g<1>*\\g<2>", haystack) if match.search(haystack) else None
+        )
+
+        self.assertEqual(
+            substitute_tokens(
+                TOKEN_SPLIT.split(haystack), TOKEN_SPLIT.split(needle), "*"
+            ),
+            expected,
+        )
+
+    @FUZZ_SETTINGS
+    @given(
+        parts=st.lists(st.one_of(token_part(), wildcard_part()), min_size=1, max_size=4)
+    )
+    def test_path_masks_match_regex_derivation(self, parts: list[str]) -> None:
+        discovery = BaseDiscovery(Finder(PurePath(), mock=([], [])))
+        wildcards = [discovery.get_wildcard(part) for part in parts]
+
+        self.assertEqual(
+            [
+                result["filemask"]
+                for result in discovery.get_path_masks(parts, wildcards)
+            ],
+            regex_path_masks(parts, wildcards),
+        )
+
+    @FUZZ_SETTINGS
+    @given(content=toml_document())
+    def test_go_i18n_toml_sniffing_matches_parser(self, content: str) -> None:
+        sniffed = _sniff_go_i18n_toml(content)
+        try:
+            data = tomllib.loads(content)
+        except tomllib.TOMLDecodeError:
+            # The line scanner does not validate syntax
+            return
+
+        messages = data.get("messages")
+        expected = (
+            isinstance(messages, list)
+            and len(messages) > 0
+            and isinstance(messages[0], dict)
+            and "id" in messages[0]
+        )
+        if sniffed is not None:
+            self.assertEqual(sniffed, expected)
+
     @FUZZ_SETTINGS
     @given(eager=st.booleans(), paths=PATH_NAMES, source_language=LANGUAGE_CODES)
     def test_discovery_accepts_generated_mock_paths(
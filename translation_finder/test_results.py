@@ -41,6 +41,18 @@ class ResultTest(TestCase):
             "{'file_format': 'a'} [meta:{'priority': 10, 'discovery': '', 'origin': None}]",
         )
 
+    def test_copy(self) -> None:
+        result = DiscoveryResult(
+            {"file_format": "po", "file_format_params": {"po_line_wrap": 77}}
+        )
+        result.meta["priority"] = 10
+        copied = result.copy()
+        self.assertEqual(copied, result)
+        copied["file_format_params"]["po_line_wrap"] = -1
+        copied.meta["priority"] = 20
+        self.assertEqual(result["file_format_params"], {"po_line_wrap": 77})
+        self.assertEqual(result.meta["priority"], 10)
+
     def test_pickle(self) -> None:
         original_result = DiscoveryResult({"file_format": "a"})
         original_result.meta["priority"] = 10
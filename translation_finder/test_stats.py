@@ -0,0 +1,140 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Discovery statistics tests."""
+
+import pstats
+import tempfile
+from functools import lru_cache
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase
+
+from .api import cli, discover
+from .budget import SniffBudget
+from .finder import Finder
+from .stats import DiscoveryStats
+from .test_api import TEST_DATA
+
+
+class DiscoveryStatsTest(TestCase):
+    def test_discover(self) -> None:
+        stats = DiscoveryStats()
+        budget = SniffBudget()
+        self.assertEqual(
+            discover(TEST_DATA, stats=stats, budget=budget), discover(TEST_DATA)
+        )
+        data = stats.as_dict()
+        counters = data["counters"]
+        self.assertGreater(counters["scan.files"], 0)
+        self.assertGreater(counters["scan.dirs"], 0)
+        self.assertGreater(counters["mask_matches"], 0)
+        self.assertGreaterEqual(counters["files_opened"], budget.files_opened)
+        self.assertGreaterEqual(counters["bytes_read"], budget.bytes_read)
+        for phase in (
+            "scan",
+            "index",
+            "GettextDiscovery.get_masks",
+            "GettextDiscovery.fill_in_template",
+            "GettextDiscovery.fill_in_new_base",
+            "JSONDiscovery.adjust_format",
+        ):
+            self.assertIn(phase, data["timings"])
+            self.assertGreater(data["calls"][phase], 0)
+        self.assertEqual(data["calls"]["GettextDiscovery.get_masks"], 1)
+
+    def test_classifier(self) -> None:
+        lookups = []
+        for _run in range(2):
+            stats = DiscoveryStats()
+            discover(TEST_DATA, stats=stats)
+            lookups.append(
+                stats.counters["classifier.get_wildcard.hits"]
+                + stats.counters["classifier.get_wildcard.misses"]
+            )
+        # Only lookups made during the run are counted
+        self.assertGreater(lookups[0], 0)
+        self.assertEqual(lookups[0], lookups[1])
+        self.assertEqual(stats.counters["classifier.get_wildcard.misses"], 0)
+
+    def test_finder(self) -> None:
+        finder = Finder(TEST_DATA)
+        stats = DiscoveryStats()
+        discover(TEST_DATA, finder=finder, stats=stats)
+        info = finder.cache_info()["query"]
+        self.assertEqual(stats.counters["finder.query.hits"], info.hits)
+        self.assertEqual(stats.counters["finder.query.misses"], info.misses)
+        self.assertGreater(info.hits, 0)
+        # Queries answered by the previous run are hits
+        stats = DiscoveryStats()
+        discover(TEST_DATA, finder=finder, stats=stats)
+        self.assertEqual(stats.counters["finder.query.misses"], 0)
+        self.assertGreater(stats.counters["finder.query.hits"], 0)
+
+    def test_measure_caches(self) -> None:
+        cached = lru_cache(maxsize=None)(str)
+        cached(1)
+        stats = DiscoveryStats()
+        with stats.measure_caches("test", lambda: {"str": cached.cache_info()}):
+            cached(1)
+            cached(2)
+        with stats.measure_caches("test", lambda: {"str": cached.cache_info()}):
+            cached.cache_clear()
+            cached(3)
+        self.assertEqual(stats.counters["test.str.hits"], 1)
+        self.assertEqual(stats.counters["test.str.misses"], 2)
+
+    def test_measure_iter(self) -> None:
+        stats = DiscoveryStats()
+        self.assertEqual(list(stats.measure_iter("items", range(3))), [0, 1, 2])
+        self.assertEqual(stats.calls["items"], 1)
+        self.assertIn("items", stats.timings)
+
+    def test_slow_files(self) -> None:
+        stats = DiscoveryStats(slow_threshold=0)
+        discover(TEST_DATA, stats=stats)
+        paths = {slow.path for slow in stats.slow_files}
+        self.assertIn("xliff/en.xlf", paths)
+        self.assertEqual(len(stats.slow_files), stats.counters["files_opened"])
+        stats = DiscoveryStats(slow_threshold=60)
+        discover(TEST_DATA, stats=stats)
+        self.assertEqual(stats.slow_files, [])
+
+
+class StatsCliTest(TestCase):
+    def test_stats(self) -> None:
+        output = StringIO()
+        cli(output, ["--stats", TEST_DATA.as_posix()])
+        self.assertIn("== Statistics ==", output.getvalue())
+        self.assertIn("\nGettextDiscovery ", output.getvalue())
+        self.assertIn("\n  adjust_format ", output.getvalue())
+        self.assertIn("\nclassifier.get_wildcard.hits ", output.getvalue())
+        self.assertIn("\nfinder.query.misses ", output.getvalue())
+        self.assertNotIn("== Slow files ==", output.getvalue())
+
+    def test_trace_slow(self) -> None:
+        output = StringIO()
+        cli(output, ["--trace-slow", "0", TEST_DATA.as_posix()])
+        self.assertIn("== Slow files ==", output.getvalue())
+        self.assertIn("xliff/en.xlf (XliffDiscovery.adjust_format)", output.getvalue())
+        self.assertNotIn("== Statistics ==", output.getvalue())
+
+    def test_profile(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profile = Path(tmpdir) / "discovery.prof"
+            cli(StringIO(), ["--profile", profile.as_posix(), TEST_DATA.as_posix()])
+            profiled = pstats.Stats(profile.as_posix()).get_stats_profile()
+        self.assertIn("discover", profiled.func_profiles)
+
+    def test_socket(self) -> None:
+        with self.assertRaises(SystemExit):
+            cli(
+                StringIO(), ["--stats", "--socket", "daemon.sock", TEST_DATA.as_posix()]
+            )
+
+    def test_socket_trace_slow_zero(self) -> None:
+        with self.assertRaises(SystemExit):
+            cli(
+                StringIO(),
+                ["--trace-slow", "0", "--socket", "daemon.sock", TEST_DATA.as_posix()],
+            )
@@ -0,0 +1,219 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Watch mode tests."""
+
+import pathlib
+import tempfile
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+
+from .api import cli, discover, discover_changes, get_backends, watch
+from .discovery.base import BaseDiscovery
+from .discovery.result import DiscoveryResult, ResultDict
+from .watch import DiscoveryWatcher, is_result_affected
+
+
+class WatchTest(TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = pathlib.Path(tmpdir.name)
+        (self.root / "po").mkdir()
+        (self.root / "po" / "cs.po").write_text("", encoding="utf-8")
+        (self.root / "po" / "de.po").write_text("", encoding="utf-8")
+        self.watcher = DiscoveryWatcher(self.root, get_backends())
+        self.initial = self.watcher.update(())
+
+    def write(self, name: str, content: str = "") -> None:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def test_initial(self) -> None:
+        self.assertEqual(self.initial.added, discover(self.root))
+        self.assertEqual(self.watcher.results, discover(self.root))
+        self.assertEqual(len(self.initial.backends), len(get_backends()))
+
+    def test_unchanged(self) -> None:
+        delta = self.watcher.poll()
+        self.assertFalse(delta)
+        self.assertEqual(delta.backends, [])
+
+    def test_added(self) -> None:
+        self.write("locales/cs/LC_MESSAGES/django.po")
+        self.write("locales/de/LC_MESSAGES/django.po")
+        delta = self.watcher.poll()
+        self.assertIn("GettextDiscovery", delta.backends)
+        self.assertNotIn("AndroidDiscovery", delta.backends)
+        self.assertEqual(
+            [result["filemask"] for result in delta.added],
+            ["locales/*/LC_MESSAGES/django.po"],
+        )
+        self.assertEqual(delta.removed, [])
+        self.assertEqual(self.watcher.results, discover(self.root))
+
+    def test_template(self) -> None:
+        self.write("po/messages.pot")
+        delta = self.watcher.poll()
+        self.assertEqual(delta.added, [])
+        self.assertEqual(
+            [result["new_base"] for result in delta.changed], ["po/messages.pot"]
+        )
+        self.assertEqual(self.watcher.results, discover(self.root))
+
+    def test_removed(self) -> None:
+        (self.root / "po" / "cs.po").unlink()
+        (self.root / "po" / "de.po").unlink()
+        delta = self.watcher.poll()
+        self.assertEqual(delta.removed, self.initial.added)
+        self.assertEqual(self.watcher.results, [])
+
+    def test_unrelated(self) -> None:
+        self.write("README.md", "# Readme")
+        delta = self.watcher.poll()
+        self.assertFalse(delta)
+        self.assertNotIn("GettextDiscovery", delta.backends)
+
+    def test_watch(self) -> None:
+        deltas = watch(self.root, interval=0)
+        self.assertEqual(next(deltas).added, discover(self.root))
+        self.write("po/fr.po")
+        self.write("strings/values/strings.xml", "<resources/>")
+        self.assertEqual(
+            [result["filemask"] for result in next(deltas).added],
+            ["strings/values-*/strings.xml"],
+        )
+
+    def test_cli(self) -> None:
+        output = StringIO()
+        with patch("translation_finder.watch.sleep", side_effect=KeyboardInterrupt):
+            cli(output, ["--watch", self.root.as_posix()])
+        self.assertIn("== Added ==", output.getvalue())
+        self.assertIn("po/*.po", output.getvalue())
+
+    def test_cli_zero(self) -> None:
+        for option in ("--timeout", "--limit", "--max-sniff-files"):
+            with (
+                self.subTest(option=option),
+                patch("translation_finder.watch.sleep", side_effect=KeyboardInterrupt),
+                self.assertRaises(SystemExit),
+            ):
+                cli(StringIO(), ["--watch", option, "0", self.root.as_posix()])
+
+
+class DiscoverChangesTest(TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = pathlib.Path(tmpdir.name)
+        for name in (
+            "po/cs.po",
+            "po/de.po",
+            "locales/cs/LC_MESSAGES/django.po",
+            "locales/de/LC_MESSAGES/django.po",
+        ):
+            self.write(name)
+        self.previous = discover(self.root)
+
+    def write(self, name: str) -> None:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("", encoding="utf-8")
+
+    def discover_changes(self, paths: list[str]) -> tuple[list, list[str]]:
+        detected = []
+        original = BaseDiscovery.fill_in_template
+
+        def fill_in_template(discovery: BaseDiscovery, result: ResultDict) -> None:
+            detected.append(result["filemask"])
+            original(discovery, result)
+
+        with patch.object(BaseDiscovery, "fill_in_template", fill_in_template):
+            results, delta = discover_changes(self.root, self.previous, paths)
+        self.assertEqual(results, discover(self.root))
+        return [delta.added, delta.removed, delta.changed], detected
+
+    def test_unchanged(self) -> None:
+        changes, detected = self.discover_changes([])
+        self.assertEqual(changes, [[], [], []])
+        self.assertEqual(detected, [])
+
+    def test_changed(self) -> None:
+        changes, detected = self.discover_changes(["po/cs.po"])
+        self.assertEqual(changes, [[], [], []])
+        self.assertEqual(detected, ["po/*.po"])
+
+    def test_expanded(self) -> None:
+        self.write("po/en.po")
+        self.previous = discover(self.root)
+        changes, detected = self.discover_changes(["locales/cs/LC_MESSAGES/django.po"])
+        self.assertEqual(changes, [[], [], []])
+        self.assertEqual(detected, ["locales/*/LC_MESSAGES/django.po"])
+        self.write("po/messages.pot")
+        changes, detected = self.discover_changes(["po/messages.pot"])
+        self.assertEqual(
+            [result["file_format"] for result in changes[2]], ["po", "po-mono"]
+        )
+
+    def test_template(self) -> None:
+        self.write("po/messages.pot")
+        changes, detected = self.discover_changes(["po/messages.pot"])
+        self.assertEqual(
+            [result["new_base"] for result in changes[2]], ["po/messages.pot"]
+        )
+        self.assertEqual(detected, ["po/*.po"])
+
+    def test_reused_copy(self) -> None:
+        for result in self.previous:
+            result["file_format_params"] = {"po_line_wrap": 77}
+        results, _delta = discover_changes(self.root, self.previous, [])
+        self.assertEqual(results, self.previous)
+        for result in results:
+            result["file_format_params"]["po_line_wrap"] = -1
+            result.meta["priority"] = -1
+        for result in self.previous:
+            self.assertEqual(result["file_format_params"], {"po_line_wrap": 77})
+            self.assertNotEqual(result.meta["priority"], -1)
+
+    def test_sibling_template(self) -> None:
+        self.write("po/cs/app.po")
+        self.write("po/de/app.po")
+        self.previous = discover(self.root)
+        self.write("pot/app.pot")
+        changes, detected = self.discover_changes(["pot/app.pot"])
+        self.assertEqual(
+            [result.get("new_base") for result in changes[2]], ["pot/app.pot"]
+        )
+        self.assertEqual(detected, ["po/*/app.po"])
+
+    def test_added(self) -> None:
+        self.write("web/cs.po")
+        self.write("web/de.po")
+        changes, detected = self.discover_changes(["web/cs.po", "web/de.po"])
+        self.assertEqual([result["filemask"] for result in changes[0]], ["web/*.po"])
+        self.assertEqual(detected, ["web/*.po"])
+
+    def test_removed(self) -> None:
+        for name in ("po/cs.po", "po/de.po"):
+            (self.root / name).unlink()
+        changes, detected = self.discover_changes(["po/cs.po", "po/de.po"])
+        self.assertEqual([result["filemask"] for result in changes[1]], ["po/*.po"])
+        self.assertEqual(detected, [])
+
+    def test_affected(self) -> None:
+        result = DiscoveryResult(
+            {
+                "filemask": "locales/*/app.json",
+                "template": "src/app.json",
+                "file_format": "json",
+            }
+        )
+        self.assertTrue(is_result_affected(result, ["locales/cs/app.json"]))
+        self.assertTrue(is_result_affected(result, ["src/app.json"]))
+        self.assertTrue(is_result_affected(result, ["locales/app.json"]))
+        self.assertFalse(is_result_affected(result, ["src/other.json"]))
+        self.assertFalse(is_result_affected(result, [".tx/config"]))
+        result.meta["discovery"] = "TransifexDiscovery"
+        self.assertTrue(is_result_affected(result, [".tx/config"]))
@@ -0,0 +1,233 @@
+# Copyright © Michal Čihař <michal@weblate.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Watching a tree and updating discovery results on changes."""
+
+from __future__ import annotations
+
+from fnmatch import fnmatch
+from pathlib import Path
+from time import sleep
+from typing import TYPE_CHECKING
+
+from .discovery.base import PROBE_LIMIT
+from .finder import Finder, escape_mask
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Generator, Sequence
+    from pathlib import PurePath
+
+    from .cache import SniffCache
+    from .discovery.base import BaseDiscovery
+    from .discovery.result import DiscoveryResult
+    from .finder import FinderAccess, PathListItem, PathListType
+
+# Seconds between checking the tree for changes
+WATCH_INTERVAL = 1.0
+
+FileState = tuple[int, int]
+# Result keys referencing a single file
+FILE_KEYS = ("template", "new_base", "intermediate")
+TRANSIFEX_CONFIG = ".tx/config"
+
+
+def is_result_affected(result: DiscoveryResult, paths: Collection[str]) -> bool:
+    """
+    Check whether changed paths can change a discovery result.
+
+    Paths and queries used while detecting the result are affected, as well
+    as paths referenced by the result. Files added to directories of the file
+    mask can become its template or new base, and Transifex results depend on
+    the configuration.
+    """
+    filemask = escape_mask(result["filemask"])
+    files = {result[key] for key in FILE_KEYS if key in result}
+    parts = filemask.split("/")
+    directories = ["/".join(parts[:pos]) for pos in range(1, len(parts))]
+    transifex = result.meta["discovery"] == "TransifexDiscovery"
+    for path in paths:
+        if path in files or fnmatch(path, filemask):
+            return True
+        if result.access is not None and result.access.is_affected(path):
+            return True
+        if transifex and (
+            path == TRANSIFEX_CONFIG or path.endswith(f"/{TRANSIFEX_CONFIG}")
+        ):
+            return True
+        directory = path.rsplit("/", 1)[0] if "/" in path else ""
+        if any(fnmatch(directory, mask) for mask in directories):
+            return True
+    return False
+
+
+def get_result_key(result: DiscoveryResult) -> tuple[str, str, bool]:
+    """Return key identifying a result among results of a single discovery."""
+    return (result["filemask"], result.get("file_format", ""), "template" in result)
+
+
+class PollingObserver:
+    """
+    Detect changes in a tree by comparing its listings.
+
+    Files are considered changed when their modification time or size differ.
+    """
+
+    def __init__(self, finder: Finder) -> None:
+        self.finder = finder
+        self.files, self.dirs = self.snapshot()
+
+    def snapshot(
+        self,
+    ) -> tuple[dict[str, tuple[PathListItem, FileState]], dict[str, PathListItem]]:
+        """List files with their state and dirs in the tree."""
+        files: PathListType = []
+        dirs: PathListType = []
+        self.finder.list_files(self.finder.root, files, dirs)
+        states = {}
+        for item in files:
+            try:
+                stat = Path(item[0]).stat()
+            except OSError:
+                continue
+            states[item[2]] = (item, (stat.st_mtime_ns, stat.st_size))
+        return states, {item[2]: item for item in dirs}
+
+    def poll(self) -> set[str]:
+        """Update the finder with changes since the last poll and return them."""
+        files, dirs = self.snapshot()
+        added_files = [
+            item for name, (item, _state) in files.items() if name not in self.files
+        ]
+        removed_files = [
+            item for name, (item, _state) in self.files.items() if name not in files
+        ]
+        added_dirs = [item for name, item in dirs.items() if name not in self.dirs]
+        removed_dirs = [item for name, item in self.dirs.items() if name not in dirs]
+        changed = {
+            name
+            for name, (_item, state) in files.items()
+            if name in self.files and self.files[name][1] != state
+        }
+        self.files, self.dirs = files, dirs
+        if added_files or removed_files or added_dirs or removed_dirs:
+            self.finder.update((added_files, added_dirs), (removed_files, removed_dirs))
+        changed.update(
+            item[2]
+            for item in (*added_files, *removed_files, *added_dirs, *removed_dirs)
+        )
+        return changed
+
+
+class DiscoveryDelta:
+    """Discovery results changed by a batch of changes in the tree."""
+
+    def __init__(self, paths: Collection[str]) -> None:
+        self.paths = paths
+        self.backends: list[str] = []
+        self.added: list[DiscoveryResult] = []
+        self.removed: list[DiscoveryResult] = []
+        self.changed: list[DiscoveryResult] = []
+
+    def __bool__(self) -> bool:
+        """Check whether any result has changed."""
+        return bool(self.added or self.removed or self.changed)
+
+    def compare(
+        self, previous: list[DiscoveryResult], current: list[DiscoveryResult]
+    ) -> None:
+        """Add differences between results of a backend."""
+        old = {get_result_key(result): result for result in previous}
+        new = {get_result_key(result): result for result in current}
+        for key, result in new.items():
+            if key not in old:
+                self.added.append(result)
+            elif old[key] != result:
+                self.changed.append(result)
+        self.removed.extend(result for key, result in old.items() if key not in new)
+
+
+class DiscoveryWatcher:
+    """
+    Keep discovery results of a tree up to date.
+
+    A backend is evaluated again only when a changed path matches the files
+    it listed, checked or read during its last evaluation.
+    """
+
+    def __init__(  # ruff:ignore[too-many-arguments]
+        self,
+        root: PurePath | str,
+        backends: Sequence[type[BaseDiscovery]],
+        *,
+        source_language: str = "en",
+        eager: bool = False,
+        hint: str | None = None,
+        probe_limit: int | None = PROBE_LIMIT,
+        cache: SniffCache | None = None,
+    ) -> None:
+        self.finder = Finder(root)
+        self.observer = PollingObserver(self.finder)
+        self.backends = backends
+        self.source_language = source_language
+        self.eager = eager
+        self.hint = hint
+        self.probe_limit = probe_limit
+        self.cache = cache
+        self.backend_results: dict[str, list[DiscoveryResult]] = {}
+        self.accesses: dict[str, FinderAccess] = {}
+
+    @property
+    def results(self) -> list[DiscoveryResult]:
+        """Current discovery results."""
+        return sorted(
+            result for results in self.backend_results.values() for result in results
+        )
+
+    def evaluate(self, backend: type[BaseDiscovery]) -> list[DiscoveryResult]:
+        """Evaluate the backend, recording what it used."""
+        instance = backend(
+            self.finder,
+            self.source_language,
+            probe_limit=self.probe_limit,
+            cache=self.cache,
+        )
+        with self.finder.track() as access:
+            results = list(instance.discover(eager=self.eager, hint=self.hint))
+        self.accesses[backend.__name__] = access
+        return results
+
+    def update(self, paths: Collection[str]) -> DiscoveryDelta:
+        """
+        Evaluate backends affected by changed paths.
+
+        Backends not evaluated yet are evaluated as well, so the first update
+        returns all results as added.
+        """
+        delta = DiscoveryDelta(paths)
+        for backend in self.backends:
+            name = backend.__name__
+            access = self.accesses.get(name)
+            if access is not None and not any(
+                access.is_affected(path) for path in paths
+            ):
+                continue
+            delta.backends.append(name)
+            current = self.evaluate(backend)
+            delta.compare(self.backend_results.get(name, []), current)
+            self.backend_results[name] = current
+        return delta
+
+    def poll(self) -> DiscoveryDelta:
+        """Check the tree for changes and update results."""
+        paths = self.observer.poll()
+        if not paths:
+            return DiscoveryDelta(paths)
+        return self.update(paths)
+
+    def watch(self, interval: float = WATCH_INTERVAL) -> Generator[DiscoveryDelta]:
+        """Yield changes of the results, checking the tree every interval."""
+        while True:
+            sleep(interval)
+            if delta := self.poll():
+                yield delta